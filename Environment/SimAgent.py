@@ -1,4 +1,5 @@
-import pygame
+import math
+
 import numpy as np
 
 def circ_mean(angles):
@@ -12,12 +13,86 @@ def angle_diff(a, b):
     return (a - b + np.pi) % (2*np.pi) - np.pi
 
 
+def _add_exact(partials, x):
+    """Add x to a list of non-overlapping float partials whose sum is kept exactly (Shewchuk)."""
+    i = 0
+    for y in partials:
+        if abs(x) < abs(y):
+            x, y = y, x
+        hi = x + y
+        lo = y - (hi - x)
+        if lo:
+            partials[i] = lo
+            i += 1
+        x = hi
+    partials[i:] = [x]
+
+
+class RunningCenter:
+    """
+    Center of mass of points that move one at a time, in O(1) per move.
+
+    The x and y sums are kept exactly as float partials (Shewchuk's algorithm, as in math.fsum),
+    with each move adding its new coordinates and taking away its old ones. No rounding error
+    accumulates over the moves: the center is always the exact mean of the current positions,
+    rounded once. It equals math.fsum(positions) / n, which is within float tolerance of
+    np.mean(positions, axis=0) but not always bit-identical to it.
+    """
+    def __init__(self, positions):
+        positions = np.asarray(positions, dtype=float).reshape(-1, 2)
+        self.count = len(positions)
+        self._partials = ([], [])
+        for axis, partials in enumerate(self._partials):
+            for value in positions[:, axis].tolist():
+                _add_exact(partials, value)
+        self._center = None
+
+    @property
+    def center(self):
+        if self._center is None:
+            self._center = np.array([math.fsum(p) for p in self._partials]) / self.count
+        return self._center
+
+    def moved(self, old, new):
+        """A point moved from `old` to `new`."""
+        for axis, partials in enumerate(self._partials):
+            _add_exact(partials, float(new[axis]))
+            _add_exact(partials, -float(old[axis]))
+        self._center = None
+
+
+class SwarmAggregates:
+    """
+    Swarm-wide quantities for one force/move stage, computed once by the model and handed to every
+    agent: the position and heading arrays, the target array and the center of mass.
+    The object models move agents one at a time, so moved() keeps the arrays and the exact running
+    center of mass (RunningCenter) current in O(1) per agent instead of re-averaging all positions.
+    """
+    def __init__(self, agents, targets):
+        self.positions = np.array([agent.position for agent in agents], dtype=float).reshape(-1, 2)
+        self.headings = np.array([agent.direction for agent in agents], dtype=float)
+        self.targets = np.asarray(targets, dtype=float).reshape(-1, 2)
+        self._center = RunningCenter(self.positions)
+
+    @property
+    def center_of_mass(self):
+        return self._center.center
+
+    def moved(self, k, position, heading):
+        """Record agent k's new position and heading."""
+        self._center.moved(self.positions[k], position)
+        self.positions[k] = position
+        self.headings[k] = heading
+
+
 class Agent:
     def __init__(self, pos, speed, bound_x, bound_y, inter_range, repul_rad, sep_dist, rad=10):
         self.position = np.array(pos, dtype=float)
         self.speed = speed
         self.direction = np.random.uniform(0, 2 * np.pi)
         self.neighbors = []
+        self.neighbor_ids = np.zeros(0, dtype=np.intp)
+        self.neighbor_distances = np.zeros(0, dtype=float)
         self.interaction_radius = inter_range
         self.separation_distance = sep_dist
         self.repulsion_radius = repul_rad
@@ -25,10 +100,12 @@ class Agent:
         self.color = (255, 0, 0)
         self.limit_x_bound, self.limit_y_bound = bound_x, bound_y
         self.nearest_goal = None
+        self.goal_id = -1  # index of nearest_goal in the model's target array (-1: none)
         self.consensus_direction = None
         self.is_latent = False
 
     def draw_agents(self, screen):
+        import pygame
         pygame.draw.circle(screen, self.color, self.position.astype(int), self.radius)
 
     def move(self, hurdles):
@@ -36,13 +113,31 @@ class Agent:
         self.compute_repulsion_force(hurdles)
         self.position = np.clip(self.position, 0, [self.limit_x_bound, self.limit_y_bound])
 
-    def get_neighbors(self, agents):
+    def get_neighbors(self, agents, neighbor_index=None, agent_id=None):
+        """
+        Collect the agents within interaction_radius. With a neighbor index (CellList / VerletList)
+        updated over `agents` for this step, agent_id is this agent's position in `agents` and only
+        nearby candidates are checked; without one every agent is checked.
+        """
+        if neighbor_index is not None:
+            self.set_neighbors(agents, *neighbor_index.neighbors(agent_id, self.interaction_radius))
+            return
         self.neighbors.clear()
         self_pos = np.expand_dims(self.position, axis=0)
         other_pos = np.array([agent.position for agent in agents])
         distances = np.linalg.norm(self_pos - other_pos, axis=1)
-        self.neighbors.extend(
-            [agent for agent, dist in zip(agents, distances) if dist <= self.interaction_radius and agent is not self])
+        within = [k for k, (agent, dist) in enumerate(zip(agents, distances))
+                  if dist <= self.interaction_radius and agent is not self]
+        self.neighbors.extend(agents[k] for k in within)
+        self.neighbor_ids = np.array(within, dtype=np.intp)
+        self.neighbor_distances = distances[within]
+
+    def set_neighbors(self, agents, ids, distances):
+        """Neighbors found by a search over `agents`: their indices (ascending) and distances."""
+        self.neighbors.clear()
+        self.neighbors.extend(agents[idx] for idx in ids)
+        self.neighbor_ids = ids
+        self.neighbor_distances = distances
 
     def calculate_average_direction(self):
         if not self.neighbors:
@@ -52,11 +147,14 @@ class Agent:
         direction = np.array([np.cos(avg_direction), np.sin(avg_direction)])
         self.consensus_direction = np.arctan2(direction[1], direction[0])
 
-    def compute_opinion(self, targets):
-        targets = np.array(targets)
-        distance_to_goal = np.linalg.norm(targets - self.position, axis=1)
-        nearest_goal_index = np.argmin(distance_to_goal)
-        self.nearest_goal = targets[nearest_goal_index]
+    def compute_opinion(self, targets, nearest_index=None):
+        """nearest_index: this agent's nearest target when the model already knows it (NearestTargetCache)."""
+        if nearest_index is None:
+            targets = np.array(targets)
+            distance_to_goal = np.linalg.norm(targets - self.position, axis=1)
+            nearest_index = np.argmin(distance_to_goal)
+        self.goal_id = int(nearest_index)
+        self.nearest_goal = targets[nearest_index]
 
     def compute_alignment(self):
         if not self.neighbors:
@@ -67,9 +165,15 @@ class Agent:
         return np.array([np.cos(self.direction + dtheta), np.sin(self.direction + dtheta)]) - \
                np.array([np.cos(self.direction), np.sin(self.direction)])
 
-    def compute_cohesion(self, agents):
+    @staticmethod
+    def _center_of_mass(agents, aggregates=None):
+        if aggregates is not None:
+            return aggregates.center_of_mass
         agent_pos = np.array([agent.position for agent in agents])
-        avg_position = np.mean(agent_pos, axis=0)
+        return np.mean(agent_pos, axis=0)
+
+    def compute_cohesion(self, agents, aggregates=None):
+        avg_position = self._center_of_mass(agents, aggregates)
         return (avg_position - self.position)
 
     def compute_separation(self):
@@ -94,30 +198,34 @@ class Agent:
         force_vector = 0.02 * (direction - self.direction)
         return force_vector
 
-    def _move_towards(self, agents):
-        agent_pos = np.array([agent.position for agent in agents])
-        center_of_mass = np.mean(agent_pos, axis=0)
+    def _move_towards(self, agents, aggregates=None):
+        center_of_mass = self._center_of_mass(agents, aggregates)
         com_force = self.get_com_force(center_of_mass)
         ind_force = self.get_target_force()
         target_force = com_force * 0.05 + ind_force * 0.03
         return target_force
 
-    def update_direction(self, agents, swarm_params):
+    def update_direction(self, agents, swarm_params, aggregates=None):
+        """aggregates: the step's SwarmAggregates; without it the center of mass is recomputed here."""
         if self.neighbors:
             alignment_force = self.compute_alignment() * swarm_params['ALIGNMENT_STRENGTH']
-            cohesion_force = self.compute_cohesion(agents) * swarm_params['ATTRACT_STRENGTH']
+            cohesion_force = self.compute_cohesion(agents, aggregates) * swarm_params['ATTRACT_STRENGTH']
             separation_force = self.compute_separation() * swarm_params['SEPERATION_STRENGTH']
-            target_force = self._move_towards(agents)
+            target_force = self._move_towards(agents, aggregates)
 
             total_force = alignment_force + separation_force + cohesion_force + target_force
             self.direction = np.arctan2(total_force[1], total_force[0])
             self.is_latent = False
         else:
-            target_force = self._move_towards(agents)
+            target_force = self._move_towards(agents, aggregates)
             self.direction = np.arctan2(target_force[1], target_force[0])
             self.is_latent = True
 
     def compute_repulsion_force(self, hurdles):
+        if hasattr(hurdles, 'repulse'):
+            # HurdleField: all hurdles in one culled, array-based pass
+            hurdles.repulse(self.position[None, :], self.repulsion_radius)
+            return
         for hurdle in hurdles:
             center_point = np.array([hurdle.x + hurdle.hurdle_width // 2, hurdle.y + hurdle.hurdle_height // 2])
             dx = center_point[0] - self.position[0]
@@ -136,8 +244,8 @@ class Agent:
         """
         if not self.neighbors:
             return 0
-        neighbor_positions = np.array([a.position for a in self.neighbors])
-        dists = np.linalg.norm(self.position - neighbor_positions, axis=1)
+        # distances measured by get_neighbors this step (positions have not moved since)
+        dists = self.neighbor_distances
         thr = float(self.separation_distance) if threshold is None else float(threshold)
         return int((dists < thr).sum())
 
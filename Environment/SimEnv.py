@@ -1,117 +1,225 @@
-import pygame
-from Environment.SimHurdle import Hurdle
+import numpy as np
+from Environment.SimHurdle import HurdleField
+from Environment.SimMetrics import MetricSeries, ScalarSeries, inside_any_target, order_parameter
+from Environment.SimProfiler import NULL_TIMER
+from Environment.SimSnapshot import rng_state, set_rng_state, save_snapshot, load_snapshot
+
+# Entries kept per series in runs without a step limit (older ones only count towards the totals)
+METRICS_WINDOW = 100000
 
 
 class SimEnv:
-    def __init__(self, params, targets, FULSCRN=False):
-        pygame.init()
+    def __init__(self, params, targets, FULSCRN=False, headless=False, keep_raw_metrics=False, timer=None):
+        """
+        headless=True runs without pygame: no window, no drawing and no FPS throttling, so a run
+        advances as fast as the CPU allows. Otherwise a SimRenderer owns the window.
+
+        Metrics are recorded in MetricSeries reducers (per-checkpoint mean / var / min / max);
+        keep_raw_metrics=True also keeps the per-agent values of every checkpoint.
+
+        timer: a PhaseTimer to time the phases of run_simulation and of the model's update
+        (events, hurdles, neighbors, consensus, forces, move, metrics, reached, render).
+        """
         self.env_params, self.swarm_params = params
         self.win_height, self.win_width = self.env_params['SCREEN_HEIGHT'], self.env_params['SCREEN_WIDTH']
-
-        if FULSCRN:
-            resol = (pygame.display.Info().current_w, pygame.display.Info().current_h)
-            self.screen = pygame.display.set_mode(resol, pygame.SCALED)
+        self.fps = self.env_params['FPS']
+        self.headless = headless
+        if headless:
+            self.renderer = None
         else:
-            self.screen = pygame.display.set_mode((self.win_width, self.win_height), pygame.RESIZABLE)
+            from Environment.SimRenderer import SimRenderer
+            self.renderer = SimRenderer(self.win_width, self.win_height, self.fps, FULSCRN)
 
-        self.BGCOLOR = (255, 255, 255)
-        self.clock = pygame.time.Clock()
-        self.fps = self.env_params['FPS']
         self.running = True
         self.num_hurdles = self.env_params['NUM_HURDLE']
-        self.hurdles = []
+        self.hurdles = HurdleField()
         self.num_targets = self.env_params['NUM_TARGET']
         self.target_object = targets
         self.target_size = self.env_params['TARGET_SIZE']
         self.model = None
+        self.keep_raw_metrics = keep_raw_metrics
+        self.timer = NULL_TIMER if timer is None else timer
 
         # NEW: per-timestep count of agents that reached any target (for plotting/saving)
-        self.reached_counts = []
+        self.reached_counts = ScalarSeries(dtype=np.int64)
+        # step and rule of an early stop (see run_simulation's stop argument)
+        self.stopped_at = None
+        self.stop_reason = None
+        # run state between steps: metric series handed to the model and the next step to run
+        self.metrics = None
+        self.time_count = 1
 
     def event_on_game_window(self):
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                self.running = False
+        if self.renderer is not None and not self.renderer.poll_events():
+            self.running = False
 
     def hurdle_movement(self, time_count):
-        for hurdle in self.hurdles:
-            hurdle.update_hurdle_position(time_count)
-
-    def draw_targets(self, point):
-        x, y = int(point[0]), int(point[1])
-        pygame.draw.circle(self.screen, (0, 0, 255), (x, y), self.target_size)
+        self.hurdles.update_hurdle_position(time_count)
 
     def render(self):
-        for agent in self.model.agents:
-            agent.display_agents(self.screen)
-
-        for hurdle in self.hurdles:
-            hurdle.draw_hurdles(self.screen)
-
-        for target_point in self.target_object:
-            self.draw_targets(target_point)
-
-        pygame.display.flip()
-        self.clock.tick(self.fps)
+        if self.renderer is not None:
+            self.renderer.render(self.model, self.hurdles, self.target_object, self.target_size)
 
     def _count_agents_reached_any_target(self):
         """Return number of agents whose position lies inside any target (within target radius)."""
-        r = float(self.target_size)
-        r2 = r * r
-        cnt = 0
-        for a in self.model.agents:
-            ax, ay = a.position
-            # inside ANY target
-            for tx, ty in self.target_object:
-                dx = ax - tx
-                dy = ay - ty
-                if dx * dx + dy * dy <= r2:
-                    cnt += 1
-                    break
-        return cnt
-
-    def run_simulation(self, hurdles, targets, max_steps=0):
-        pygame.display.set_caption("Collective Decision Making of Swarm : " + self.model.Name)
-
-        # Metrics (models will append into these)
-        direction_mismatches = []
-        collisions = []
-        phase_synchronization = []
-        decision_accuracy = []  # left as-is for compatibility elsewhere
-
+        positions = getattr(self.model, 'positions', None)
+        if positions is None:
+            positions = np.array([agent.position for agent in self.model.agents], dtype=float).reshape(-1, 2)
+        targets = np.asarray(self.target_object, dtype=float).reshape(-1, 2)
+        return int(np.count_nonzero(inside_any_target(positions, targets, self.target_size)))
+
+    def _headings(self):
+        headings = getattr(self.model, 'directions', None)
+        if headings is not None:
+            return headings
+        return [agent.direction for agent in self.model.agents]
+
+    def _should_stop(self, stop, time_count, reached, direction_mismatches, checkpoints):
+        """Apply the StopCriteria: the reached share every step, the checkpoint rules on new checkpoints."""
+        positions = getattr(self.model, 'positions', None)
+        num_agents = len(positions) if positions is not None else len(self.model.agents)
+        if stop.check_step(time_count, reached / max(num_agents, 1)):
+            return True
+        if direction_mismatches.appended == checkpoints:
+            return False
+        order = order_parameter(self._headings()) if stop.wants_order else None
+        return stop.check_checkpoint(time_count, direction_mismatches.mean[-1], order)
+
+    # ---------- snapshots ----------
+
+    def snapshot_state(self):
+        """Everything needed to continue the run exactly: model, hurdles, step, metrics and RNG streams."""
+        return {'model': self.model.get_state(),
+                'model_class': np.array(type(self.model).__name__),
+                'targets': np.asarray(self.target_object, dtype=float).reshape(-1, 2),
+                'hurdles': self.hurdles.get_state(),
+                'time_count': np.array(self.time_count),
+                'metrics': {str(i): series.state() for i, series in enumerate(self.metrics or [])},
+                'reached': self.reached_counts.state(),
+                'rng': rng_state()}
+
+    def load_state(self, state):
+        """Inverse of snapshot_state(); self.model must already be a model of the same kind and size."""
+        if str(state['model_class']) != type(self.model).__name__:
+            raise ValueError(f"Snapshot is of a {state['model_class']}, not a {type(self.model).__name__}")
+        if not np.array_equal(state['targets'], np.asarray(self.target_object, dtype=float).reshape(-1, 2)):
+            raise ValueError('Snapshot was taken with different targets')
+        self.model.set_state(state['model'])
+        self.hurdles = HurdleField.from_state(state['hurdles'])
+        self.time_count = int(state['time_count'])
+        metrics = state.get('metrics', {})
+        self.metrics = [MetricSeries.load_state(metrics[str(i)]) for i in range(len(metrics))] or None
+        self.reached_counts = ScalarSeries.load_state(state['reached'])
+        set_rng_state(state['rng'])
+
+    def snapshot(self, path):
+        """Write the current run state to `path` (.npz); restore() continues from it."""
+        return save_snapshot(path, self.snapshot_state())
+
+    def restore(self, path):
+        """Load a snapshot; then run_simulation(..., resume=True) continues from its step."""
+        self.load_state(load_snapshot(path))
+
+    def _new_metrics(self, capacity):
+        """Metric series the model appends into; bounded to a window when the run has no step limit."""
+        direction_mismatches = MetricSeries(self.keep_raw_metrics, capacity)
+        collisions = MetricSeries(self.keep_raw_metrics, capacity)
+        phase_synchronization = MetricSeries(capacity=capacity)
+        order_parameter = MetricSeries(capacity=capacity)
+        decision_accuracy = MetricSeries(capacity=capacity)
         if self.model.Name == 'Kuramoto Model':
-            metrics = [direction_mismatches, collisions, phase_synchronization, decision_accuracy]
+            return [direction_mismatches, collisions, phase_synchronization, order_parameter, decision_accuracy]
+        return [direction_mismatches, collisions, decision_accuracy]
+
+    def run_simulation(self, hurdles, targets, max_steps=0, stop=None, resume=False,
+                       snapshot_path=None, snapshot_every=0, snapshot_steps=()):
+        """
+        stop: optional StopCriteria; the run then ends at the first step a rule holds (self.stopped_at,
+        self.stop_reason), otherwise after max_steps.
+
+        resume=True continues from the state loaded by restore() (hurdles is then ignored).
+        snapshot_path: file name template with {step}; a snapshot is written after every
+        snapshot_every-th step and after each step in snapshot_steps.
+        """
+        if self.renderer is None:
+            if not max_steps:
+                raise ValueError('A headless run needs max_steps > 0')
         else:
-            metrics = [direction_mismatches, collisions, decision_accuracy]
-
-        # Build hurdles for this run
-        self.hurdles = []
-        for x, y, amplitude, frequency in hurdles:
-            self.hurdles.append(Hurdle(x, y, amplitude, frequency))
-
-        # reset per-timestep reached series
-        self.reached_counts = []
-
-        time_count = 1
+            self.renderer.set_caption("Collective Decision Making of Swarm : " + self.model.Name)
+
+        if not resume:
+            capacity = None if max_steps else METRICS_WINDOW
+            self.metrics = self._new_metrics(capacity)
+            # Build hurdles for this run: (x, y, amplitude, frequency) rows -> one array-backed field
+            self.hurdles = HurdleField(hurdles)
+            # reset per-timestep reached series
+            self.reached_counts = ScalarSeries(dtype=np.int64, capacity=capacity)
+            self.time_count = 1
+        metrics = self.metrics
+        direction_mismatches = metrics[0]
+        performance_data = list(metrics)
+        snapshot_steps = set(snapshot_steps or ())
+
+        timer = self.timer
+        self.model.timer = timer
+        if stop is not None:
+            stop.reset()
+            if not stop.enabled:
+                stop = None
+        self.stopped_at = self.stop_reason = None
+        checkpoints = direction_mismatches.appended
+        timer.start()
+        time_count = self.time_count
         while self.running:
             if max_steps and time_count > max_steps:
                 break
-            self.event_on_game_window()
-            self.screen.fill(self.BGCOLOR)
-            self.hurdle_movement(time_count)
+            with timer.phase('events'):
+                self.event_on_game_window()
+                if self.renderer is not None:
+                    self.renderer.clear()
+            with timer.phase('hurdles'):
+                self.hurdle_movement(time_count)
 
             # Model updates and writes into metrics
-            performance_data = self.model.update(time_count, self.hurdles, metrics)
+            with timer.phase('model.update'):
+                performance_data = self.model.update(time_count, self.hurdles, metrics)
 
             # NEW: record per-timestep #agents that reached ANY target
-            self.reached_counts.append(self._count_agents_reached_any_target())
-
-            self.render()
+            with timer.phase('reached'):
+                reached = self._count_agents_reached_any_target()
+                self.reached_counts.append(reached)
+
+            with timer.phase('render'):
+                self.render()
+            timer.step()
+
+            done = False
+            if stop is not None:
+                with timer.phase('stop'):
+                    done = self._should_stop(stop, time_count, reached, direction_mismatches, checkpoints)
+                    checkpoints = direction_mismatches.appended
             time_count += 1
+            self.time_count = time_count
+
+            if snapshot_path and ((snapshot_every and (time_count - 1) % snapshot_every == 0)
+                                  or (time_count - 1) in snapshot_steps):
+                with timer.phase('snapshot'):
+                    self.snapshot(snapshot_path.format(step=time_count - 1))
+            if done:
+                self.stopped_at, self.stop_reason = stop.stopped_at, stop.reason
+                break
+        timer.stop()
+
+        index = getattr(self.model, 'neighbor_index', None)
+        if hasattr(index, 'report'):
+            print(index.report())
+        if hasattr(index, 'rebuilds'):
+            timer.count('verlet_rebuilds', index.rebuilds)
 
         # Keep return shape unchanged; append time_count at the end
         performance_data.append(time_count)
         return performance_data
 
     def close_sim(self):
-        pygame.quit()
+        if self.renderer is not None:
+            self.renderer.close()
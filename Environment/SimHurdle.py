@@ -1,5 +1,7 @@
-import pygame
 import math
+import numpy as np
+
+from Environment.SimKernels import kernels_enabled, repulse
 
 
 class Hurdle:
@@ -17,4 +19,133 @@ class Hurdle:
         self.y = self.y + self.amplitude * math.sin(frame_count * self.frequency)
 
     def draw_hurdles(self, screen):
+        import pygame
         pygame.draw.rect(screen, self.color, (int(self.x), int(self.y), self.hurdle_width, self.hurdle_height))
+
+
+class HurdleField:
+    """
+    All hurdles of a run held as arrays (x, y, amplitude, frequency, width, height), moved with one
+    batched update per step and applied to many agents at once by repulse().
+
+    group: optional owner id per hurdle (e.g. the replicate of an ensemble); repulse() then only
+    pairs agents and hurdles of the same group.
+    """
+    # agent x hurdle distance entries evaluated at once when culling
+    CULL_BLOCK = 1 << 20
+
+    def __init__(self, hurdles=(), width=20, height=30, group=None):
+        data = np.asarray(hurdles, dtype=float).reshape(-1, 4)
+        self.x = data[:, 0].copy()
+        self.y = data[:, 1].copy()
+        self.amplitude = data[:, 2].copy()
+        self.frequency = data[:, 3].copy()
+        self.width = np.full(len(data), width, dtype=np.int64)
+        self.height = np.full(len(data), height, dtype=np.int64)
+        self.group = None if group is None else np.asarray(group)
+        self.color = (0, 0, 0)
+
+    @classmethod
+    def from_hurdles(cls, hurdles):
+        """Field holding the current state of a list of Hurdle objects."""
+        field = cls([(h.x, h.y, h.amplitude, h.frequency) for h in hurdles])
+        field.width[:] = [h.hurdle_width for h in hurdles]
+        field.height[:] = [h.hurdle_height for h in hurdles]
+        return field
+
+    def __len__(self):
+        return len(self.x)
+
+    def get_state(self):
+        state = {'x': self.x, 'y': self.y, 'amplitude': self.amplitude, 'frequency': self.frequency,
+                 'width': self.width, 'height': self.height}
+        if self.group is not None:
+            state['group'] = self.group
+        return {k: v.copy() for k, v in state.items()}
+
+    @classmethod
+    def from_state(cls, state):
+        field = cls(np.column_stack((state['x'], state['y'], state['amplitude'], state['frequency'])),
+                    group=state.get('group'))
+        field.width[:] = state['width']
+        field.height[:] = state['height']
+        return field
+
+    def update_hurdle_position(self, frame_count):
+        # Vertical oscillation, all hurdles at once
+        self.y += self.amplitude * np.sin(frame_count * self.frequency)
+
+    def centers(self):
+        return np.column_stack((self.x + self.width // 2, self.y + self.height // 2))
+
+    def _distances(self, points, centers, point_group, hurdle_group):
+        """(points x hurdles) center distances; pairs of different groups are set to inf."""
+        dist = np.hypot(centers[None, :, 0] - points[:, None, 0], centers[None, :, 1] - points[:, None, 1])
+        if point_group is not None and hurdle_group is not None:
+            dist[point_group[:, None] != hurdle_group[None, :]] = np.inf
+        return dist
+
+    def _near_agents(self, positions, centers, radius, agent_group):
+        """
+        (agents, reach): indices of the agents with at least one hurdle inside `radius` (everyone
+        else is culled) and, per hurdle, the distance of its closest agent.
+        """
+        block = max(1, self.CULL_BLOCK // max(len(centers), 1))
+        near = []
+        reach = np.full(len(centers), np.inf)
+        for s in range(0, len(positions), block):
+            dist = self._distances(positions[s:s + block], centers,
+                                   None if agent_group is None else agent_group[s:s + block], self.group)
+            near.append(np.flatnonzero(((dist < radius) & (dist > 1e-9)).any(axis=1)) + s)
+            np.minimum(reach, dist.min(axis=0), out=reach)
+        return (np.concatenate(near) if near else np.zeros(0, dtype=np.intp)), reach
+
+    def repulse(self, positions, radius, agent_group=None):
+        """
+        Push the (N, 2) `positions` (in place) out of `radius` around the hurdle centers, hurdle by
+        hurdle in order exactly as the per-agent loop does. An agent with no hurdle in range cannot
+        be pushed, so those agents are culled first. The rest are pushed one hurdle column at a time
+        (O(N * H)); a hurdle is skipped while its closest agent at the cull, less the furthest any
+        agent has been pushed since, is still out of range. With compiled kernels (SimKernels) the
+        per-agent loop itself runs instead.
+        """
+        if not len(self) or not len(positions):
+            return positions
+        radius = float(radius)
+        if agent_group is not None:
+            agent_group = np.asarray(agent_group)
+        centers = self.centers()
+        if kernels_enabled():
+            return repulse(positions, centers, radius, agent_group, self.group)
+        agents, reach = self._near_agents(positions, centers, radius, agent_group)
+        if not agents.size:
+            return positions
+
+        pos = positions[agents]
+        group = None if agent_group is None or self.group is None else agent_group[agents]
+        # a push moves an agent by radius - dist, so no agent has come closer to any hurdle than at
+        # the cull by more than the sum of the largest pushes so far (1e-6 covers rounding)
+        drift = 0.0
+        for j in range(len(self)):
+            if reach[j] - drift > radius + 1e-6:
+                continue
+            dx = centers[j, 0] - pos[:, 0]
+            dy = centers[j, 1] - pos[:, 1]
+            dist = np.hypot(dx, dy)
+            rows = (dist < radius) & (dist > 1e-9)
+            if group is not None:
+                rows &= group == self.group[j]
+            if not rows.any():
+                continue
+            dist = dist[rows]
+            factor = (radius - dist) / dist
+            pos[rows, 0] -= factor * dx[rows]
+            pos[rows, 1] -= factor * dy[rows]
+            drift += float((radius - dist).max())
+        positions[agents] = pos
+        return positions
+
+    def draw_hurdles(self, screen):
+        import pygame
+        for x, y, w, h in zip(self.x, self.y, self.width, self.height):
+            pygame.draw.rect(screen, self.color, (int(x), int(y), int(w), int(h)))
@@ -0,0 +1,210 @@
+import math
+import os
+import warnings
+
+import numpy as np
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+# Optional compiled per-step kernels: neighbor pairs from a cell list, the flocking neighbor sums of
+# update_direction, hurdle repulsion, the Kuramoto phase coupling and the sequential Kuramoto sweep.
+#
+# With Numba installed the kernels are JIT-compiled on first use with cache=True, so the machine code
+# is written next to this module (or to NUMBA_CACHE_DIR) and every later process - each sweep cell,
+# each pool worker - loads it instead of compiling again. Without Numba, or with the 'numpy' backend,
+# callers keep using their NumPy code. The kernels visit neighbors and hurdles in the same order as
+# the NumPy code, so both backends agree to within float rounding.
+#
+# Backend: 'auto' (Numba if importable), 'numba' or 'numpy'; set with set_backend() or the
+# SWARM_KERNELS environment variable (inherited by worker processes).
+BACKENDS = ('auto', 'numba', 'numpy')
+_ENV_VAR = 'SWARM_KERNELS'
+
+
+def _resolve(name):
+    name = (name or 'auto').lower()
+    if name not in BACKENDS:
+        raise ValueError(f'Unknown kernel backend: {name} (choose from {", ".join(BACKENDS)})')
+    if name == 'numba' and numba is None:
+        raise ImportError('Numba kernels requested but numba is not installed')
+    return numba is not None and name != 'numpy'
+
+
+try:
+    _compiled = _resolve(os.environ.get(_ENV_VAR))
+except (ValueError, ImportError) as err:
+    warnings.warn(f'{_ENV_VAR}: {err}; using the NumPy kernels')
+    _compiled = False
+
+
+def set_backend(name):
+    """Select the kernel backend for this process and for worker processes started after it."""
+    global _compiled
+    _compiled = _resolve(name)
+    os.environ[_ENV_VAR] = name
+    return kernel_backend()
+
+
+def kernels_enabled():
+    return _compiled
+
+
+def kernel_backend():
+    return 'numba' if _compiled else 'numpy'
+
+
+def _jit(fn):
+    if numba is None:
+        return fn
+    return numba.njit(cache=True, nogil=True)(fn)
+
+
+@_jit
+def _cell_pairs(positions, order, cell_start, cell_of, nx, ny, reach, radius):
+    n = positions.shape[0]
+    cap = max(16, 8 * n)
+    src = np.empty(cap, dtype=np.int64)
+    dst = np.empty(cap, dtype=np.int64)
+    dist = np.empty(cap, dtype=np.float64)
+    buf_j = np.empty(n, dtype=np.int64)
+    buf_d = np.empty(n, dtype=np.float64)
+    total = 0
+    for i in range(n):
+        cx = cell_of[i] // ny
+        cy = cell_of[i] % ny
+        y0 = min(max(cy - reach, 0), ny - 1)
+        y1 = min(max(cy + reach, 0), ny - 1)
+        m = 0
+        for x in range(max(cx - reach, 0), min(cx + reach, nx - 1) + 1):
+            for k in range(cell_start[x * ny + y0], cell_start[x * ny + y1 + 1]):
+                j = order[k]
+                if j == i:
+                    continue
+                dx = positions[i, 0] - positions[j, 0]
+                dy = positions[i, 1] - positions[j, 1]
+                d = math.sqrt(dx * dx + dy * dy)
+                if d <= radius:
+                    buf_j[m] = j
+                    buf_d[m] = d
+                    m += 1
+        if total + m > cap:
+            cap = max(2 * cap, total + m)
+            src = np.concatenate((src[:total], np.empty(cap - total, dtype=np.int64)))
+            dst = np.concatenate((dst[:total], np.empty(cap - total, dtype=np.int64)))
+            dist = np.concatenate((dist[:total], np.empty(cap - total, dtype=np.float64)))
+        by_j = np.argsort(buf_j[:m])
+        for k in range(m):
+            src[total] = i
+            dst[total] = buf_j[by_j[k]]
+            dist[total] = buf_d[by_j[k]]
+            total += 1
+    return src[:total], dst[:total], dist[:total]
+
+
+def cell_pairs(cell_list, radius):
+    """CellList.pairs(radius) in one compiled pass over the grid."""
+    nx, ny = cell_list.shape
+    return _cell_pairs(cell_list.positions, cell_list.order.astype(np.int64), cell_list.cell_start.astype(np.int64),
+                       cell_list.cell_of.astype(np.int64), nx, ny, cell_list._reach(radius), float(radius))
+
+
+@_jit
+def _flock_sums(positions, directions, nbr_src, nbr_dst, nbr_dist, n, separation_distance):
+    sin_sum = np.zeros(n)
+    cos_sum = np.zeros(n)
+    separation = np.zeros((n, 2))
+    for e in range(nbr_src.shape[0]):
+        i = nbr_src[e]
+        j = nbr_dst[e]
+        sin_sum[i] += np.sin(directions[j])
+        cos_sum[i] += np.cos(directions[j])
+        if nbr_dist[e] < separation_distance:
+            separation[i, 0] += positions[i, 0] - positions[j, 0]
+            separation[i, 1] += positions[i, 1] - positions[j, 1]
+    return sin_sum, cos_sum, separation
+
+
+def flock_sums(positions, directions, nbr_src, nbr_dst, nbr_dist, separation_distance):
+    """Per-agent sums over the neighbor edges: sin and cos of neighbor headings, separation vector."""
+    return _flock_sums(positions, directions, nbr_src, nbr_dst, nbr_dist, len(positions),
+                       float(separation_distance))
+
+
+@_jit
+def _phase_coupling(theta, nbr_src, nbr_dst, n):
+    sin_t = np.sin(theta)
+    cos_t = np.cos(theta)
+    sin_sum = np.zeros(n)
+    cos_sum = np.zeros(n)
+    for e in range(nbr_src.shape[0]):
+        sin_sum[nbr_src[e]] += sin_t[nbr_dst[e]]
+        cos_sum[nbr_src[e]] += cos_t[nbr_dst[e]]
+    return cos_t * sin_sum - sin_t * cos_sum
+
+
+def phase_coupling(theta, nbr_src, nbr_dst):
+    """Per-agent sum of sin(theta_j - theta_i) over the neighbor edges (via the sin/cos decomposition)."""
+    return _phase_coupling(theta, nbr_src, nbr_dst, len(theta))
+
+
+@_jit
+def _sequential_phases(theta, omega, coupling_K, ramp, consensus, offsets, dst):
+    sin_t = np.sin(theta)
+    cos_t = np.cos(theta)
+    for i in range(theta.shape[0]):
+        if ramp[i]:
+            sin_sum = 0.0
+            cos_sum = 0.0
+            for e in range(offsets[i], offsets[i + 1]):
+                sin_sum += sin_t[dst[e]]
+                cos_sum += cos_t[dst[e]]
+            coupling = cos_t[i] * sin_sum - sin_t[i] * cos_sum
+            count = offsets[i + 1] - offsets[i]
+            if count > 0:
+                coupling /= count
+            goal = omega[i] - theta[i]
+            step = theta[i] + 0.2 * (math.atan2(math.sin(goal), math.cos(goal)) + max(coupling_K[i], 0.0) * coupling)
+            consensus[i] = math.atan2(math.sin(step), math.cos(step))
+        theta[i] = consensus[i]
+        sin_t[i] = math.sin(theta[i])
+        cos_t[i] = math.cos(theta[i])
+    return consensus
+
+
+def sequential_phases(theta, omega, coupling_K, ramp, consensus, offsets, dst):
+    """The in-order Kuramoto checkpoint sweep of ModelAgent.sequential_phases, one agent at a time."""
+    return _sequential_phases(np.array(theta, dtype=np.float64), np.asarray(omega, dtype=np.float64),
+                              np.asarray(coupling_K, dtype=np.float64), np.asarray(ramp, dtype=np.bool_),
+                              np.array(consensus, dtype=np.float64), np.asarray(offsets, dtype=np.int64),
+                              np.asarray(dst, dtype=np.int64))
+
+
+@_jit
+def _repulse(positions, centers, radius, agent_group, hurdle_group):
+    for a in range(positions.shape[0]):
+        for h in range(centers.shape[0]):
+            if agent_group[a] != hurdle_group[h]:
+                continue
+            dx = centers[h, 0] - positions[a, 0]
+            dy = centers[h, 1] - positions[a, 1]
+            dist = math.hypot(dx, dy)
+            if dist < radius and dist > 1e-9:
+                factor = (radius - dist) / dist
+                positions[a, 0] -= factor * dx
+                positions[a, 1] -= factor * dy
+
+
+def repulse(positions, centers, radius, agent_group=None, hurdle_group=None):
+    """HurdleField.repulse: every agent visits the hurdles in order; positions are updated in place."""
+    work = np.ascontiguousarray(positions, dtype=np.float64)
+    if agent_group is None or hurdle_group is None:
+        agent_group = np.zeros(len(work), dtype=np.int64)
+        hurdle_group = np.zeros(len(centers), dtype=np.int64)
+    _repulse(work, np.ascontiguousarray(centers, dtype=np.float64), float(radius),
+             np.asarray(agent_group, dtype=np.int64), np.asarray(hurdle_group, dtype=np.int64))
+    if work is not positions:
+        positions[...] = work
+    return positions
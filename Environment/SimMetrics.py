@@ -0,0 +1,299 @@
+import numpy as np
+
+
+class _ChunkedRows:
+    """
+    Preallocated (rows, width) array that grows in fixed-size chunks. With a capacity it becomes a
+    ring buffer holding only the most recent `capacity` rows, so its memory stays flat.
+    """
+
+    def __init__(self, width, dtype=float, capacity=None, chunk=1024):
+        self.capacity = capacity
+        self.chunk = chunk
+        size = min(chunk, capacity) if capacity else chunk
+        self._data = np.zeros((size, width), dtype=dtype)
+        self._n = 0
+        self._start = 0
+
+    def __len__(self):
+        return self._n
+
+    def append(self, row):
+        if self.capacity and self._n == self.capacity:
+            slot = self._start
+            self._start = (self._start + 1) % self.capacity
+        else:
+            if self._n == len(self._data):
+                size = len(self._data) + self.chunk
+                if self.capacity:
+                    size = min(size, self.capacity)
+                grown = np.zeros((size, self._data.shape[1]), dtype=self._data.dtype)
+                grown[:self._n] = self._data[:self._n]
+                self._data = grown
+            slot = self._n
+            self._n += 1
+        self._data[slot] = row
+
+    def rows(self):
+        """Retained rows, oldest first."""
+        if self._start == 0:
+            return self._data[:self._n]
+        return np.concatenate((self._data[self._start:self._n], self._data[:self._start]))
+
+    def load(self, rows):
+        """Replace the contents with `rows` (oldest first), as returned by rows()."""
+        rows = np.asarray(rows, dtype=self._data.dtype).reshape(-1, self._data.shape[1])
+        if self.capacity:
+            rows = rows[-self.capacity:]
+        self._data = rows.copy()
+        self._n = len(rows)
+        self._start = 0
+
+
+class _RunningTotals:
+    """Whole-run count / mean / variance / min / max, merged batch by batch (Chan et al.)."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def merge(self, count, mean, var, vmin, vmax):
+        if count == 0:
+            return
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self._m2 += var * count + delta * delta * self.count * count / total
+        self.count = total
+        self.min = min(self.min, vmin)
+        self.max = max(self.max, vmax)
+
+    def summary(self):
+        var = self._m2 / self.count if self.count else 0.0
+        return {'count': self.count, 'mean': self.mean if self.count else 0.0, 'var': var,
+                'min': self.min if self.count else 0.0, 'max': self.max if self.count else 0.0}
+
+    def state(self):
+        return np.array([self.count, self.mean, self._m2, self.min, self.max], dtype=float)
+
+    def load(self, state):
+        count, self.mean, self._m2, self.min, self.max = (float(v) for v in state)
+        self.count = int(count)
+
+
+class _RawEntries:
+    def __init__(self, capacity=None):
+        self.capacity = capacity
+        self._entries = []
+        self._start = 0
+
+    def append(self, entry):
+        if self.capacity and len(self._entries) == self.capacity:
+            self._entries[self._start] = entry
+            self._start = (self._start + 1) % self.capacity
+        else:
+            self._entries.append(entry)
+
+    def entries(self):
+        return self._entries[self._start:] + self._entries[:self._start]
+
+
+class MetricSeries:
+    """
+    One metric over consensus checkpoints. Models append() the per-agent values of a checkpoint
+    (a list, an array or a scalar); each entry is reduced on the spot to count, mean, variance,
+    min and max, so memory per checkpoint does not depend on the swarm size.
+
+    keep_raw:  also keep every appended entry as an array (the old list-of-lists record).
+    capacity:  keep only the most recent `capacity` checkpoints; summary() still covers the whole run.
+    """
+    _COLUMNS = ('count', 'mean', 'var', 'min', 'max')
+
+    def __init__(self, keep_raw=False, capacity=None, chunk=1024):
+        self.keep_raw = keep_raw
+        self._stats = _ChunkedRows(len(self._COLUMNS), capacity=capacity, chunk=chunk)
+        self._raw = _RawEntries(capacity) if keep_raw else None
+        self._totals = _RunningTotals()
+        self.appended = 0
+
+    def append(self, values):
+        v = np.asarray(values, dtype=float).ravel()
+        if v.size:
+            row = (v.size, v.mean(), v.var(), v.min(), v.max())
+        else:
+            row = (0, 0.0, 0.0, 0.0, 0.0)
+        self._stats.append(row)
+        self._totals.merge(*row)
+        if self._raw is not None:
+            self._raw.append(v.copy())
+        self.appended += 1
+
+    def __len__(self):
+        return len(self._stats)
+
+    def __iter__(self):
+        """Raw entries when kept, otherwise the per-checkpoint means."""
+        if self._raw is not None:
+            return iter(self._raw.entries())
+        return iter(self.mean.tolist())
+
+    def __getitem__(self, i):
+        if self._raw is not None:
+            return self._raw.entries()[i]
+        return self.mean[i]
+
+    def _column(self, name):
+        return self._stats.rows()[:, self._COLUMNS.index(name)]
+
+    @property
+    def count(self):
+        return self._column('count').astype(int)
+
+    @property
+    def mean(self):
+        return self._column('mean')
+
+    @property
+    def var(self):
+        return self._column('var')
+
+    @property
+    def std(self):
+        return np.sqrt(self.var)
+
+    @property
+    def min(self):
+        return self._column('min')
+
+    @property
+    def max(self):
+        return self._column('max')
+
+    def raw(self):
+        if self._raw is None:
+            raise ValueError('Raw values were not kept (keep_raw=False)')
+        return self._raw.entries()
+
+    def summary(self):
+        """Count, mean, variance, min and max over every value appended during the run."""
+        return self._totals.summary()
+
+    def state(self):
+        """The series as a few arrays (for snapshots); see load_state()."""
+        state = {'stats': self._stats.rows(), 'totals': self._totals.state(),
+                 'meta': np.array([self._stats.capacity or 0, self.appended, self.keep_raw, self._stats.chunk])}
+        if self._raw is not None:
+            entries = self._raw.entries()
+            state['raw'] = np.concatenate(entries) if entries else np.zeros(0)
+            state['raw_len'] = np.array([len(e) for e in entries], dtype=np.int64)
+        return state
+
+    @classmethod
+    def load_state(cls, state):
+        capacity, appended, keep_raw, chunk = (int(v) for v in state['meta'])
+        series = cls(bool(keep_raw), capacity or None, chunk)
+        series._stats.load(state['stats'])
+        series._totals.load(state['totals'])
+        series.appended = appended
+        if series._raw is not None:
+            bounds = np.cumsum(state['raw_len'])[:-1]
+            for entry in np.split(np.asarray(state['raw'], dtype=float), bounds) if len(state['raw_len']) else []:
+                series._raw.append(entry)
+        return series
+
+
+class ScalarSeries:
+    """
+    One number per time step (e.g. agents reached) in a chunked array instead of a Python list.
+    Iterates and indexes like the list it replaces; with a capacity only the most recent values
+    are kept while summary() covers the whole run.
+    """
+
+    def __init__(self, dtype=float, capacity=None, chunk=4096):
+        self._values = _ChunkedRows(1, dtype=dtype, capacity=capacity, chunk=chunk)
+        self._totals = _RunningTotals()
+        self.appended = 0
+
+    def append(self, value):
+        self._values.append(value)
+        self._totals.merge(1, float(value), 0.0, float(value), float(value))
+        self.appended += 1
+
+    def __len__(self):
+        return len(self._values)
+
+    @property
+    def values(self):
+        return self._values.rows()[:, 0]
+
+    def __iter__(self):
+        return iter(self.values.tolist())
+
+    def __getitem__(self, i):
+        return self.values[i]
+
+    def tolist(self):
+        return self.values.tolist()
+
+    def summary(self):
+        return self._totals.summary()
+
+    def state(self):
+        return {'values': self.values, 'totals': self._totals.state(),
+                'meta': np.array([self._values.capacity or 0, self.appended, self._values.chunk])}
+
+    @classmethod
+    def load_state(cls, state):
+        capacity, appended, chunk = (int(v) for v in state['meta'])
+        series = cls(dtype=np.asarray(state['values']).dtype, capacity=capacity or None, chunk=chunk)
+        series._values.load(np.asarray(state['values'])[:, None])
+        series._totals.load(state['totals'])
+        series.appended = appended
+        return series
+
+
+
+# ---------- checkpoint metrics on array state ----------
+# Shared by both engines: collisions reuse the pair distances measured by the neighbor search,
+# target tests compare squared distances.
+
+def collision_counts(nbr_src, nbr_dist, num_agents, threshold):
+    """Per-agent number of neighbors closer than `threshold`, from the (src, dist) neighbor pairs."""
+    return np.bincount(nbr_src[nbr_dist < float(threshold)], minlength=num_agents)
+
+
+def within(positions, points, radius):
+    """Mask of the positions within `radius` of the matching row of `points`."""
+    diff = positions - points
+    return np.einsum('nk,nk->n', diff, diff) <= float(radius) ** 2
+
+
+def decision_accuracy(positions, goal_positions, chosen, target_radius):
+    """Share of the `chosen` agents (those with a goal) that lie within target_radius of their goal."""
+    if not np.any(chosen):
+        return 0.0
+    inside = within(positions[chosen], goal_positions[chosen], target_radius)
+    return float(np.count_nonzero(inside)) / float(inside.size)
+
+
+def order_parameter(angles):
+    """Order parameter r = |mean(exp(i*angle))| of headings or phases: 1 when all agree, ~0 when spread."""
+    angles = np.asarray(angles, dtype=float)
+    if not angles.size:
+        return 0.0
+    return float(np.hypot(np.mean(np.cos(angles)), np.mean(np.sin(angles))))
+
+
+def order_parameters(angles):
+    """order_parameter of every row of a (groups, members) array, e.g. one per ensemble replicate."""
+    angles = np.asarray(angles, dtype=float)
+    return np.hypot(np.cos(angles).mean(axis=-1), np.sin(angles).mean(axis=-1))
+
+
+def inside_any_target(positions, targets, target_radius):
+    """Mask of the agents within target_radius of any target; targets (T, 2), or (agents, T, 2)."""
+    diff = positions[:, None, :] - targets
+    return (np.einsum('ntk,ntk->nt', diff, diff) <= float(target_radius) ** 2).any(axis=1)
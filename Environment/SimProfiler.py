@@ -0,0 +1,105 @@
+import json
+from contextlib import nullcontext
+from pathlib import Path
+from time import perf_counter
+
+
+class _Phase:
+    __slots__ = ('timer', 'name', 'start')
+
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = perf_counter() - self.start
+        totals, calls = self.timer.totals, self.timer.calls
+        totals[self.name] = totals.get(self.name, 0.0) + elapsed
+        calls[self.name] = calls.get(self.name, 0) + 1
+        return False
+
+
+class PhaseTimer:
+    """
+    Named phase timers, call counters and steps/sec for one simulation run.
+
+        with timer.phase('neighbors'):
+            ...
+        timer.count('verlet_rebuilds', n)
+
+    Phase times are inclusive (a phase nested in another counts towards both). A disabled timer
+    (NULL_TIMER) hands out one shared no-op context, so instrumented code only pays a method call.
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.totals = {}
+        self.calls = {}
+        self.counters = {}
+        self.steps = 0
+        self.wall = 0.0
+        self._start = None
+        self._null = nullcontext()
+
+    def phase(self, name):
+        if not self.enabled:
+            return self._null
+        return _Phase(self, name)
+
+    def count(self, name, n=1):
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def start(self):
+        if self.enabled:
+            self._start = perf_counter()
+
+    def step(self):
+        if self.enabled:
+            self.steps += 1
+
+    def stop(self):
+        if self._start is not None:
+            self.wall += perf_counter() - self._start
+            self._start = None
+
+    def report(self, **meta):
+        """Machine-readable summary; `meta` (agents, model, ...) is stored alongside."""
+        wall = self.wall
+        phases = {}
+        for name in sorted(self.totals, key=self.totals.get, reverse=True):
+            total, calls = self.totals[name], self.calls[name]
+            phases[name] = {'calls': calls, 'total_s': total, 'mean_ms': 1e3 * total / calls,
+                            'share': (total / wall) if wall else 0.0}
+        return {**meta, 'steps': self.steps, 'wall_s': wall,
+                'steps_per_s': (self.steps / wall) if wall else 0.0,
+                'phases': phases, 'counters': dict(self.counters)}
+
+    def summary_table(self, title='Phase timings'):
+        return format_report(self.report(), title)
+
+    def write_json(self, path, **meta):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(self.report(**meta), f, indent=1)
+        return path
+
+
+def format_report(report, title='Phase timings'):
+    """Text table for one PhaseTimer.report()."""
+    lines = [f"{title}: {report['steps']} steps in {report['wall_s']:.3f} s "
+             f"({report['steps_per_s']:.1f} steps/s)",
+             f"  {'phase':<16}{'calls':>10}{'total s':>12}{'mean ms':>12}{'share':>8}"]
+    for name, p in report['phases'].items():
+        lines.append(f"  {name:<16}{p['calls']:>10}{p['total_s']:>12.4f}{p['mean_ms']:>12.4f}"
+                     f"{100 * p['share']:>7.1f}%")
+    for name, n in report['counters'].items():
+        lines.append(f"  {name:<16}{n:>10}")
+    return '\n'.join(lines)
+
+
+NULL_TIMER = PhaseTimer(enabled=False)
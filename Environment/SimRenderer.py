@@ -0,0 +1,60 @@
+import pygame
+
+
+class SimRenderer:
+    """
+    Optional pygame front end for SimEnv: owns the window, the event queue and the frame clock.
+    Headless runs never create one, so pygame is not even imported for them.
+    """
+
+    def __init__(self, width, height, fps, FULSCRN=False):
+        pygame.init()
+        if FULSCRN:
+            resol = (pygame.display.Info().current_w, pygame.display.Info().current_h)
+            self.screen = pygame.display.set_mode(resol, pygame.SCALED)
+        else:
+            self.screen = pygame.display.set_mode((width, height), pygame.RESIZABLE)
+
+        self.BGCOLOR = (255, 255, 255)
+        self.clock = pygame.time.Clock()
+        self.fps = fps
+
+    def set_caption(self, caption):
+        pygame.display.set_caption(caption)
+
+    def poll_events(self):
+        """Drain the event queue; returns False once the window has been closed."""
+        running = True
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+        return running
+
+    def clear(self):
+        self.screen.fill(self.BGCOLOR)
+
+    def draw_targets(self, point, target_size):
+        x, y = int(point[0]), int(point[1])
+        pygame.draw.circle(self.screen, (0, 0, 255), (x, y), target_size)
+
+    def render(self, model, hurdles, targets, target_size):
+        if hasattr(model, 'draw_agents'):
+            model.draw_agents(self.screen)
+        else:
+            for agent in model.agents:
+                agent.display_agents(self.screen)
+
+        if hasattr(hurdles, 'draw_hurdles'):
+            hurdles.draw_hurdles(self.screen)
+        else:
+            for hurdle in hurdles:
+                hurdle.draw_hurdles(self.screen)
+
+        for target_point in targets:
+            self.draw_targets(target_point, target_size)
+
+        pygame.display.flip()
+        self.clock.tick(self.fps)
+
+    def close(self):
+        pygame.quit()
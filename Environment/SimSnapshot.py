@@ -0,0 +1,61 @@
+import random
+import numpy as np
+
+# Snapshots are one uncompressed .npz: every array of the nested state under a dotted key
+# ('model.positions', 'metrics.0.stats', 'rng.np_keys', ...), so saving and loading is a single dump.
+SNAPSHOT_VERSION = 2  # 2: Kuramoto runs record the order parameter series
+
+
+def rng_state():
+    """State of the global `random` and `np.random` streams as arrays."""
+    version, internal, gauss = random.getstate()
+    _, keys, pos, has_gauss, cached = np.random.get_state()
+    return {'py_version': np.array(version),
+            'py_state': np.array(internal, dtype=np.uint64),
+            'py_gauss': np.array(np.nan if gauss is None else gauss),
+            'np_keys': np.asarray(keys, dtype=np.uint32),
+            'np_pos': np.array(pos),
+            'np_gauss': np.array([has_gauss, cached], dtype=float)}
+
+
+def set_rng_state(state):
+    gauss = float(state['py_gauss'])
+    random.setstate((int(state['py_version']), tuple(int(v) for v in state['py_state']),
+                     None if np.isnan(gauss) else gauss))
+    has_gauss, cached = state['np_gauss']
+    np.random.set_state(('MT19937', np.asarray(state['np_keys'], dtype=np.uint32), int(state['np_pos']),
+                         int(has_gauss), float(cached)))
+
+
+def _flatten(state, prefix=''):
+    for key, value in state.items():
+        name = f'{prefix}{key}'
+        if isinstance(value, dict):
+            yield from _flatten(value, name + '.')
+        else:
+            yield name, np.asarray(value)
+
+
+def _nest(flat):
+    state = {}
+    for name, value in flat.items():
+        node = state
+        *parents, leaf = name.split('.')
+        for part in parents:
+            node = node.setdefault(part, {})
+        node[leaf] = value
+    return state
+
+
+def save_snapshot(path, state):
+    """Write a nested dict of arrays (see SimEnv.snapshot_state) to `path` as one .npz."""
+    np.savez(path, version=SNAPSHOT_VERSION, **dict(_flatten(state)))
+    return path
+
+
+def load_snapshot(path):
+    with np.load(path) as data:
+        flat = {name: data[name] for name in data.files}
+    if int(flat.pop('version', -1)) != SNAPSHOT_VERSION:
+        raise ValueError(f'{path}: not a snapshot of version {SNAPSHOT_VERSION}')
+    return _nest(flat)
@@ -0,0 +1,64 @@
+import numpy as np
+
+
+class StopCriteria:
+    """
+    Early termination for headless runs. Every rule is optional; the run stops as soon as one holds.
+
+    reached_fraction: share of agents inside any target (checked every step)
+    mismatch_below:   checkpoint direction-mismatch average below this for `patience` checkpoints in a row
+    order_above:      heading order parameter (SimMetrics.order_parameter) above this for `patience` checkpoints
+    min_steps:        never stop before this step
+
+    Values handed in may be arrays (one per ensemble replicate); a rule then holds only when it holds
+    for every replicate. After a stop, stopped_at and reason describe it.
+    """
+
+    def __init__(self, reached_fraction=None, mismatch_below=None, order_above=None, patience=3, min_steps=0):
+        self.reached_fraction = reached_fraction
+        self.mismatch_below = mismatch_below
+        self.order_above = order_above
+        self.patience = max(1, int(patience))
+        self.min_steps = int(min_steps)
+        self.reset()
+
+    def reset(self):
+        self._mismatch_streak = 0
+        self._order_streak = 0
+        self.stopped_at = None
+        self.reason = None
+
+    @property
+    def enabled(self):
+        return any(v is not None for v in (self.reached_fraction, self.mismatch_below, self.order_above))
+
+    @property
+    def wants_order(self):
+        return self.order_above is not None
+
+    def _stop(self, time_count, reason):
+        if time_count < self.min_steps:
+            return False
+        self.stopped_at = time_count
+        self.reason = reason
+        return True
+
+    def check_step(self, time_count, reached_fraction):
+        """Per-step rule: fraction of agents inside a target."""
+        if self.reached_fraction is not None and np.all(np.asarray(reached_fraction) >= self.reached_fraction):
+            return self._stop(time_count, 'reached')
+        return False
+
+    def check_checkpoint(self, time_count, mismatch, order=None):
+        """Per-checkpoint rules: mismatch average and order parameter, each held for `patience` checkpoints."""
+        if self.mismatch_below is not None:
+            below = np.all(np.asarray(mismatch) < self.mismatch_below)
+            self._mismatch_streak = self._mismatch_streak + 1 if below else 0
+            if self._mismatch_streak >= self.patience and self._stop(time_count, 'mismatch'):
+                return True
+        if self.order_above is not None and order is not None:
+            above = np.all(np.asarray(order) > self.order_above)
+            self._order_streak = self._order_streak + 1 if above else 0
+            if self._order_streak >= self.patience and self._stop(time_count, 'order'):
+                return True
+        return False
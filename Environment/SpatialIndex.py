@@ -0,0 +1,253 @@
+import numpy as np
+
+from Environment.SimKernels import kernels_enabled, cell_pairs
+
+
+class CellList:
+    """
+    Uniform-grid (cell list) neighbor index.
+
+    Points are bucketed into square cells of side `cell_size` (normally INTERACTION_RADIUS), so a
+    radius query only has to look at the surrounding block of cells instead of the whole swarm.
+    The grid covers the bounding box of the points passed to build(); build it once per step and
+    query it from every agent.
+    """
+
+    def __init__(self, cell_size):
+        self.cell_size = float(cell_size)
+        self.positions = np.zeros((0, 2), dtype=float)
+        self.origin = np.zeros(2, dtype=float)
+        self.shape = (1, 1)
+        self.order = np.zeros(0, dtype=np.intp)
+        self.cell_start = np.zeros(2, dtype=np.intp)
+        self.cell_of = np.zeros(0, dtype=np.intp)
+
+    def build(self, positions):
+        self.positions = np.asarray(positions, dtype=float).reshape(-1, 2)
+        if len(self.positions) == 0:
+            self.origin = np.zeros(2, dtype=float)
+            self.shape = (1, 1)
+            self.order = np.zeros(0, dtype=np.intp)
+            self.cell_start = np.zeros(2, dtype=np.intp)
+            self.cell_of = np.zeros(0, dtype=np.intp)
+            return self
+        self.origin = self.positions.min(axis=0)
+        coords = self._cell_coords(self.positions)
+        self.shape = tuple(int(v) for v in coords.max(axis=0) + 1)
+        self.cell_of = coords[:, 0] * self.shape[1] + coords[:, 1]
+        self.order = np.argsort(self.cell_of, kind='stable')
+        counts = np.bincount(self.cell_of, minlength=self.shape[0] * self.shape[1])
+        self.cell_start = np.concatenate(([0], np.cumsum(counts)))
+        return self
+
+    def update(self, positions):
+        """Per-step entry point shared with VerletList; a cell list is simply rebuilt."""
+        return self.build(positions)
+
+    def _cell_coords(self, points):
+        return np.floor((points - self.origin) / self.cell_size).astype(np.intp)
+
+    def _reach(self, radius):
+        return max(1, int(np.ceil(float(radius) / self.cell_size)))
+
+    def candidates(self, point, radius):
+        """Indices of all points in the cells that a disc of `radius` around `point` can touch."""
+        cx, cy = self._cell_coords(np.asarray(point, dtype=float))
+        reach = self._reach(radius)
+        nx, ny = self.shape
+        x0, x1 = max(cx - reach, 0), min(cx + reach, nx - 1)
+        y0, y1 = max(cy - reach, 0), min(cy + reach, ny - 1)
+        if x0 > x1 or y0 > y1:
+            return np.zeros(0, dtype=np.intp)
+        # cells of one grid column are contiguous in the sorted order
+        chunks = [self.order[self.cell_start[x * ny + y0]:self.cell_start[x * ny + y1 + 1]]
+                  for x in range(x0, x1 + 1)]
+        return np.concatenate(chunks)
+
+    def query(self, point, radius):
+        """
+        Indices (ascending) and distances of the indexed points within `radius` of `point`.
+        The point itself is included if it is indexed.
+        """
+        point = np.asarray(point, dtype=float)
+        cand = self.candidates(point, radius)
+        if cand.size == 0:
+            return cand, np.zeros(0, dtype=float)
+        cand.sort()
+        dists = np.linalg.norm(point - self.positions[cand], axis=1)
+        within = dists <= radius
+        return cand[within], dists[within]
+
+    def neighbors(self, i, radius):
+        """Indices (ascending) and distances of the points within `radius` of point i, excluding i."""
+        ids, dists = self.query(self.positions[i], radius)
+        keep = ids != i
+        return ids[keep], dists[keep]
+
+    def pairs(self, radius):
+        """
+        All ordered pairs (i, j), i != j, with |p_i - p_j| <= radius.
+        Returns (src, dst, dist) sorted by (src, dst), i.e. a CSR-ordered edge list.
+        """
+        n = len(self.positions)
+        if n == 0:
+            return np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.intp), np.zeros(0, dtype=float)
+        if kernels_enabled():
+            return cell_pairs(self, radius)
+        reach = self._reach(radius)
+        nx, ny = self.shape
+        coords = np.column_stack((self.cell_of // ny, self.cell_of % ny))
+        src, dst = [], []
+        for ox in range(-reach, reach + 1):
+            cx = coords[:, 0] + ox
+            x_ok = (cx >= 0) & (cx < nx)
+            # a whole column strip of cells [cy - reach, cy + reach] is one contiguous slice
+            y0 = np.clip(coords[:, 1] - reach, 0, ny - 1)
+            y1 = np.clip(coords[:, 1] + reach, 0, ny - 1)
+            cxc = np.clip(cx, 0, nx - 1)
+            start = self.cell_start[cxc * ny + y0]
+            stop = self.cell_start[cxc * ny + y1 + 1]
+            counts = np.where(x_ok, stop - start, 0)
+            total = int(counts.sum())
+            if total == 0:
+                continue
+            i = np.repeat(np.arange(n, dtype=np.intp), counts)
+            first = np.repeat(start - (np.cumsum(counts) - counts), counts)
+            j = self.order[first + np.arange(total, dtype=np.intp)]
+            src.append(i)
+            dst.append(j)
+        if not src:
+            return np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.intp), np.zeros(0, dtype=float)
+        src = np.concatenate(src)
+        dst = np.concatenate(dst)
+        dist = np.linalg.norm(self.positions[src] - self.positions[dst], axis=1)
+        keep = (dist <= radius) & (src != dst)
+        src, dst, dist = src[keep], dst[keep], dist[keep]
+        csr = np.lexsort((dst, src))
+        return src[csr], dst[csr], dist[csr]
+
+
+class VerletList:
+    """
+    Verlet neighbor list with a skin radius.
+
+    Candidate pairs within `radius + skin` are collected with a CellList and kept until some agent
+    has moved more than skin / 2 since the last rebuild; until then no pair can have come closer
+    than `radius` without being a candidate. Every step the exact neighbors are filtered from the
+    candidates using the current positions, so results match a CellList built every step.
+    """
+
+    def __init__(self, radius, skin):
+        self.radius = float(radius)
+        self.skin = float(skin)
+        self.cell_list = CellList(self.radius + self.skin)
+        self.positions = np.zeros((0, 2), dtype=float)
+        self.reference = None
+        self.cand_src = np.zeros(0, dtype=np.intp)
+        self.cand_dst = np.zeros(0, dtype=np.intp)
+        self.cand_offsets = np.zeros(1, dtype=np.intp)
+        self.steps = 0
+        self.rebuilds = 0
+
+    def update(self, positions):
+        self.positions = np.asarray(positions, dtype=float).reshape(-1, 2)
+        self.steps += 1
+        if self._needs_rebuild():
+            self._rebuild()
+        return self
+
+    def _needs_rebuild(self):
+        if self.reference is None or len(self.reference) != len(self.positions):
+            return True
+        if len(self.positions) == 0:
+            return False
+        moved = self.positions - self.reference
+        return float(np.max(np.einsum('nk,nk->n', moved, moved))) > (0.5 * self.skin) ** 2
+
+    def _rebuild(self):
+        self.cell_list.build(self.positions)
+        self.cand_src, self.cand_dst, _ = self.cell_list.pairs(self.radius + self.skin)
+        counts = np.bincount(self.cand_src, minlength=len(self.positions))
+        self.cand_offsets = np.concatenate(([0], np.cumsum(counts)))
+        self.reference = self.positions.copy()
+        self.rebuilds += 1
+
+    def _check_radius(self, radius):
+        if radius > self.radius:
+            raise ValueError(f'Query radius {radius} exceeds the Verlet list radius {self.radius}')
+
+    def neighbors(self, i, radius):
+        """Indices (ascending) and distances of the points within `radius` of point i, excluding i."""
+        self._check_radius(radius)
+        cand = self.cand_dst[self.cand_offsets[i]:self.cand_offsets[i + 1]]
+        dists = np.linalg.norm(self.positions[i] - self.positions[cand], axis=1)
+        within = dists <= radius
+        return cand[within], dists[within]
+
+    def pairs(self, radius):
+        """Exact CSR-ordered (src, dst, dist) pairs within `radius`, filtered from the candidates."""
+        self._check_radius(radius)
+        dist = np.linalg.norm(self.positions[self.cand_src] - self.positions[self.cand_dst], axis=1)
+        within = dist <= radius
+        return self.cand_src[within], self.cand_dst[within], dist[within]
+
+    @property
+    def rebuild_rate(self):
+        return (self.rebuilds / self.steps) if self.steps else 0.0
+
+    def report(self):
+        return (f'Verlet list (skin={self.skin:g}): {self.rebuilds} rebuilds in {self.steps} steps '
+                f'(rebuild rate {self.rebuild_rate:.3f})')
+
+
+def csr_offsets(src, n):
+    """Row offsets of a CSR-ordered edge list (as returned by pairs()) over n points."""
+    return np.concatenate(([0], np.cumsum(np.bincount(src, minlength=n))))
+
+
+def draw_neighbors(offsets, dst, draws=None):
+    """
+    One uniformly drawn neighbor for every point that has neighbors, from a CSR graph, using a
+    single np.random draw. Returns (points, chosen neighbors).
+    draws: the uniform [0, 1) numbers to use instead, one per point with neighbors in index order.
+    """
+    counts = np.diff(offsets)
+    points = np.flatnonzero(counts)
+    if points.size == 0:
+        return points, points
+    if draws is None:
+        draws = np.random.random(points.size)
+    pick = offsets[points] + (draws * counts[points]).astype(np.intp)
+    return points, dst[pick]
+
+
+def make_neighbor_index(swarm_params):
+    """CellList rebuilt every step, or a VerletList when VERLET_SKIN > 0."""
+    radius = swarm_params['INTERACTION_RADIUS']
+    skin = float(swarm_params.get('VERLET_SKIN', 0) or 0)
+    if skin > 0:
+        return VerletList(radius, skin)
+    return CellList(radius)
+
+
+def sweep_levels(offsets, dst):
+    """
+    Wavefronts of an in-order sweep over a CSR graph, where every point reads the points before it
+    after their update and the points after it before theirs: level 0 for points without a
+    lower-index neighbor, else one more than the highest level among those neighbors. Points of one
+    level are never neighbors, so a level can be updated at once, levels in increasing order.
+    """
+    n = len(offsets) - 1
+    src = np.repeat(np.arange(n, dtype=np.intp), np.diff(offsets))
+    lower = dst < src
+    src, dst = src[lower], dst[lower]
+    level = np.zeros(n, dtype=np.intp)
+    if src.size == 0:
+        return level
+    # src stays sorted, so each point's lower neighbors are one contiguous run
+    rows, starts = np.unique(src, return_index=True)
+    while True:
+        deeper = np.maximum.reduceat(level[dst] + 1, starts)
+        if np.array_equal(deeper, level[rows]):
+            return level
+        level[rows] = deeper
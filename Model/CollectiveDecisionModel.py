@@ -1,42 +1,135 @@
 import random
 import numpy as np
 
-from Model.ModelAgent import MajorityAgent, VoterAgent, KuramotoAgent
+from Model.ModelAgent import MajorityAgent, VoterAgent, KuramotoAgent, sequential_phases
+from Environment.SimAgent import SwarmAggregates
+from Environment.SpatialIndex import make_neighbor_index, csr_offsets, draw_neighbors
+from Environment.SimProfiler import NULL_TIMER
+from Model.ConsensusCache import NeighborhoodCache, make_nearest_cache
+from Environment.SimMetrics import collision_counts, decision_accuracy as accuracy_of, order_parameter as phase_order
 
 LATENT_AGENT_COLOR = (255, 0, 0)        # Red
 NON_LATENT_AGENT_COLOR = (0, 255, 255)  # Blue
 
+UPDATE_ORDERS = ('synchronous', 'sequential')
+
+
+def _goal_index(goal, target_array):
+    """Row of target_array equal to `goal` (-1 for no goal)."""
+    if goal is None:
+        return -1
+    hit = np.flatnonzero((target_array == np.asarray(goal, dtype=float)).all(axis=1))
+    return int(hit[0]) if hit.size else -1
+
+
+class AgentSwarmState:
+    """
+    Snapshot support for the object models: get_state() stacks the AGENT_FIELDS attributes of every
+    agent (plus the chosen target as an index) into arrays, set_state() writes them back.
+    """
+    AGENT_FIELDS = ('position', 'direction', 'consensus_direction', 'is_latent', 'color')
+
+    def get_state(self):
+        state = {name: np.array([getattr(agent, name) for agent in self.agents]) for name in self.AGENT_FIELDS}
+        state['goal_idx'] = np.array([_goal_index(agent.nearest_goal, self.target_array) for agent in self.agents],
+                                     dtype=np.intp)
+        return state
+
+    def set_state(self, state):
+        if len(state['position']) != len(self.agents):
+            raise ValueError(f"Snapshot has {len(state['position'])} agents, this swarm {len(self.agents)}")
+        for k, agent in enumerate(self.agents):
+            for name in self.AGENT_FIELDS:
+                value = state[name][k]
+                if name == 'position':
+                    value = np.array(value, dtype=float)
+                elif name == 'color':
+                    value = tuple(int(c) for c in value)
+                else:
+                    value = value.item()
+                setattr(agent, name, value)
+            goal = int(state['goal_idx'][k])
+            agent.goal_id = goal
+            agent.nearest_goal = None if goal < 0 else self.target_array[goal].copy()
+        self.neighbor_index = make_neighbor_index(self.swarm_params)
+        self.neighborhood_cache = NeighborhoodCache()
+
+    def headings(self):
+        return np.array([agent.direction for agent in self.agents], dtype=float)
+
+    def checkpoint_metrics(self, start_headings, target_radius):
+        """
+        Direction mismatch, collision counts and decision accuracy of a checkpoint in one pass over
+        the swarm's arrays, after the agents have updated. start_headings: headings before the
+        checkpoint (each agent's mismatch is against its own heading at the time it was measured);
+        collisions reuse the neighbor distances collect_neighbors measured this step.
+        """
+        n = len(self.agents)
+        consensus = np.array([agent.consensus_direction for agent in self.agents], dtype=float)
+        mismatch = np.abs(consensus - start_headings)
+        dists = [agent.neighbor_distances for agent in self.agents]
+        src = np.repeat(np.arange(n), [len(d) for d in dists])
+        nbr_dist = np.concatenate(dists) if n else np.zeros(0)
+        collisions = collision_counts(src, nbr_dist, n, self.swarm_params['SEPERATION_DISTANCE'])
+        positions = np.array([agent.position for agent in self.agents], dtype=float).reshape(-1, 2)
+        goal_idx = np.array([agent.goal_id for agent in self.agents], dtype=np.intp)
+        acc = accuracy_of(positions, self.target_array[goal_idx], goal_idx >= 0, target_radius)
+        return mismatch, collisions, acc
+
+    def collect_neighbors(self, positions=None):
+        """
+        Every agent's neighbors for this step from one CSR pairs() call of the neighbor index (a
+        compiled pass with the kernels on) rather than one radius query per agent.
+        """
+        if positions is None:
+            positions = [agent.position for agent in self.agents]
+        self.neighbor_index.update(positions)
+        src, dst, dist = self.neighbor_index.pairs(self.swarm_params['INTERACTION_RADIUS'])
+        offsets = csr_offsets(src, len(self.agents))
+        for k, agent in enumerate(self.agents):
+            agent.set_neighbors(self.agents, dst[offsets[k]:offsets[k + 1]], dist[offsets[k]:offsets[k + 1]])
+        self.nbr_offsets, self.nbr_dst = offsets, dst
+
+    def neighbor_csr(self):
+        """(offsets, dst) of the neighbor lists collect_neighbors handed out this step."""
+        return self.nbr_offsets, self.nbr_dst
+
+    def stale_neighborhoods(self, headings):
+        """Agents whose neighbor list or neighbors' headings changed since their consensus direction was computed."""
+        return self.neighborhood_cache.dirty(*self.neighbor_csr(), headings)
+
+    def nearest_targets(self, positions=None):
+        """Nearest target index of every agent; only agents that moved far enough are re-measured."""
+        if positions is None:
+            positions = [agent.position for agent in self.agents]
+        nearest = self.nearest_cache.nearest(positions)
+        self.timer.count('opinions_measured', self.nearest_cache.measured)
+        return nearest
+
+
+class MajorityRuleModel(AgentSwarmState):
+    timer = NULL_TIMER  # SimEnv hands in its PhaseTimer
+    AGENT_FIELDS = AgentSwarmState.AGENT_FIELDS + ('has_consensus',)
 
-def _decision_accuracy(agents, target_radius):
-    """Proportion of agents that are inside their selected target (agent.nearest_goal)."""
-    successes = 0
-    counted = 0
-    r2 = float(target_radius) ** 2
-    for a in agents:
-        if getattr(a, 'nearest_goal', None) is None:
-            continue
-        dx = a.position[0] - a.nearest_goal[0]
-        dy = a.position[1] - a.nearest_goal[1]
-        if dx * dx + dy * dy <= r2:
-            successes += 1
-        counted += 1
-    return (successes / counted) if counted > 0 else 0.0
-
-
-class MajorityRuleModel:
     def __init__(self, agent_pos, targets, params):
         self.Name = 'Majority Model'
         self.env_params, self.swarm_params = params
         self.consensus_period = self.swarm_params['CONSENSUS_PERIOD']
         self.targets = targets
+        self.target_array = np.array(targets, dtype=float)
+        self.neighbor_index = make_neighbor_index(self.swarm_params)
+        self.nearest_cache = make_nearest_cache(self.target_array, params)
+        self.neighborhood_cache = NeighborhoodCache()
+        # votes per (agent, target ID); every agent tallies into its own row
+        self.opinion_count = np.zeros((len(agent_pos), len(self.target_array)), dtype=np.int64)
         self.agents = []
-        for pos in agent_pos:
+        for k, pos in enumerate(agent_pos):
             is_latent = random.choice([True, False])
-            opn_count = {target: 0 for target in self.targets}
             self.agents.append(
                 MajorityAgent(pos, is_latent, self.env_params['SCREEN_WIDTH'], self.env_params['SCREEN_HEIGHT'],
                               self.swarm_params['INTERACTION_RADIUS'], self.swarm_params['REPULSION_RADIUS'],
-                              self.swarm_params['SEPERATION_DISTANCE'], self.swarm_params['AGENT_SPEED'], opn_count))
+                              self.swarm_params['SEPERATION_DISTANCE'], self.swarm_params['AGENT_SPEED'],
+                              self.opinion_count[k]))
 
     def update(self, time_count, hurdles, metrics):
         # metrics: [dir_mismatch, collisions, decision_accuracy]
@@ -44,53 +137,85 @@ class MajorityRuleModel:
         collisions = metrics[1]
         decision_accuracy = metrics[2]
 
-        for agent in self.agents:
-            agent.get_neighbors(self.agents)
+        with self.timer.phase('neighbors'):
+            self.collect_neighbors()
 
         if time_count % self.consensus_period == 0:
-            print('Model has been updated at time: ', time_count)
-            print('Info: Opinion occurrence is being counted by agents')
-
-            dir_mismatch_step = []
-            collision_step = []
-
-            for agent in self.agents:
-                agent.calculate_average_direction()
-                agent.compute_opinion(self.targets)
-                dir_mismatch_step.append(agent.calculate_dir_mismatch())
-                collision_step.append(agent.compute_collision_count())
-
-            for agent in self.agents:
-                if agent.consensus_direction is not None:
-                    agent.count_opinion_occurance(self.targets)
-                    agent.direction = agent.consensus_direction
-                    agent.has_consensus = True
-
-            # decision-making accuracy (proportion inside selected targets)
-            acc = _decision_accuracy(self.agents, self.env_params['TARGET_SIZE'])
-
-            direction_mismatches.append(dir_mismatch_step)
-            collisions.append(collision_step)
-            decision_accuracy.append([acc])  # keep shape consistent (list of scalars)
-
-            print('Info: Majority opinion selected')
-            print('=' * 60)
-
-        for agent in self.agents:
-            if agent.has_consensus:
-                agent.update_direction(self.agents, self.swarm_params)
-                agent.color = NON_LATENT_AGENT_COLOR if agent.is_latent else LATENT_AGENT_COLOR
-            agent.move(hurdles)
+            with self.timer.phase('consensus'):
+                print('Model has been updated at time: ', time_count)
+                print('Info: Opinion occurrence is being counted by agents')
+
+                start_headings = self.headings()
+                nearest = self.nearest_targets()
+                stale = self.stale_neighborhoods(start_headings)
+                for agent, goal, recompute in zip(self.agents, nearest, stale):
+                    if recompute:
+                        agent.calculate_average_direction()
+                    agent.compute_opinion(self.target_array, goal)
+                self.timer.count('consensus_recomputed', int(np.count_nonzero(stale)))
+
+                for agent in self.agents:
+                    if agent.consensus_direction is not None:
+                        agent.count_opinion_occurance(self.target_array)
+                        agent.direction = agent.consensus_direction
+                        agent.has_consensus = True
+
+                with self.timer.phase('metrics'):
+                    # accuracy: proportion inside selected targets
+                    dir_mismatch_step, collision_step, acc = self.checkpoint_metrics(
+                        start_headings, self.env_params['TARGET_SIZE'])
+
+                    direction_mismatches.append(dir_mismatch_step)
+                    collisions.append(collision_step)
+                    decision_accuracy.append([acc])  # keep shape consistent (list of scalars)
+
+                print('Info: Majority opinion selected')
+                print('=' * 60)
+
+        with self.timer.phase('step_agents'):
+            aggregates = SwarmAggregates(self.agents, self.target_array)
+            for k, agent in enumerate(self.agents):
+                if agent.has_consensus:
+                    agent.update_direction(self.agents, self.swarm_params, aggregates)
+                    agent.color = NON_LATENT_AGENT_COLOR if agent.is_latent else LATENT_AGENT_COLOR
+                agent.move(hurdles)
+                aggregates.moved(k, agent.position, agent.direction)
 
         return [direction_mismatches, collisions, decision_accuracy]
 
-
-class VoterModel:
-    def __init__(self, agent_pos, targets, params):
+    def get_state(self):
+        state = super().get_state()
+        state['opinion_count'] = self.opinion_count.copy()
+        return state
+
+    def set_state(self, state):
+        super().set_state(state)
+        # in place: the agents hold views of the rows
+        self.opinion_count[...] = np.asarray(state['opinion_count'], dtype=np.int64).reshape(self.opinion_count.shape)
+
+
+class VoterModel(AgentSwarmState):
+    timer = NULL_TIMER  # SimEnv hands in its PhaseTimer
+    AGENT_FIELDS = AgentSwarmState.AGENT_FIELDS + ('has_switched_opinion',)
+
+    def __init__(self, agent_pos, targets, params, update_order='sequential'):
+        """
+        update_order:
+          'sequential'  - agents switch one after another, each seeing the switches made before it.
+          'synchronous' - every agent copies one neighbor drawn from the CSR neighbor graph, all
+                          from the opinions held before the checkpoint (same draws as the vector engine).
+        """
+        if update_order not in UPDATE_ORDERS:
+            raise ValueError(f'Unknown update_order: {update_order}')
+        self.update_order = update_order
         self.Name = 'Voter Model'
         self.env_params, self.swarm_params = params
         self.consensus_period = self.swarm_params['CONSENSUS_PERIOD']
         self.targets = targets
+        self.target_array = np.array(targets, dtype=float)
+        self.neighbor_index = make_neighbor_index(self.swarm_params)
+        self.nearest_cache = make_nearest_cache(self.target_array, params)
+        self.neighborhood_cache = NeighborhoodCache()
         self.agents = []
         for pos in agent_pos:
             is_latent = random.choice([True, False])
@@ -100,56 +225,94 @@ class VoterModel:
                                           self.swarm_params['REPULSION_RADIUS'],
                                           self.swarm_params['SEPERATION_DISTANCE'], self.swarm_params['AGENT_SPEED']))
 
+    def switch_opinions(self):
+        """Synchronous voter step: one random neighbor per agent in a single draw over the CSR graph."""
+        agents, chosen = draw_neighbors(*self.neighbor_csr())
+        if agents.size == 0:
+            return
+        goal_ids = np.array([agent.goal_id for agent in self.agents])
+        consensus = np.array([agent.consensus_direction for agent in self.agents], dtype=float)
+        for i, j in zip(agents.tolist(), chosen.tolist()):
+            agent = self.agents[i]
+            if goal_ids[j] < 0:
+                continue
+            if goal_ids[i] == goal_ids[j]:
+                agent.direction = consensus[i]
+            else:
+                agent.goal_id = int(goal_ids[j])
+                agent.nearest_goal = self.target_array[goal_ids[j]]
+                agent.direction = consensus[j]
+            agent.has_switched_opinion = True
+
     def update(self, time_count, hurdles, metrics):
         # metrics: [dir_mismatch, collisions, decision_accuracy]
         direction_mismatches = metrics[0]
         collisions = metrics[1]
         decision_accuracy = metrics[2]
 
-        for agent in self.agents:
-            agent.get_neighbors(self.agents)
+        with self.timer.phase('neighbors'):
+            self.collect_neighbors()
 
         if time_count % self.consensus_period == 0:
-            print('Model has been updated at time: ', time_count)
-            print('Info: Randomly select a neighbor agent to switch opinion')
-
-            dir_mismatch_step = []
-            collision_step = []
-
-            for agent in self.agents:
-                agent.calculate_average_direction()
-                if agent.consensus_direction is not None:
-                    agent.compute_opinion(self.targets)
-                    dir_mismatch_step.append(abs(agent.consensus_direction - agent.direction))
-                    collision_step.append(agent.compute_collision_count())
-                    agent.switch_opinion()
-
-            # decision-making accuracy
-            acc = _decision_accuracy(self.agents, self.env_params['TARGET_SIZE'])
-
-            direction_mismatches.append(dir_mismatch_step)
-            collisions.append(collision_step)
-            decision_accuracy.append([acc])
-
-            print('Info: Opinion switched')
-            print('=' * 60)
-
-        for agent in self.agents:
-            if agent.has_switched_opinion:
-                agent.update_direction(self.agents, self.swarm_params)
-                agent.color = NON_LATENT_AGENT_COLOR if agent.is_latent else LATENT_AGENT_COLOR
-            agent.move(hurdles)
+            with self.timer.phase('consensus'):
+                print('Model has been updated at time: ', time_count)
+                print('Info: Randomly select a neighbor agent to switch opinion')
+
+                start_headings = self.headings()
+                nearest = self.nearest_targets()
+                stale = self.stale_neighborhoods(start_headings)
+                # headings as the agents see them: sequential switches turn agents mid-loop
+                headings = start_headings.copy()
+                for k, (agent, goal) in enumerate(zip(self.agents, nearest)):
+                    if stale[k]:
+                        agent.calculate_average_direction()
+                        self.neighborhood_cache.saw(k, headings)
+                    if agent.consensus_direction is not None:
+                        agent.compute_opinion(self.target_array, goal)
+                        if self.update_order == 'sequential':
+                            agent.switch_opinion()
+                            self.neighborhood_cache.turned(k, headings[k], agent.direction, stale)
+                            headings[k] = agent.direction
+                self.timer.count('consensus_recomputed', int(np.count_nonzero(stale)))
+                if self.update_order == 'synchronous':
+                    self.switch_opinions()
+
+                with self.timer.phase('metrics'):
+                    dir_mismatch_step, collision_step, acc = self.checkpoint_metrics(
+                        start_headings, self.env_params['TARGET_SIZE'])
+
+                    direction_mismatches.append(dir_mismatch_step)
+                    collisions.append(collision_step)
+                    decision_accuracy.append([acc])
+
+                print('Info: Opinion switched')
+                print('=' * 60)
+
+        with self.timer.phase('step_agents'):
+            aggregates = SwarmAggregates(self.agents, self.target_array)
+            for k, agent in enumerate(self.agents):
+                if agent.has_switched_opinion:
+                    agent.update_direction(self.agents, self.swarm_params, aggregates)
+                    agent.color = NON_LATENT_AGENT_COLOR if agent.is_latent else LATENT_AGENT_COLOR
+                agent.move(hurdles)
+                aggregates.moved(k, agent.position, agent.direction)
 
         return [direction_mismatches, collisions, decision_accuracy]
 
 
-class KuramotoModel:
+class KuramotoModel(AgentSwarmState):
+    timer = NULL_TIMER  # SimEnv hands in its PhaseTimer
+    AGENT_FIELDS = AgentSwarmState.AGENT_FIELDS + ('omega', 'agent_phase', 'coupling_strength_K', 'has_phase_synched')
+
     def __init__(self, agent_pos, targets, params):
         self.Name = 'Kuramoto Model'
         self.env_params, self.swarm_params = params
         self.consensus_period = self.swarm_params['CONSENSUS_PERIOD']
         self.coupling_strength_increment = self.swarm_params['K_INCREMENT']
         self.targets = targets
+        self.target_array = np.array(targets, dtype=float)
+        self.neighbor_index = make_neighbor_index(self.swarm_params)
+        self.nearest_cache = make_nearest_cache(self.target_array, params)
         self.agents = []
         for pos in agent_pos:
             is_latent = random.choice([True, False])
@@ -159,53 +322,67 @@ class KuramotoModel:
                               self.swarm_params['SEPERATION_DISTANCE'], self.swarm_params['AGENT_SPEED']))
 
     def update(self, time_count, hurdles, metrics):
-        # metrics: [dir_mismatch, collisions, phase_sync, decision_accuracy]
+        # metrics: [dir_mismatch, collisions, phase_sync, order_parameter, decision_accuracy]
         direction_mismatches = metrics[0]
         collisions = metrics[1]
         phase_synchronization = metrics[2]
-        decision_accuracy = metrics[3]
-
-        for agent in self.agents:
-            agent.get_neighbors(self.agents)
-            agent.get_nearest_goal(self.targets)
+        order_parameter = metrics[3]
+        decision_accuracy = metrics[4]
+
+        with self.timer.phase('neighbors'):
+            positions = np.array([agent.position for agent in self.agents], dtype=float).reshape(-1, 2)
+            self.collect_neighbors(positions)
+            nearest = self.nearest_targets(positions)
+            # natural frequencies of the whole swarm at once: heading away from each agent's goal
+            away = positions - self.target_array[nearest]
+            omega = np.arctan2(away[:, 1], away[:, 0])
+            for k, agent in enumerate(self.agents):
+                agent.goal_id = int(nearest[k])
+                agent.nearest_goal = self.target_array[nearest[k]]
+                agent.omega = omega[k]
 
         if time_count % self.consensus_period == 0:
-            print('Model has been updated at time: ', time_count)
-            print('Info: Phase (direction) of the Agent is being computed')
-
-            dir_mismatch_step = []
-            collision_step = []
-            phase_step = []
-
-            for agent in self.agents:
-                if agent.coupling_strength_K <= 1.0:
-                    agent.has_phase_synched = False
-                    agent.calculate_phase_difference()  # sets consensus_direction
-                    agent.coupling_strength_K = min(agent.coupling_strength_K + self.coupling_strength_increment, 1.0)
-
-                if agent.consensus_direction is not None:
-                    dir_mismatch_step.append(abs(agent.consensus_direction - agent.direction))
-                    collision_step.append(agent.compute_collision_count())
-                    # store per-agent scalar (you already compute .agent_phase; averaging will be done later)
-                    phase_step.append(agent.agent_phase)
-                    agent.direction = agent.consensus_direction
-
-            # decision-making accuracy
-            acc = _decision_accuracy(self.agents, self.env_params['TARGET_SIZE']+10)
-
-            direction_mismatches.append(dir_mismatch_step)
-            collisions.append(collision_step)
-            # Save per-step average (list-of-scalars acceptable in utils)
-            phase_synchronization.append(float(np.mean(phase_step)) if len(phase_step) else 0.0)
-            decision_accuracy.append([acc])
-
-            print('Info: Phase synchronized')
-            print('=' * 60)
-
-        for agent in self.agents:
-            if agent.has_phase_synched:
-                agent.update_direction(self.agents, self.swarm_params)
-                agent.color = NON_LATENT_AGENT_COLOR if agent.is_latent else LATENT_AGENT_COLOR
-            agent.move(hurdles)
-
-        return [direction_mismatches, collisions, phase_synchronization, decision_accuracy]
+            with self.timer.phase('consensus'):
+                print('Model has been updated at time: ', time_count)
+                print('Info: Phase (direction) of the Agent is being computed')
+
+                start_headings = self.headings()
+                coupling_K = np.array([agent.coupling_strength_K for agent in self.agents], dtype=float)
+                ramp = coupling_K <= 1.0
+                consensus = np.array([agent.consensus_direction for agent in self.agents], dtype=float)
+                # every agent's calculate_phase_difference, in agent order, from the CSR neighbor lists
+                consensus = sequential_phases(start_headings, omega, coupling_K, ramp, consensus, *self.neighbor_csr())
+                for agent, phase, ramped in zip(self.agents, consensus, ramp):
+                    if ramped:
+                        agent.agent_phase = phase
+                        agent.has_phase_synched = True
+                        agent.coupling_strength_K = min(agent.coupling_strength_K + self.coupling_strength_increment, 1.0)
+                    agent.consensus_direction = phase
+                    agent.direction = phase
+
+                with self.timer.phase('metrics'):
+                    dir_mismatch_step, collision_step, acc = self.checkpoint_metrics(
+                        start_headings, self.env_params['TARGET_SIZE'] + 10)
+                    # per-agent phases; averaged below
+                    phase_step = np.array([agent.agent_phase for agent in self.agents], dtype=float)
+
+                    direction_mismatches.append(dir_mismatch_step)
+                    collisions.append(collision_step)
+                    # Save per-step average (list-of-scalars acceptable in utils)
+                    phase_synchronization.append(float(np.mean(phase_step)) if len(phase_step) else 0.0)
+                    order_parameter.append(phase_order(phase_step))
+                    decision_accuracy.append([acc])
+
+                print('Info: Phase synchronized')
+                print('=' * 60)
+
+        with self.timer.phase('step_agents'):
+            aggregates = SwarmAggregates(self.agents, self.target_array)
+            for k, agent in enumerate(self.agents):
+                if agent.has_phase_synched:
+                    agent.update_direction(self.agents, self.swarm_params, aggregates)
+                    agent.color = NON_LATENT_AGENT_COLOR if agent.is_latent else LATENT_AGENT_COLOR
+                agent.move(hurdles)
+                aggregates.moved(k, agent.position, agent.direction)
+
+        return [direction_mismatches, collisions, phase_synchronization, order_parameter, decision_accuracy]
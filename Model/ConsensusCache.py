@@ -0,0 +1,191 @@
+from functools import lru_cache
+
+import numpy as np
+
+
+class NearestTargetCache:
+    """
+    Dirty tracking for the opinion (nearest target) part of the consensus layer.
+
+    Each distance to a target changes by at most the distance an agent has moved, so an agent's
+    nearest target cannot change before it has moved half the gap between its nearest and
+    second-nearest target distances since they were last measured. nearest() re-measures only the
+    agents that have moved that far (or were never measured) and returns the stored index for the
+    rest, which is exactly what a full recompute gives; near-ties are always re-measured.
+
+    targets: (T, 2), or (R, T, 2) per ensemble replicate with `group` giving each agent's replicate.
+    """
+    # relative slack on the stored gap, so float rounding of the distances can never flip a result
+    RTOL = 1e-9
+
+    def __init__(self, targets, group=None, field=None):
+        """field: optional NearestTargetField answering most re-measurements without distances."""
+        self.targets = np.asarray(targets, dtype=float)
+        self.group = group
+        self.field = field
+        self.index = None
+        self.anchor = None
+        self.margin = None
+        self.measured = 0  # agents re-measured by the last call
+
+    def _dirty(self, positions):
+        if self.index is None or len(self.index) != len(positions):
+            n = len(positions)
+            self.index = np.zeros(n, dtype=np.intp)
+            self.anchor = positions.copy()
+            self.margin = np.full(n, -np.inf)
+            return np.arange(n)
+        moved = positions - self.anchor
+        return np.flatnonzero(4.0 * np.einsum('nk,nk->n', moved, moved) >= np.square(np.maximum(self.margin, 0.0)))
+
+    def nearest(self, positions):
+        """Index of the nearest target of every agent (a fresh array, same as argmin over all distances)."""
+        positions = np.asarray(positions, dtype=float).reshape(-1, 2)
+        rows = self._dirty(positions)
+        self.measured = rows.size
+        if rows.size and self.field is not None:
+            index, margin = self.field.lookup(positions[rows])
+            settled = index >= 0
+            done = rows[settled]
+            self.index[done] = index[settled]
+            self.anchor[done] = positions[done]
+            self.margin[done] = margin[settled]
+            rows = rows[~settled]
+        if rows.size:
+            targets = self.targets if self.targets.ndim == 2 else self.targets[self.group[rows]]
+            dist = np.linalg.norm(targets - positions[rows, None, :], axis=-1)
+            self.index[rows] = np.argmin(dist, axis=1)
+            self.anchor[rows] = positions[rows]
+            if dist.shape[1] > 1:
+                two = np.partition(dist, 1, axis=1)[:, :2]
+                self.margin[rows] = two[:, 1] - two[:, 0] - self.RTOL * (1.0 + two[:, 1])
+            else:
+                self.margin[rows] = np.inf
+        return self.index.copy()
+
+
+class NearestTargetField:
+    """
+    Rasterized nearest-target lookup for static targets, built once per scenario.
+
+    The arena [0, width] x [0, height] is cut into square cells of side `cell`. Every distance
+    changes by at most half a cell diagonal between the cell center and any point of the cell, so
+    when the two nearest targets at the center are more than one diagonal apart, the nearer one is
+    strictly nearest everywhere in the cell. Such cells store that target together with a lower
+    bound on the nearest/second-nearest gap. Cells near a boundary between targets, and points
+    outside the arena, are left to an exact distance computation (lookup returns -1 for them).
+    """
+
+    def __init__(self, targets, width, height, cell):
+        self.targets = np.asarray(targets, dtype=float).reshape(-1, 2)
+        self.cell = float(cell)
+        self.shape = (int(width // self.cell) + 1, int(height // self.cell) + 1)
+        self.ids, self.gap = _rasterize(self.targets.tobytes(), len(self.targets), self.shape, self.cell)
+
+    def lookup(self, positions):
+        """Nearest target of each position (-1 where it needs an exact check) and a lower bound on its gap."""
+        positions = np.asarray(positions, dtype=float).reshape(-1, 2)
+        cells = np.floor(positions / self.cell)
+        inside = np.all((cells >= 0) & (cells < self.shape), axis=1)
+        index = np.full(len(positions), -1, dtype=np.intp)
+        gap = np.full(len(positions), -np.inf)
+        cx, cy = cells[inside].astype(np.intp).T
+        index[inside] = self.ids[cx, cy]
+        gap[inside] = self.gap[cx, cy]
+        return index, gap
+
+    @property
+    def settled_share(self):
+        return float(np.count_nonzero(self.ids >= 0)) / self.ids.size
+
+
+@lru_cache(maxsize=8)
+def _rasterize(target_bytes, num_targets, shape, cell, rows_per_chunk=256):
+    """(ids, gap) grids of NearestTargetField; cached so the models of one scenario share them."""
+    targets = np.frombuffer(target_bytes, dtype=float).reshape(num_targets, 2)
+    nx, ny = shape
+    ids = np.full(shape, -1, dtype=np.intp)
+    gap = np.full(shape, -np.inf)
+    if num_targets == 0:
+        return ids, gap
+    diagonal = cell * np.sqrt(2.0)
+    ys = (np.arange(ny) + 0.5) * cell
+    for x0 in range(0, nx, rows_per_chunk):
+        xs = (np.arange(x0, min(x0 + rows_per_chunk, nx)) + 0.5) * cell
+        centers = np.stack(np.meshgrid(xs, ys, indexing='ij'), axis=-1).reshape(-1, 2)
+        dist = np.linalg.norm(centers[:, None, :] - targets[None, :, :], axis=-1)
+        if num_targets == 1:
+            ids[x0:x0 + len(xs)] = 0
+            gap[x0:x0 + len(xs)] = np.inf
+            continue
+        two = np.partition(dist, 1, axis=1)[:, :2]
+        # worst-case gap anywhere in the cell, less the cache's rounding slack
+        bound = two[:, 1] - two[:, 0] - diagonal - NearestTargetCache.RTOL * (1.0 + two[:, 1] + diagonal)
+        settled = bound > 0
+        ids[x0:x0 + len(xs)] = np.where(settled, np.argmin(dist, axis=1), -1).reshape(len(xs), ny)
+        gap[x0:x0 + len(xs)] = np.where(settled, bound, -np.inf).reshape(len(xs), ny)
+    ids.setflags(write=False)
+    gap.setflags(write=False)
+    return ids, gap
+
+
+def make_nearest_cache(targets, params, group=None):
+    """NearestTargetCache, with a NearestTargetField when TARGET_GRID_CELL > 0 and all agents share the targets."""
+    env_params, _ = params
+    cell = float(env_params.get('TARGET_GRID_CELL', 0) or 0)
+    field = None
+    if cell > 0 and group is None:
+        field = NearestTargetField(targets, env_params['SCREEN_WIDTH'], env_params['SCREEN_HEIGHT'], cell)
+    return NearestTargetCache(targets, group, field)
+
+
+def _bits(values):
+    """Float values as their bit patterns, so -0.0 != 0.0 and NaN == NaN."""
+    return np.asarray(values, dtype=float).view(np.int64)
+
+
+class NeighborhoodCache:
+    """
+    Dirty tracking for the neighbor-heading part of the consensus layer.
+
+    An agent's consensus direction is the circular mean of its neighbors' headings, so it depends
+    only on its neighbor list (ids, in order) and on the headings it read from them. The cache keeps
+    both from the last time each agent was computed; dirty() flags the agents whose neighbor list or
+    any of whose neighbors' headings (bit for bit) has changed since, and the models skip the rest,
+    whose stored consensus direction is exactly what a recompute gives.
+    """
+
+    def __init__(self):
+        self.offsets = None
+        self.dst = None
+        self.seen = None  # per CSR entry: the heading its agent read from that neighbor
+
+    def dirty(self, offsets, dst, headings):
+        """Mask of the agents to recompute; offsets, dst: this checkpoint's CSR neighbor lists."""
+        n = len(offsets) - 1
+        current = np.asarray(headings, dtype=float)[dst]
+        if self.offsets is None or len(self.offsets) != n + 1:
+            stale = np.ones(n, dtype=bool)
+        else:
+            counts = np.diff(offsets)
+            stale = counts != np.diff(self.offsets)
+            src = np.repeat(np.arange(n), counts)
+            # entries of agents with as many neighbors as before, against the same slot of the old lists
+            same = np.flatnonzero(~stale[src])
+            rows = src[same]
+            old = self.offsets[rows] + (same - offsets[rows])
+            changed = (dst[same] != self.dst[old]) | (_bits(current[same]) != _bits(self.seen[old]))
+            stale[rows[changed]] = True
+        self.offsets, self.dst, self.seen = offsets, dst, current
+        return stale
+
+    def saw(self, i, headings):
+        """Sequential updates: agent i was recomputed from the current `headings`, not those passed to dirty()."""
+        lo, hi = self.offsets[i], self.offsets[i + 1]
+        self.seen[lo:hi] = np.asarray(headings, dtype=float)[self.dst[lo:hi]]
+
+    def turned(self, i, old, new, stale):
+        """Sequential updates: agent i went from heading `old` to `new`, so its neighbors after it are stale."""
+        if _bits(old) != _bits(new):
+            nbrs = self.dst[self.offsets[i]:self.offsets[i + 1]]
+            stale[nbrs[nbrs > i]] = True
@@ -0,0 +1,131 @@
+import random
+import numpy as np
+
+from Environment.SimMetrics import within, inside_any_target, order_parameters
+from Environment.SpatialIndex import draw_neighbors
+from Model.VectorizedModel import VectorizedMajorityRuleModel, VectorizedVoterModel, VectorizedKuramotoModel
+
+
+class EnsembleSwarm:
+    """
+    R replicate swarms of the same configuration (same agent count, target count and model, different
+    seeds) stepped together by the vectorized engine.
+
+    The replicates are stacked along a leading dimension and stored flattened: agent k of replicate r
+    is row r * N + k, and `group` holds each row's replicate index. Centre of mass, targets, hurdles
+    and metrics are taken per replicate; for the neighbor search each replicate is shifted along x so
+    that replicates never see each other. Every stage of a step therefore runs once for the whole
+    ensemble instead of once per replicate.
+
+    scenarios:  one [agent_pos, targets, hurdles] per replicate (as from generate_initial_conditions)
+    rng_states: optional per-replicate (random.getstate(), np.random.get_state()) taken right after the
+                scenario was generated; each replicate then starts exactly like a single seeded run.
+
+    Random draws after the initial state (the voter model's neighbor picks) come from one
+    np.random.RandomState per replicate, which continues the replicate's stream where its initial
+    state left it. A replicate therefore follows the single run with the same seeds draw for draw,
+    and does not depend on how many other replicates run next to it.
+
+    Mix in before one of the Vectorized*Model classes, e.g. EnsembleMajorityRuleModel.
+    """
+
+    def __init__(self, scenarios, params, rng_states=None, update_order='synchronous'):
+        if update_order != 'synchronous':
+            raise ValueError('Ensemble runs only support the synchronous update order')
+        sizes = {len(sc[0]) for sc in scenarios}
+        if len(sizes) != 1:
+            raise ValueError('All replicates must have the same number of agents')
+        self.replicates = len(scenarios)
+        self.agents_per_replicate = sizes.pop()
+        self.group = np.repeat(np.arange(self.replicates), self.agents_per_replicate)
+        self.rng_states = rng_states
+        self.replicate_rngs = []
+
+        env_params = params[0]
+        stride = env_params['SCREEN_WIDTH'] + env_params['SCREEN_HEIGHT'] + 4 * params[1]['INTERACTION_RADIUS']
+        self.index_offset = np.column_stack((self.group * float(stride), np.zeros(len(self.group))))
+
+        agent_pos = [pos for sc in scenarios for pos in sc[0]]
+        super().__init__(agent_pos, [sc[1] for sc in scenarios], params, update_order=update_order)
+
+    # ---------- per-replicate layout ----------
+
+    def _set_targets(self, targets):
+        self.targets = targets
+        self.target_array = np.array(targets, dtype=float).reshape(len(targets), -1, 2)
+        self.num_targets = self.target_array.shape[1]
+
+    def _draw_initial_state(self, agents=None):
+        n = self.agents_per_replicate
+        self.replicate_rngs = []
+        for r in range(self.replicates):
+            if self.rng_states is not None:
+                random.setstate(self.rng_states[r][0])
+                np.random.set_state(self.rng_states[r][1])
+            super()._draw_initial_state(range(r * n, (r + 1) * n))
+            rng = np.random.RandomState()
+            if self.rng_states is not None:
+                rng.set_state(np.random.get_state())
+            else:
+                rng.seed(np.random.randint(2 ** 32, dtype=np.uint64))
+            self.replicate_rngs.append(rng)
+
+    def _draw_neighbors(self):
+        """Neighbor picks with each replicate's draws taken from its own stream."""
+        with_neighbors = self.group[self.nbr_count > 0]
+        per_replicate = np.bincount(with_neighbors, minlength=self.replicates)
+        draws = np.concatenate([rng.random_sample(count) for rng, count in zip(self.replicate_rngs, per_replicate)])
+        return draw_neighbors(self.nbr_offsets, self.nbr_dst, draws)
+
+    def _per_replicate(self, values):
+        return np.asarray(values).reshape(self.replicates, self.agents_per_replicate, *np.shape(values)[1:])
+
+    def _center_of_mass(self):
+        return self._per_replicate(self.positions).mean(axis=1)[self.group]
+
+    def _goal_positions(self):
+        return self.target_array[self.group, self.goal_idx]
+
+    def _index_positions(self):
+        return self.positions + self.index_offset
+
+    def compute_repulsion_force(self, hurdles, rows=slice(None)):
+        """`hurdles` is one HurdleField for all replicates whose `group` holds each hurdle's replicate."""
+        hurdles.repulse(self.positions, self.repulsion_radius, agent_group=self.group)
+
+    # ---------- per-replicate metrics ----------
+
+    def decision_accuracy(self, target_radius):
+        """Per-replicate proportion of agents inside their selected target."""
+        chosen = self.goal_idx >= 0
+        inside = within(self.positions, self._goal_positions(), target_radius) & chosen
+        counted = self._per_replicate(chosen).sum(axis=1)
+        hits = self._per_replicate(inside).sum(axis=1)
+        return np.where(counted > 0, hits / np.maximum(counted, 1), 0.0)
+
+    def agents_reached(self, target_radius):
+        """Per-replicate number of agents inside any of their replicate's targets."""
+        inside = inside_any_target(self.positions, self.target_array[self.group], target_radius)
+        return self._per_replicate(inside).sum(axis=1)
+
+    def record_checkpoint(self, metrics, dir_mismatch_step, collision_step, target_radius, phase_step=None):
+        """Checkpoint entries are arrays with one per-replicate average each."""
+        with self.timer.phase('metrics'):
+            metrics[0].append(self._per_replicate(dir_mismatch_step).mean(axis=1))
+            metrics[1].append(self._per_replicate(collision_step).mean(axis=1))
+            if phase_step is not None:
+                metrics[2].append(self._per_replicate(phase_step).mean(axis=1))
+                metrics[3].append(order_parameters(self._per_replicate(phase_step)))
+            metrics[-1].append(self.decision_accuracy(target_radius))
+
+
+class EnsembleMajorityRuleModel(EnsembleSwarm, VectorizedMajorityRuleModel):
+    pass
+
+
+class EnsembleVoterModel(EnsembleSwarm, VectorizedVoterModel):
+    pass
+
+
+class EnsembleKuramotoModel(EnsembleSwarm, VectorizedKuramotoModel):
+    pass
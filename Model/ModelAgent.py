@@ -2,10 +2,13 @@ import random
 import numpy as np
 
 from Environment.SimAgent import Agent
+from Environment.SimKernels import kernels_enabled, sequential_phases as sequential_phases_kernel
+from Environment.SpatialIndex import sweep_levels
 
 
 class MajorityAgent(Agent):
     def __init__(self, pos, is_latent, bound_x, bound_y, interaction_radius, repulsion_radius, sep_dist, speed, opn_count):
+        """opn_count: this agent's row of the model's (agents x targets) opinion count array."""
         super().__init__(pos, speed, bound_x-10, bound_y-10, interaction_radius, repulsion_radius, sep_dist)
         self.is_latent = is_latent
         self.consensus_direction = 0.0
@@ -20,19 +23,17 @@ class MajorityAgent(Agent):
         return abs(self.consensus_direction - self.direction)
 
     def count_opinion_occurance(self, targets):
+        """Add the neighbors' current target IDs to the tally and take the most frequent (first on ties)."""
         # Guard against neighbors with unknown goals
-        for neighbor in self.neighbors:
-            if neighbor.nearest_goal is None:
-                continue
-            goal = tuple(neighbor.nearest_goal)
-            if goal not in self.opinion_count:
-                self.opinion_count[goal] = 0
-            self.opinion_count[goal] += 1
+        votes = [neighbor.goal_id for neighbor in self.neighbors if neighbor.goal_id >= 0]
+        if votes:
+            self.opinion_count += np.bincount(votes, minlength=len(self.opinion_count))
 
-        if self.opinion_count:
-            max_occurance = max(self.opinion_count, key=self.opinion_count.get)
-            if self.nearest_goal is None or tuple(self.nearest_goal) != max_occurance:
-                self.nearest_goal = np.array(max_occurance)
+        if len(self.opinion_count):
+            best = int(np.argmax(self.opinion_count))
+            if self.goal_id != best:
+                self.goal_id = best
+                self.nearest_goal = targets[best]
 
 
 class VoterAgent(Agent):
@@ -40,7 +41,9 @@ class VoterAgent(Agent):
         super().__init__(pos, speed, bound_x-10, bound_y-10, interaction_radius, repulsion_radius, sep_dist)
         self.is_latent = is_latent
         self.consensus_direction = 0.0
-        self.nearest_goal = random.choice(targets)
+        # same draw as random.choice(targets)
+        self.goal_id = random.randrange(len(targets))
+        self.nearest_goal = targets[self.goal_id]
         self.has_switched_opinion = False
 
     def display_agents(self, screen):
@@ -49,16 +52,61 @@ class VoterAgent(Agent):
     def switch_opinion(self):
         if self.neighbors:
             random_neighbor = random.choice(self.neighbors)
-            if random_neighbor.nearest_goal is None:
+            if random_neighbor.goal_id < 0:
                 return
-            if np.array_equal(self.nearest_goal, random_neighbor.nearest_goal):
+            if self.goal_id == random_neighbor.goal_id:
                 self.direction = self.consensus_direction
             else:
                 self.nearest_goal = random_neighbor.nearest_goal
+                self.goal_id = random_neighbor.goal_id
                 self.direction = random_neighbor.consensus_direction
             self.has_switched_opinion = True
 
 
+def _wrap_angle(x):
+    return np.arctan2(np.sin(x), np.cos(x))
+
+
+def sequential_phases(theta, omega, coupling_K, ramp, consensus, offsets, dst):
+    """
+    One checkpoint of the sequential Kuramoto models for the whole swarm: in index order, every
+    agent in `ramp` takes KuramotoAgent.calculate_phase_difference's step against its neighbors'
+    current headings (already updated for the neighbors before it), then turns to its consensus
+    direction. The sweep runs in wavefronts (sweep_levels); each takes the coupling of all its
+    agents at once from the sin/cos decomposition
+      sum_j sin(th_j - th_i) = cos th_i * sum_j sin th_j - sin th_i * sum_j cos th_j
+    over the CSR neighbor lists (offsets, dst). Returns the new consensus directions, which are
+    also the new headings. With the kernels on, a compiled loop visits the agents one by one instead.
+    """
+    if kernels_enabled():
+        return sequential_phases_kernel(theta, omega, coupling_K, ramp, consensus, offsets, dst)
+    theta = np.array(theta, dtype=float)
+    consensus = np.array(consensus, dtype=float)
+    K = np.maximum(np.asarray(coupling_K, dtype=float), 0.0)
+    counts = np.diff(offsets)
+    sin_t, cos_t = np.sin(theta), np.cos(theta)
+    level = sweep_levels(offsets, dst)
+    order = np.argsort(level, kind='stable')
+    for wave in np.split(order, np.flatnonzero(np.diff(level[order])) + 1):
+        rows = wave[ramp[wave]]
+        if rows.size:
+            nbr_count = counts[rows]
+            # this wave's CSR entries, row after row
+            first = np.repeat(offsets[rows] - (np.cumsum(nbr_count) - nbr_count), nbr_count)
+            nbrs = dst[first + np.arange(int(nbr_count.sum()), dtype=np.intp)]
+            row_of = np.repeat(np.arange(rows.size), nbr_count)
+            sin_sum = np.bincount(row_of, weights=sin_t[nbrs], minlength=rows.size)
+            cos_sum = np.bincount(row_of, weights=cos_t[nbrs], minlength=rows.size)
+            coupling = cos_t[rows] * sin_sum - sin_t[rows] * cos_sum
+            has_nbr = nbr_count > 0
+            coupling[has_nbr] /= nbr_count[has_nbr]
+            th = theta[rows]
+            consensus[rows] = _wrap_angle(th + 0.2 * (_wrap_angle(omega[rows] - th) + K[rows] * coupling))
+        theta[wave] = consensus[wave]
+        sin_t[wave], cos_t[wave] = np.sin(theta[wave]), np.cos(theta[wave])
+    return consensus
+
+
 class KuramotoAgent(Agent):
     def __init__(self, pos, is_latent, bound_x, bound_y, interaction_radius, repulsion_radius, sep_dist, speed):
         super().__init__(pos, speed, bound_x-10, bound_y-10, interaction_radius, repulsion_radius, sep_dist)
@@ -101,10 +149,12 @@ class KuramotoAgent(Agent):
     def _wrap_angle(self, x: float) -> float:
         return np.arctan2(np.sin(x), np.cos(x))
 
-    def get_nearest_goal(self, targets):
-        targets = np.array(targets)
-        distance_to_goal = np.linalg.norm(targets - self.position, axis=1)
-        nearest_goal_index = np.argmin(distance_to_goal)
-        self.nearest_goal = targets[nearest_goal_index]
+    def get_nearest_goal(self, targets, nearest_index=None):
+        if nearest_index is None:
+            targets = np.array(targets)
+            distance_to_goal = np.linalg.norm(targets - self.position, axis=1)
+            nearest_index = np.argmin(distance_to_goal)
+        self.goal_id = int(nearest_index)
+        self.nearest_goal = targets[nearest_index]
         direction = self.position - np.array(self.nearest_goal)
         self.omega = np.arctan2(direction[1], direction[0])
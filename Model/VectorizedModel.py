@@ -0,0 +1,528 @@
+import random
+import numpy as np
+
+from Environment.SimAgent import circ_mean, angle_diff, RunningCenter
+from Environment.SimHurdle import HurdleField
+from Environment.SimProfiler import NULL_TIMER
+from Environment.SimMetrics import collision_counts, decision_accuracy, order_parameter
+from Environment.SimKernels import kernels_enabled, flock_sums, phase_coupling
+from Environment.SpatialIndex import make_neighbor_index, draw_neighbors
+from Model.CollectiveDecisionModel import LATENT_AGENT_COLOR, NON_LATENT_AGENT_COLOR, UPDATE_ORDERS
+from Model.ConsensusCache import NeighborhoodCache, make_nearest_cache
+from Model.ModelAgent import sequential_phases
+
+
+class VectorizedSwarm:
+    """
+    Structure-of-arrays counterpart of the per-agent model classes.
+
+    The whole swarm lives in NumPy arrays (positions, headings, chosen target index, latent flag,
+    coupling K, ...). Initial conditions consume the global `random` / `np.random` streams in the
+    same order as the object models, so a seeded run starts from an identical state.
+
+    update_order:
+      'sequential'  - (default) agents are processed one after another in index order, each seeing
+                      the updates of the agents before it, exactly like the object models; results
+                      match the object engine within float tolerance (self-check engine-agreement).
+      'synchronous' - every stage is applied to all agents at once from the state at the start of
+                      the stage. This is the fast path, but it is a different update rule, not the
+                      object models: agents steer by positions a whole step old, and swarms end up
+                      systematically behind the sequential ones.
+    """
+    Name = None
+    timer = NULL_TIMER  # SimEnv hands in its PhaseTimer
+    # arrays that make up the swarm state (snapshots); the neighbor graph is rebuilt every step
+    STATE_FIELDS = ('positions', 'directions', 'consensus_direction', 'goal_idx', 'is_latent', 'active', 'colors')
+
+    def __init__(self, agent_pos, targets, params, update_order='sequential'):
+        if update_order not in UPDATE_ORDERS:
+            raise ValueError(f'Unknown update_order: {update_order}')
+        self.update_order = update_order
+        self.env_params, self.swarm_params = params
+        self.consensus_period = self.swarm_params['CONSENSUS_PERIOD']
+        self._set_targets(targets)
+
+        n = len(agent_pos)
+        self.num_agents = n
+        self.positions = np.array(agent_pos, dtype=float).reshape(-1, 2)
+        self.directions = np.zeros(n, dtype=float)
+        self.consensus_direction = np.zeros(n, dtype=float)
+        self.goal_idx = np.full(n, -1, dtype=np.intp)
+        self.is_latent = np.zeros(n, dtype=bool)
+        self.active = np.zeros(n, dtype=bool)
+        self.colors = np.tile(np.array(LATENT_AGENT_COLOR, dtype=np.uint8), (n, 1))
+
+        self.speed = self.swarm_params['AGENT_SPEED']
+        self.interaction_radius = self.swarm_params['INTERACTION_RADIUS']
+        self.separation_distance = self.swarm_params['SEPERATION_DISTANCE']
+        self.repulsion_radius = self.swarm_params['REPULSION_RADIUS']
+        self.bounds = np.array([self.env_params['SCREEN_WIDTH'] - 10, self.env_params['SCREEN_HEIGHT'] - 10],
+                               dtype=float)
+        self.agent_radius = 10
+
+        # Per-step neighbor graph (CSR-ordered edge list)
+        self.neighbor_index = make_neighbor_index(self.swarm_params)
+        self.nbr_src = np.empty(0, dtype=np.intp)
+        self.nbr_dst = np.empty(0, dtype=np.intp)
+        self.nbr_dist = np.empty(0, dtype=float)
+        self.nbr_count = np.zeros(n, dtype=np.intp)
+        self.nbr_offsets = np.zeros(n + 1, dtype=np.intp)
+
+        # opinions are only re-measured for agents that moved far enough to change them
+        self.nearest_cache = make_nearest_cache(self.target_array, params, getattr(self, 'group', None))
+        # sequential consensus directions are only recomputed for agents whose neighborhood changed
+        self.neighborhood_cache = NeighborhoodCache()
+
+        self._draw_initial_state()
+
+    @property
+    def sequential(self):
+        return self.update_order == 'sequential'
+
+    # ---------- snapshots ----------
+
+    def get_state(self):
+        """Copies of the STATE_FIELDS arrays, keyed by name."""
+        return {name: np.array(getattr(self, name)) for name in self.STATE_FIELDS}
+
+    def set_state(self, state):
+        for name in self.STATE_FIELDS:
+            current = getattr(self, name)
+            value = np.asarray(state[name], dtype=current.dtype)
+            if value.shape != current.shape:
+                raise ValueError(f'Snapshot {name} has shape {value.shape}, this swarm {current.shape}')
+            setattr(self, name, value.copy())
+        self.neighbor_index = make_neighbor_index(self.swarm_params)
+        self.neighborhood_cache = NeighborhoodCache()
+
+    def _set_targets(self, targets):
+        self.targets = targets
+        self.target_array = np.array(targets, dtype=float).reshape(-1, 2)
+        self.num_targets = len(self.target_array)
+
+    def _draw_initial_state(self, agents=None):
+        """Latent flags and headings (plus _init_agent) drawn in the same RNG order as the object models."""
+        for k in (range(self.num_agents) if agents is None else agents):
+            self.is_latent[k] = random.choice([True, False])
+            self.directions[k] = np.random.uniform(0, 2 * np.pi)
+            self._init_agent(k)
+
+    def _init_agent(self, k):
+        """Per-agent initialisation hook, called in the same RNG order as the object models."""
+        pass
+
+    def _center_of_mass(self):
+        return self.positions.mean(axis=0)
+
+    def _goal_positions(self):
+        return self.target_array[self.goal_idx]
+
+    # ---------- neighbor graph ----------
+
+    def get_neighbors(self):
+        self.neighbor_index.update(self._index_positions())
+        self.nbr_src, self.nbr_dst, self.nbr_dist = self.neighbor_index.pairs(self.interaction_radius)
+        self.nbr_count = np.bincount(self.nbr_src, minlength=self.num_agents)
+        self.nbr_offsets = np.concatenate(([0], np.cumsum(self.nbr_count)))
+
+    def _index_positions(self):
+        """Coordinates handed to the neighbor index."""
+        return self.positions
+
+    def _draw_neighbors(self):
+        """(agents, one uniformly drawn neighbor of each) for the agents that have neighbors."""
+        return draw_neighbors(self.nbr_offsets, self.nbr_dst)
+
+    def neighbors_of(self, i):
+        return self.nbr_dst[self.nbr_offsets[i]:self.nbr_offsets[i + 1]]
+
+    def _neighbor_sum(self, values):
+        return np.bincount(self.nbr_src, weights=values, minlength=self.num_agents)
+
+    def _neighbor_circ_mean(self):
+        """Circular mean of the neighbors' headings (valid where nbr_count > 0)."""
+        nbr_dir = self.directions[self.nbr_dst]
+        return np.arctan2(self._neighbor_sum(np.sin(nbr_dir)), self._neighbor_sum(np.cos(nbr_dir)))
+
+    def _agent_average_direction(self, i):
+        """Sequential counterpart of Agent.calculate_average_direction for agent i."""
+        nbrs = self.neighbors_of(i)
+        if nbrs.size:
+            avg_direction = circ_mean(self.directions[nbrs])
+            self.consensus_direction[i] = np.arctan2(np.sin(avg_direction), np.cos(avg_direction))
+
+    def stale_neighborhoods(self):
+        """Agents whose neighbor list or neighbors' headings changed since their consensus direction was computed."""
+        return self.neighborhood_cache.dirty(self.nbr_offsets, self.nbr_dst, self.directions)
+
+    def calculate_average_direction(self):
+        if self.sequential:
+            stale = self.stale_neighborhoods()
+            for i in np.flatnonzero(stale):
+                self._agent_average_direction(i)
+            self.timer.count('consensus_recomputed', int(np.count_nonzero(stale)))
+            return
+        has_nbr = self.nbr_count > 0
+        self.consensus_direction[has_nbr] = self._neighbor_circ_mean()[has_nbr]
+
+    def nearest_target_index(self):
+        nearest = self.nearest_cache.nearest(self.positions)
+        self.timer.count('opinions_measured', self.nearest_cache.measured)
+        return nearest
+
+    def compute_opinion(self):
+        return self.nearest_target_index()
+
+    # ---------- metrics ----------
+
+    def record_checkpoint(self, metrics, dir_mismatch_step, collision_step, target_radius, phase_step=None):
+        """Append one consensus checkpoint to the metric lists handed in by SimEnv."""
+        with self.timer.phase('metrics'):
+            metrics[0].append(dir_mismatch_step)
+            metrics[1].append(collision_step)
+            if phase_step is not None:
+                metrics[2].append(float(np.mean(phase_step)) if len(phase_step) else 0.0)
+                metrics[3].append(order_parameter(phase_step))
+            metrics[-1].append([self.decision_accuracy(target_radius)])
+
+    def compute_collision_count(self):
+        return collision_counts(self.nbr_src, self.nbr_dist, self.num_agents, self.separation_distance)
+
+    def decision_accuracy(self, target_radius):
+        return decision_accuracy(self.positions, self._goal_positions(), self.goal_idx >= 0, target_radius)
+
+    # ---------- forces and movement ----------
+
+    def _set_color(self, mask):
+        self.colors[mask] = np.where(self.is_latent[mask, None],
+                                     np.array(NON_LATENT_AGENT_COLOR, dtype=np.uint8),
+                                     np.array(LATENT_AGENT_COLOR, dtype=np.uint8))
+
+    def update_direction(self, mask):
+        """Flocking + target forces for every agent in `mask`, all evaluated on the same state."""
+        if not np.any(mask):
+            return
+        sp = self.swarm_params
+        pos = self.positions
+        has_nbr = self.nbr_count > 0
+        center_of_mass = self._center_of_mass()
+
+        goal = self._goal_positions()
+        com_force = (goal - center_of_mass) * 0.04
+        to_goal = goal - pos
+        ind_force = 0.02 * (np.arctan2(to_goal[:, 1], to_goal[:, 0]) - self.directions)
+        total = com_force * 0.05 + ind_force[:, None] * 0.03
+
+        if kernels_enabled():
+            sin_sum, cos_sum, separation = flock_sums(pos, self.directions, self.nbr_src, self.nbr_dst,
+                                                      self.nbr_dist, self.separation_distance)
+            nbr_mean = np.arctan2(sin_sum, cos_sum)
+        else:
+            nbr_mean = self._neighbor_circ_mean()
+            close = self.nbr_dist < self.separation_distance
+            sep_vec = pos[self.nbr_src[close]] - pos[self.nbr_dst[close]]
+            separation = np.column_stack((
+                np.bincount(self.nbr_src[close], weights=sep_vec[:, 0], minlength=self.num_agents),
+                np.bincount(self.nbr_src[close], weights=sep_vec[:, 1], minlength=self.num_agents)))
+        dtheta = angle_diff(nbr_mean, self.directions)
+        turned = self.directions + dtheta
+        alignment = np.column_stack((np.cos(turned) - np.cos(self.directions),
+                                     np.sin(turned) - np.sin(self.directions)))
+        cohesion = center_of_mass - pos
+        flock = (alignment * sp['ALIGNMENT_STRENGTH'] + separation * sp['SEPERATION_STRENGTH']
+                 + cohesion * sp['ATTRACT_STRENGTH'])
+        total = total + np.where(has_nbr[:, None], flock, 0.0)
+
+        new_dir = np.arctan2(total[:, 1], total[:, 0])
+        self.directions = np.where(mask, new_dir, self.directions)
+        self.is_latent = np.where(mask, ~has_nbr, self.is_latent)
+        self._set_color(mask)
+
+    def _agent_direction(self, i, center_of_mass):
+        """Sequential counterpart of Agent.update_direction for agent i."""
+        sp = self.swarm_params
+        pos = self.positions
+        p, d = pos[i], self.directions[i]
+        goal = self.target_array[self.goal_idx[i]]
+        position_diff = goal - p
+        target_force = (goal - center_of_mass) * 0.04 * 0.05 + \
+            0.02 * (np.arctan2(position_diff[1], position_diff[0]) - d) * 0.03
+
+        nbrs = self.neighbors_of(i)
+        if nbrs.size:
+            dtheta = angle_diff(circ_mean(self.directions[nbrs]), d)
+            alignment = np.array([np.cos(d + dtheta), np.sin(d + dtheta)]) - np.array([np.cos(d), np.sin(d)])
+            nbr_pos = pos[nbrs]
+            too_close = np.linalg.norm(p - nbr_pos, axis=1) < self.separation_distance
+            separation = np.sum(p - nbr_pos[too_close], axis=0) if np.any(too_close) else np.zeros(2)
+            total = (alignment * sp['ALIGNMENT_STRENGTH'] + separation * sp['SEPERATION_STRENGTH']
+                     + (center_of_mass - p) * sp['ATTRACT_STRENGTH'] + target_force)
+        else:
+            total = target_force
+        self.directions[i] = np.arctan2(total[1], total[0])
+        self.is_latent[i] = nbrs.size == 0
+
+    def compute_repulsion_force(self, hurdles, rows=slice(None)):
+        """`hurdles` is a HurdleField (a list of Hurdle objects is converted)."""
+        if not isinstance(hurdles, HurdleField):
+            hurdles = HurdleField.from_hurdles(hurdles)
+        pos = self.positions[rows].reshape(-1, 2)
+        hurdles.repulse(pos, self.repulsion_radius)
+        self.positions[rows] = pos.reshape(self.positions[rows].shape)
+
+    def move(self, hurdles):
+        self.positions += self.speed * np.column_stack((np.cos(self.directions), np.sin(self.directions)))
+        self.compute_repulsion_force(hurdles)
+        np.clip(self.positions, 0, self.bounds, out=self.positions)
+
+    def _move_agent(self, i, hurdles):
+        d = self.directions[i]
+        self.positions[i] += self.speed * np.array([np.cos(d), np.sin(d)])
+        self.compute_repulsion_force(hurdles, rows=i)
+        self.positions[i] = np.clip(self.positions[i], 0, self.bounds)
+
+    def step_agents(self, mask, hurdles):
+        """Direction update for agents in `mask`, then movement of every agent."""
+        if not self.sequential:
+            with self.timer.phase('forces'):
+                self.update_direction(mask)
+            with self.timer.phase('move'):
+                self.move(hurdles)
+            return
+        with self.timer.phase('step_agents'):
+            # exact running center of mass, as SwarmAggregates keeps it for the object models
+            center = RunningCenter(self.positions)
+            for i in range(self.num_agents):
+                if mask[i]:
+                    self._agent_direction(i, center.center)
+                    self._set_color(i)
+                old = self.positions[i].copy()
+                self._move_agent(i, hurdles)
+                center.moved(old, self.positions[i])
+
+    def draw_agents(self, screen):
+        import pygame
+        for (x, y), color in zip(self.positions.astype(int), self.colors):
+            pygame.draw.circle(screen, tuple(int(c) for c in color), (int(x), int(y)), self.agent_radius)
+
+
+class VectorizedMajorityRuleModel(VectorizedSwarm):
+    Name = 'Majority Model'
+    STATE_FIELDS = VectorizedSwarm.STATE_FIELDS + ('opinion_count',)
+
+    def __init__(self, agent_pos, targets, params, update_order='sequential'):
+        super().__init__(agent_pos, targets, params, update_order)
+        self.opinion_count = np.zeros((self.num_agents, self.num_targets), dtype=np.int64)
+
+    def count_opinion_occurance(self):
+        if self.sequential:
+            for i in range(self.num_agents):
+                nbr_goals = self.goal_idx[self.neighbors_of(i)]
+                self.opinion_count[i] += np.bincount(nbr_goals[nbr_goals >= 0],
+                                                     minlength=self.opinion_count.shape[1])
+                self.goal_idx[i] = np.argmax(self.opinion_count[i])
+            return
+        # the whole swarm's votes in one bincount over flat (agent, target ID) cells
+        votes = self.goal_idx[self.nbr_dst]
+        valid = votes >= 0
+        cells = self.nbr_src[valid] * self.num_targets + votes[valid]
+        self.opinion_count += np.bincount(cells, minlength=self.opinion_count.size).reshape(self.opinion_count.shape)
+        self.goal_idx = np.argmax(self.opinion_count, axis=1)
+
+    def update(self, time_count, hurdles, metrics):
+        # metrics: [dir_mismatch, collisions, decision_accuracy]
+        direction_mismatches = metrics[0]
+        collisions = metrics[1]
+        decision_accuracy = metrics[2]
+
+        with self.timer.phase('neighbors'):
+            self.get_neighbors()
+
+        if time_count % self.consensus_period == 0:
+            with self.timer.phase('consensus'):
+                print('Model has been updated at time: ', time_count)
+                print('Info: Opinion occurrence is being counted by agents')
+
+                self.calculate_average_direction()
+                self.goal_idx = self.compute_opinion()
+                dir_mismatch_step = np.abs(self.consensus_direction - self.directions)
+                collision_step = self.compute_collision_count()
+
+                self.count_opinion_occurance()
+                self.directions = self.consensus_direction.copy()
+                self.active[:] = True
+
+                self.record_checkpoint(metrics, dir_mismatch_step, collision_step, self.env_params['TARGET_SIZE'])
+
+                print('Info: Majority opinion selected')
+                print('=' * 60)
+
+        self.step_agents(self.active, hurdles)
+
+        return [direction_mismatches, collisions, decision_accuracy]
+
+
+class VectorizedVoterModel(VectorizedSwarm):
+    Name = 'Voter Model'
+
+    def _init_agent(self, k):
+        # same draw as random.choice(targets) in VoterAgent
+        self.goal_idx[k] = random.randrange(self.num_targets)
+
+    def switch_opinion(self):
+        """Each agent with neighbors copies the opinion of one uniformly drawn neighbor (synchronously)."""
+        agents, chosen = self._draw_neighbors()
+        if agents.size == 0:
+            return
+
+        same = self.goal_idx[chosen] == self.goal_idx[agents]
+        new_dir = np.where(same, self.consensus_direction[agents], self.consensus_direction[chosen])
+        self.goal_idx[agents] = self.goal_idx[chosen]
+        self.directions[agents] = new_dir
+        self.active[agents] = True
+
+    def _agent_switch_opinion(self, i):
+        nbrs = self.neighbors_of(i)
+        if nbrs.size:
+            j = random.choice(nbrs)
+            if self.goal_idx[i] == self.goal_idx[j]:
+                self.directions[i] = self.consensus_direction[i]
+            else:
+                self.goal_idx[i] = self.goal_idx[j]
+                self.directions[i] = self.consensus_direction[j]
+            self.active[i] = True
+
+    def update(self, time_count, hurdles, metrics):
+        # metrics: [dir_mismatch, collisions, decision_accuracy]
+        direction_mismatches = metrics[0]
+        collisions = metrics[1]
+        decision_accuracy = metrics[2]
+
+        with self.timer.phase('neighbors'):
+            self.get_neighbors()
+
+        if time_count % self.consensus_period == 0:
+            with self.timer.phase('consensus'):
+                print('Model has been updated at time: ', time_count)
+                print('Info: Randomly select a neighbor agent to switch opinion')
+
+                nearest = self.compute_opinion()
+                collision_step = self.compute_collision_count()
+                if self.sequential:
+                    dir_mismatch_step = np.zeros(self.num_agents)
+                    stale = self.stale_neighborhoods()
+                    for i in range(self.num_agents):
+                        if stale[i]:
+                            self._agent_average_direction(i)
+                            self.neighborhood_cache.saw(i, self.directions)
+                        self.goal_idx[i] = nearest[i]
+                        dir_mismatch_step[i] = abs(self.consensus_direction[i] - self.directions[i])
+                        heading = self.directions[i]
+                        self._agent_switch_opinion(i)
+                        self.neighborhood_cache.turned(i, heading, self.directions[i], stale)
+                    self.timer.count('consensus_recomputed', int(np.count_nonzero(stale)))
+                else:
+                    self.calculate_average_direction()
+                    self.goal_idx = nearest
+                    dir_mismatch_step = np.abs(self.consensus_direction - self.directions)
+                    self.switch_opinion()
+
+                self.record_checkpoint(metrics, dir_mismatch_step, collision_step, self.env_params['TARGET_SIZE'])
+
+                print('Info: Opinion switched')
+                print('=' * 60)
+
+        self.step_agents(self.active, hurdles)
+
+        return [direction_mismatches, collisions, decision_accuracy]
+
+
+class VectorizedKuramotoModel(VectorizedSwarm):
+    Name = 'Kuramoto Model'
+    STATE_FIELDS = VectorizedSwarm.STATE_FIELDS + ('coupling_strength_K', 'omega', 'agent_phase')
+
+    def __init__(self, agent_pos, targets, params, update_order='sequential'):
+        super().__init__(agent_pos, targets, params, update_order)
+        self.coupling_strength_increment = self.swarm_params['K_INCREMENT']
+        self.coupling_strength_K = np.zeros(self.num_agents, dtype=float)
+        self.omega = np.zeros(self.num_agents, dtype=float)
+        self.agent_phase = np.zeros(self.num_agents, dtype=float)
+        self.active[:] = True
+
+    def get_nearest_goal(self):
+        self.goal_idx = self.nearest_target_index()
+        away = self.positions - self._goal_positions()
+        self.omega = np.arctan2(away[:, 1], away[:, 0])
+
+    @staticmethod
+    def _wrap_angle(x):
+        return np.arctan2(np.sin(x), np.cos(x))
+
+    def calculate_phase_difference(self, mask):
+        """
+        Discrete Kuramoto-style phase update for all agents in `mask`:
+          dθ_i/dt = (wrap(ω_i - θ_i)) + K * (1/|N_i|) * Σ_j sin(θ_j - θ_i)
+        """
+        theta = self.directions
+        phase_step = 0.2
+        K = np.maximum(self.coupling_strength_K, 0.0)
+        goal_turn = self._wrap_angle(self.omega - theta)
+
+        if kernels_enabled():
+            coupling = phase_coupling(theta, self.nbr_src, self.nbr_dst)
+        else:
+            # sum_j sin(θ_j - θ_i) = cos θ_i * sum_j sin θ_j - sin θ_i * sum_j cos θ_j: two sparse
+            # adjacency products over per-agent sines and cosines instead of one sine per edge
+            sin_t, cos_t = np.sin(theta), np.cos(theta)
+            coupling = (cos_t * self._neighbor_sum(sin_t[self.nbr_dst])
+                        - sin_t * self._neighbor_sum(cos_t[self.nbr_dst]))
+        has_nbr = self.nbr_count > 0
+        coupling[has_nbr] /= self.nbr_count[has_nbr]
+
+        theta_next = self._wrap_angle(theta + phase_step * (goal_turn + K * coupling))
+        self.agent_phase = np.where(mask, theta_next, self.agent_phase)
+        self.consensus_direction = np.where(mask, theta_next, self.consensus_direction)
+
+    def update(self, time_count, hurdles, metrics):
+        # metrics: [dir_mismatch, collisions, phase_sync, order_parameter, decision_accuracy]
+        direction_mismatches = metrics[0]
+        collisions = metrics[1]
+        phase_synchronization = metrics[2]
+        order_parameter = metrics[3]
+        decision_accuracy = metrics[4]
+
+        with self.timer.phase('neighbors'):
+            self.get_neighbors()
+            self.get_nearest_goal()
+
+        if time_count % self.consensus_period == 0:
+            with self.timer.phase('consensus'):
+                print('Model has been updated at time: ', time_count)
+                print('Info: Phase (direction) of the Agent is being computed')
+
+                ramp = self.coupling_strength_K <= 1.0
+                collision_step = self.compute_collision_count()
+                if self.sequential:
+                    self.consensus_direction = sequential_phases(self.directions, self.omega, self.coupling_strength_K,
+                                                                 ramp, self.consensus_direction,
+                                                                 self.nbr_offsets, self.nbr_dst)
+                    self.agent_phase = np.where(ramp, self.consensus_direction, self.agent_phase)
+                    dir_mismatch_step = np.abs(self.consensus_direction - self.directions)
+                    self.directions = self.consensus_direction.copy()
+                else:
+                    self.calculate_phase_difference(ramp)
+                    dir_mismatch_step = np.abs(self.consensus_direction - self.directions)
+                    self.directions = self.consensus_direction.copy()
+                self.coupling_strength_K = np.where(
+                    ramp, np.minimum(self.coupling_strength_K + self.coupling_strength_increment, 1.0),
+                    self.coupling_strength_K)
+
+                self.record_checkpoint(metrics, dir_mismatch_step, collision_step, self.env_params['TARGET_SIZE'] + 10,
+                                       phase_step=self.agent_phase)
+
+                print('Info: Phase synchronized')
+                print('=' * 60)
+
+        self.step_agents(self.active, hurdles)
+
+        return [direction_mismatches, collisions, phase_synchronization, order_parameter, decision_accuracy]
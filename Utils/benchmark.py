@@ -0,0 +1,95 @@
+import json
+import sys
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+
+DEFAULT_AGENTS = (10, 100, 1000, 10000)
+# sequential updates (the object engine, or the vector engine's default order) manage a few steps/s
+# at 1,000 agents, so their default matrix stops there
+DEFAULT_SEQUENTIAL_AGENTS = (10, 100, 1000)
+DEFAULT_TARGETS = (2, 10, 100)
+MODEL_KEYS = ('majority', 'voter', 'kuramoto')
+
+
+def default_agents(engine, update_order):
+    """Full range only for the vector engine's synchronous fast path."""
+    return DEFAULT_AGENTS if (engine, update_order) == ('vector', 'synchronous') else DEFAULT_SEQUENTIAL_AGENTS
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far (MB), or None where unavailable."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def case_key(case):
+    return (case['model_key'], case['engine'], case['update_order'],
+            case['agents'], case['targets'], case['steps'])
+
+
+def save_results(path, results, **meta):
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump({**meta, 'cases': results}, f, indent=1)
+    return path
+
+
+def load_results(path):
+    with open(path) as f:
+        return json.load(f)['cases']
+
+
+def compare_to_baseline(results, baseline, threshold=0.10):
+    """
+    Match cases by (model, engine, update order, agents, targets, steps) and flag a regression when
+    steps/sec drops, or peak memory grows, by more than `threshold` (a fraction) against the baseline.
+    Returns a list of rows: (case, baseline case or None, speed ratio, memory ratio, regressed).
+    """
+    by_key = {case_key(b): b for b in baseline}
+    rows = []
+    for case in results:
+        base = by_key.get(case_key(case))
+        if base is None:
+            rows.append((case, None, None, None, False))
+            continue
+        speed = case['steps_per_s'] / base['steps_per_s'] if base['steps_per_s'] else None
+        memory = None
+        if case.get('peak_rss_mb') and base.get('peak_rss_mb'):
+            memory = case['peak_rss_mb'] / base['peak_rss_mb']
+        regressed = (speed is not None and speed < 1.0 - threshold) or \
+                    (memory is not None and memory > 1.0 + threshold)
+        rows.append((case, base, speed, memory, regressed))
+    return rows
+
+
+def format_results(results):
+    """One line per case: steps/sec, peak memory and the three most expensive phases."""
+    lines = [f"{'model':<10}{'engine':<8}{'agents':>8}{'targets':>9}{'steps/s':>12}{'peak MB':>10}  top phases"]
+    for case in results:
+        phases = sorted(case['phases'].items(), key=lambda p: p[1]['total_s'], reverse=True)[:3]
+        top = ', '.join(f"{name} {100 * p['share']:.0f}%" for name, p in phases)
+        peak = case.get('peak_rss_mb')
+        lines.append(f"{case['model_key']:<10}{case['engine']:<8}{case['agents']:>8}{case['targets']:>9}"
+                     f"{case['steps_per_s']:>12.1f}{(peak or 0.0):>10.1f}  {top}")
+    return '\n'.join(lines)
+
+
+def format_comparison(rows, threshold):
+    lines = [f"Baseline comparison (threshold {100 * threshold:.0f}%):"]
+    for case, base, speed, memory, regressed in rows:
+        label = f"{case['model_key']:<10}{case['engine']:<8}A={case['agents']:<6}T={case['targets']:<5}"
+        if base is None:
+            lines.append(f"  {label} no baseline")
+            continue
+        speed_txt = f"{speed:.2f}x" if speed is not None else 'n/a'
+        memory_txt = f"{memory:.2f}x" if memory is not None else 'n/a'
+        lines.append(f"  {label} speed {speed_txt}  memory {memory_txt}{'  REGRESSION' if regressed else ''}")
+    return '\n'.join(lines)
@@ -0,0 +1,353 @@
+import contextlib
+import inspect
+import io
+import math
+import random
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from Environment.SimAgent import Agent, SwarmAggregates, angle_diff, circ_mean
+from Environment.SimEnv import SimEnv
+from Environment.SimHurdle import HurdleField
+from Environment.SpatialIndex import CellList, VerletList, csr_offsets
+from Model.ConsensusCache import NearestTargetCache, NearestTargetField, NeighborhoodCache
+from Model.ModelAgent import KuramotoAgent, sequential_phases
+from Utils.config import set_params
+from Utils.utils import make_scenario, scenario_as_tuples
+
+
+# Self-checks of the exactness claims behind the fast paths: each one compares a shortcut with the
+# computation it replaces and raises CheckFailed on the first difference. Run with --self-check.
+
+
+class CheckFailed(AssertionError):
+    pass
+
+
+def _expect(ok, message):
+    if not ok:
+        raise CheckFailed(message)
+
+
+def nearest_target_cache(seed=0, trials=200, steps=20):
+    """NearestTargetCache against a full argmin, with ties and duplicates."""
+    rng = np.random.default_rng(seed)
+    width, height = 1200.0, 700.0
+    for trial in range(trials):
+        num_targets = int(rng.integers(1, 12))
+        targets = rng.uniform((0, 0), (width, height), size=(num_targets, 2))
+        if num_targets > 1:
+            # a duplicate and a near-duplicate of target 0: exact and near ties everywhere
+            targets[-1] = targets[0]
+            targets[1] = targets[0] + rng.normal(scale=1e-7, size=2)
+        cache = NearestTargetCache(targets)
+        positions = rng.uniform((0, 0), (width, height), size=(64, 2))
+        positions[:8] = targets[rng.integers(0, num_targets, 8)] + rng.normal(scale=1e-3, size=(8, 2))
+        for _ in range(steps):
+            expected = np.argmin(np.linalg.norm(targets - positions[:, None, :], axis=-1), axis=1)
+            got = cache.nearest(positions)
+            _expect(np.array_equal(got, expected),
+                    f'trial {trial}: {int(np.count_nonzero(got != expected))} agents off the argmin')
+            positions += rng.normal(scale=rng.choice([0.01, 1.0, 10.0]), size=positions.shape)
+
+    # per-replicate targets of an ensemble
+    targets = rng.uniform((0, 0), (width, height), size=(3, 5, 2))
+    group = np.repeat(np.arange(3), 40)
+    cache = NearestTargetCache(targets, group=group)
+    positions = rng.uniform((0, 0), (width, height), size=(len(group), 2))
+    for _ in range(steps):
+        expected = np.argmin(np.linalg.norm(targets[group] - positions[:, None, :], axis=-1), axis=1)
+        _expect(np.array_equal(cache.nearest(positions), expected), 'grouped cache off the argmin')
+        positions += rng.normal(scale=2.0, size=positions.shape)
+    return f'{trials} target layouts x {steps} steps'
+
+
+def nearest_target_field(seed=0, trials=200, steps=20):
+    """NearestTargetCache with the lookup grid against a full argmin, next to ties and duplicates."""
+    rng = np.random.default_rng(seed)
+    width, height = 1200.0, 700.0
+    for trial in range(trials):
+        num_targets = int(rng.integers(1, 12))
+        targets = rng.uniform((0, 0), (width, height), size=(num_targets, 2))
+        if num_targets > 1:
+            targets[-1] = targets[0]
+            targets[1] = targets[0] + rng.normal(scale=1e-7, size=2)
+        field = NearestTargetField(targets, width, height, cell=float(rng.choice([2.0, 5.0, 20.0])))
+        cache = NearestTargetCache(targets, field=field)
+        positions = rng.uniform((0, 0), (width, height), size=(64, 2))
+        # agents right next to targets, where the lookup grid cannot settle the nearest one
+        positions[:8] = targets[rng.integers(0, num_targets, 8)] + rng.normal(scale=1e-3, size=(8, 2))
+        for _ in range(steps):
+            expected = np.argmin(np.linalg.norm(targets - positions[:, None, :], axis=-1), axis=1)
+            got = cache.nearest(positions)
+            _expect(np.array_equal(got, expected),
+                    f'trial {trial}: {int(np.count_nonzero(got != expected))} agents off the argmin')
+            positions += rng.normal(scale=rng.choice([0.01, 1.0, 10.0]), size=positions.shape)
+    return f'{trials} target layouts x {steps} steps'
+
+
+def verlet_matches_cell_list(seed=0, agents=400, steps=200, radius=30.0, skin=6.0):
+    """
+    VerletList pairs and per-point neighbors against a CellList rebuilt every step. Moves are small,
+    so most steps reuse the list, with an occasional jump of one agent past the skin.
+    """
+    rng = np.random.default_rng(seed)
+    positions = rng.uniform(0, 300, size=(agents, 2))
+    verlet = VerletList(radius, skin)
+    for step in range(steps):
+        verlet.update(positions)
+        cells = CellList(radius).build(positions)
+        for got, expected in zip(verlet.pairs(radius), cells.pairs(radius)):
+            _expect(np.array_equal(got, expected), f'step {step}: pairs differ')
+        for i in rng.integers(0, agents, 5):
+            got, expected = verlet.neighbors(i, radius)[0], cells.neighbors(i, radius)[0]
+            _expect(np.array_equal(np.sort(got), np.sort(expected)), f'step {step}: neighbors of {i} differ')
+        positions = positions + rng.normal(scale=0.1, size=positions.shape)
+        if step % 50 == 49:
+            positions[rng.integers(0, agents)] += rng.normal(scale=2.0 * skin, size=2)
+    _expect(1 < verlet.rebuilds < steps, f'{verlet.rebuilds} rebuilds in {steps} steps: expected both reuse and rebuilds')
+    return f'{agents} points, {steps} steps, {verlet.rebuilds} rebuilds'
+
+
+def neighborhood_cache(seed=0, agents=300, rounds=50, radius=30.0):
+    """
+    NeighborhoodCache against a full recompute of every consensus direction, with a few agents
+    moving or turning between checkpoints and some turning mid-loop as sequential switches do.
+    """
+    rng = np.random.default_rng(seed)
+    positions = rng.uniform(0, 200, size=(agents, 2))
+    headings = rng.uniform(0, 2 * np.pi, agents)
+    cache = NeighborhoodCache()
+    full = np.zeros(agents)
+    got = np.zeros(agents)
+    recomputed = 0
+    for step in range(rounds):
+        src, dst, _ = CellList(radius).build(positions).pairs(radius)
+        offsets = csr_offsets(src, agents)
+        stale = cache.dirty(offsets, dst, headings)
+        for i in range(agents):
+            nbrs = dst[offsets[i]:offsets[i + 1]]
+            if nbrs.size:
+                full[i] = circ_mean(headings[nbrs])
+            if stale[i]:
+                if nbrs.size:
+                    got[i] = circ_mean(headings[nbrs])
+                cache.saw(i, headings)
+            if rng.random() < 0.02:
+                old = headings[i]
+                headings[i] = rng.uniform(0, 2 * np.pi)
+                cache.turned(i, old, headings[i], stale)
+        _expect(np.array_equal(got, full), f'round {step}: {int(np.count_nonzero(got != full))} agents off the recompute')
+        recomputed += int(np.count_nonzero(stale))
+        moving = rng.random(agents) < 0.05
+        positions[moving] += rng.normal(scale=10.0, size=(int(moving.sum()), 2))
+        turning = rng.random(agents) < 0.05
+        headings[turning] = rng.uniform(0, 2 * np.pi, int(turning.sum()))
+    return f'{agents} agents x {rounds} checkpoints, {recomputed / (agents * rounds):.0%} recomputed'
+
+
+def center_of_mass(seed=0, agents=500, steps=20):
+    """
+    SwarmAggregates.center_of_mass during sequential stages: exactly the correctly rounded mean of
+    the agents' positions (math.fsum), and within float tolerance of np.mean.
+    """
+    rng = np.random.default_rng(seed)
+    swarm = [Agent(p, 1.0, 1200, 700, 30, 50, 25) for p in rng.uniform(0, 700, size=(agents, 2))]
+    aggregates = SwarmAggregates(swarm, np.zeros((1, 2)))
+    for step in range(steps):
+        for k, agent in enumerate(swarm):
+            positions = np.array([a.position for a in swarm])
+            exact = np.array([math.fsum(positions[:, 0]), math.fsum(positions[:, 1])]) / agents
+            got = aggregates.center_of_mass
+            _expect(np.array_equal(got, exact),
+                    f'step {step}, agent {k}: off the exact mean by {float(np.max(np.abs(got - exact))):g}')
+            _expect(np.allclose(got, positions.mean(axis=0), rtol=1e-12, atol=1e-9),
+                    f'step {step}, agent {k}: outside float tolerance of np.mean')
+            agent.position = agent.position + rng.normal(scale=rng.choice([0.1, 5.0, 1e4]), size=2)
+            aggregates.moved(k, agent.position, agent.direction)
+    return f'{agents} agents x {steps} sequential stages'
+
+
+def _repulse_per_agent(positions, field, radius, agent_group=None):
+    """The per-agent loop of Agent.compute_repulsion_force: every hurdle in order, one agent at a time."""
+    centers = field.centers()
+    for k, position in enumerate(positions):
+        for j, (cx, cy) in enumerate(centers):
+            if agent_group is not None and agent_group[k] != field.group[j]:
+                continue
+            dx = cx - position[0]
+            dy = cy - position[1]
+            dist = np.hypot(dx, dy)
+            if radius > dist > 1e-9:
+                factor = (radius - dist) / dist
+                position[0] -= factor * dx
+                position[1] -= factor * dy
+    return positions
+
+
+def hurdle_repulsion(seed=0, trials=20, agents=300, radius=50.0):
+    """HurdleField.repulse against the per-agent loop, with overlapping hurdles and replicate groups."""
+    rng = np.random.default_rng(seed)
+    for trial in range(trials):
+        num_hurdles = int(rng.integers(1, 120))
+        hurdles = np.column_stack((rng.uniform(0, 400, size=(num_hurdles, 2)),
+                                   rng.uniform(0, 2, num_hurdles), rng.uniform(0, 0.05, num_hurdles)))
+        # hurdles in clumps, so one push often lands an agent in range of a later hurdle
+        half = num_hurdles // 2
+        hurdles[half:, :2] = hurdles[:num_hurdles - half, :2] + rng.normal(scale=30.0, size=(num_hurdles - half, 2))
+        grouped = trial % 2 == 1
+        group = rng.integers(0, 3, num_hurdles) if grouped else None
+        agent_group = rng.integers(0, 3, agents) if grouped else None
+        field = HurdleField(hurdles, group=group)
+        positions = rng.uniform(-20, 420, size=(agents, 2))
+        expected = _repulse_per_agent(positions.copy(), field, radius, agent_group)
+        got = field.repulse(positions.copy(), radius, agent_group=agent_group)
+        _expect(np.array_equal(got, expected),
+                f'trial {trial}: max difference {float(np.max(np.abs(got - expected))):g} px')
+    return f'{trials} hurdle layouts of up to 120 hurdles, {agents} agents'
+
+
+def _final_state(env, path):
+    """Every array of the run state, as written to a snapshot."""
+    env.snapshot(path)
+    with np.load(path) as data:
+        return {name: data[name] for name in data.files}
+
+
+def _same(a, b):
+    return a.shape == b.shape and np.array_equal(a, b, equal_nan=a.dtype.kind in 'fc')
+
+
+def snapshot_resume(make_model, seed=0, steps=300, at=150, agents=40):
+    """A run resumed from a mid-run snapshot ends in exactly the state of the uninterrupted run."""
+    params = set_params()
+    params[1]['NUM_AGENTS'] = agents
+    agent_pos, targets, hurdles = scenario_as_tuples(make_scenario(params, seed))
+    checked = []
+    with tempfile.TemporaryDirectory() as tmp, contextlib.redirect_stdout(io.StringIO()):
+        for engine in ('object', 'vector'):
+            for model_key in ('majority', 'voter', 'kuramoto'):
+                random.seed(seed)
+                np.random.seed(seed)
+                env = SimEnv(params, targets, headless=True)
+                env.model = make_model(model_key, agent_pos, targets, params, engine)
+                env.run_simulation(hurdles, targets, max_steps=steps,
+                                   snapshot_path=str(Path(tmp) / 'mid_{step}.npz'), snapshot_steps=[at])
+                full = _final_state(env, Path(tmp) / 'full.npz')
+
+                env = SimEnv(params, targets, headless=True)
+                env.model = make_model(model_key, agent_pos, targets, params, engine)
+                env.restore(Path(tmp) / f'mid_{at}.npz')
+                env.run_simulation(None, targets, max_steps=steps, resume=True)
+                resumed = _final_state(env, Path(tmp) / 'resumed.npz')
+                for key, value in full.items():
+                    _expect(key in resumed and _same(value, resumed[key]),
+                            f'{engine} {model_key}: {key} differs after resuming at step {at}')
+                checked.append(f'{engine}/{model_key}')
+    return f'resumed at {at} of {steps} steps: ' + ', '.join(checked)
+
+
+def kuramoto_sweep(seed=0, trials=20, agents=300, radius=30.0, tolerance=1e-12):
+    """sequential_phases against KuramotoAgent.calculate_phase_difference, agent after agent."""
+    rng = np.random.default_rng(seed)
+    for trial in range(trials):
+        positions = rng.uniform(0, 300, size=(agents, 2))
+        src, dst, _ = CellList(radius).build(positions).pairs(radius)
+        offsets = csr_offsets(src, agents)
+        theta = rng.uniform(-np.pi, np.pi, agents)
+        omega = rng.uniform(-np.pi, np.pi, agents)
+        coupling_K = rng.uniform(0.0, 1.2, agents)
+        ramp = coupling_K <= 1.0
+        consensus = rng.uniform(-np.pi, np.pi, agents)
+
+        swarm = [KuramotoAgent(p, False, 1200, 700, radius, 50, 25, 1.0) for p in positions]
+        for k, agent in enumerate(swarm):
+            agent.direction, agent.omega = theta[k], omega[k]
+            agent.coupling_strength_K, agent.consensus_direction = coupling_K[k], consensus[k]
+            agent.neighbors = [swarm[j] for j in dst[offsets[k]:offsets[k + 1]]]
+        for agent, ramped in zip(swarm, ramp):
+            if ramped:
+                agent.calculate_phase_difference()
+            agent.direction = agent.consensus_direction
+        expected = np.array([agent.direction for agent in swarm], dtype=float)
+
+        got = sequential_phases(theta, omega, coupling_K, ramp, consensus, offsets, dst)
+        off = float(np.max(np.abs(angle_diff(got, expected))))
+        _expect(off <= tolerance, f'trial {trial}: off the per-agent sweep by {off:g} rad')
+    return f'{trials} swarms of {agents} agents, tolerance {tolerance:g}'
+
+
+def engine_agreement(run_one, seeds=(0, 1, 2), agents=30, targets=2, steps=300, tolerance=1e-6):
+    """The vector engine's default (sequential) runs against the object engine, within float tolerance."""
+    params = set_params()
+    params[1]['NUM_AGENTS'] = agents
+    params[0]['NUM_TARGET'] = targets
+    names = ('dir_mismatch', 'collisions', 'phase_synchronization', 'decision_accuracy', 'agents_reached')
+    with contextlib.redirect_stdout(io.StringIO()):
+        for seed in seeds:
+            for model_key in ('majority', 'voter', 'kuramoto'):
+                runs = []
+                for engine in ('object', 'vector'):
+                    random.seed(seed)
+                    np.random.seed(seed)
+                    runs.append(run_one(params, model_key, max_steps=steps, engine=engine,
+                                        initial_conditions=make_scenario(params, seed))[1:6])
+                for name, got, expected in zip(names, runs[1], runs[0]):
+                    _expect(len(got) == len(expected) and np.allclose(got, expected, rtol=0.0, atol=tolerance),
+                            f'seed {seed} {model_key}: {name} of the vector engine differs from the object engine')
+    return f'{len(seeds)} seeds x 3 models, {agents} agents, {steps} steps, tolerance {tolerance:g}'
+
+
+def ensemble_replicates(run_one, run_ensemble, seed=0, agents=30, targets=10, steps=200, replicates=3):
+    """Each ensemble replicate against the single synchronous vector run with the same seeds."""
+    params = set_params()
+    params[1]['NUM_AGENTS'] = agents
+    params[0]['NUM_TARGET'] = targets
+    seeds = np.random.SeedSequence(seed).generate_state(replicates)
+    with contextlib.redirect_stdout(io.StringIO()):
+        for model_key in ('majority', 'voter', 'kuramoto'):
+            _, series, _ = run_ensemble(params, model_key, seeds, steps)
+            for r, run_seed in enumerate(seeds):
+                scenario = make_scenario(params, int(run_seed))
+                random.seed(int(run_seed))
+                np.random.seed(int(run_seed))
+                _, mis, col, _, acc, reached, _ = run_one(params, model_key, max_steps=steps, engine='vector',
+                                                          update_order='synchronous', initial_conditions=scenario)
+                for name, single in (('dir_mismatch', mis), ('collisions', col),
+                                     ('decision_accuracy', acc), ('agents_reached', reached)):
+                    got = series[name][r]
+                    _expect(len(got) == len(single) and np.allclose(got, single, rtol=0.0, atol=1e-9),
+                            f'{model_key} replicate {r}: {name} differs from the single run')
+    return f'{replicates} replicates x 3 models, {agents} agents, {targets} targets, {steps} steps'
+
+
+CHECKS = {
+    'center-of-mass': center_of_mass,
+    'nearest-target-cache': nearest_target_cache,
+    'nearest-target-field': nearest_target_field,
+    'neighborhood-cache': neighborhood_cache,
+    'verlet-list': verlet_matches_cell_list,
+    'hurdle-repulsion': hurdle_repulsion,
+    'snapshot-resume': snapshot_resume,
+    'kuramoto-sweep': kuramoto_sweep,
+    'engine-agreement': engine_agreement,
+    'ensemble-replicates': ensemble_replicates,
+}
+
+
+def run_checks(names=None, **hooks):
+    """
+    Run the named checks (default all); returns [(name, passed, detail)]. Checks that drive whole
+    runs take the runner functions of main.py as hooks (make_model, run_one, run_ensemble).
+    """
+    results = []
+    for name in names or CHECKS:
+        check = CHECKS[name]
+        wanted = {key: hooks[key] for key in inspect.signature(check).parameters if key in hooks}
+        try:
+            results.append((name, True, check(**wanted)))
+        except CheckFailed as err:
+            results.append((name, False, str(err)))
+    return results
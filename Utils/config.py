@@ -8,21 +8,110 @@ def setup_perser():
     parser.add_argument('-o', '--olddata',
                         action='store_true',
                         help='Start simulation with old data')
+    parser.add_argument('--export-scenario', nargs='?', const='Data/data.txt', default=None, metavar='PATH',
+                        help='With -n, also write the new initial conditions to PATH (default Data/data.txt)')
 
     # Model picks (single run)
     parser.add_argument('-m', '--majority', action='store_true', help='Use Majority Rule Model')
     parser.add_argument('-v', '--voter',    action='store_true', help='Use Voter Model')
     parser.add_argument('-k', '--kuramoto', action='store_true', help='Use Kuramoto Model')
 
+    # Simulation engine
+    parser.add_argument('--engine', choices=['object', 'vector'], default='object',
+                        help='Per-agent object engine or vectorized (structure-of-arrays) engine')
+    parser.add_argument('--update-order', choices=['synchronous', 'sequential'], default=None,
+                        help='Update agents one by one like the object models (default), or all at once: the vector '
+                             'engine\'s fast path and the object voter model\'s CSR step, a different update rule '
+                             '(required by --replicates)')
+
+    parser.add_argument('--kernels', choices=['auto', 'numba', 'numpy'], default=None,
+                        help='Per-step kernels: compiled with Numba (auto = when installed) or plain NumPy')
+    parser.add_argument('--verlet-skin', type=float, default=None,
+                        help='Use Verlet neighbor lists with this skin radius (px); 0 = cell list every step')
+
     # Max steps
     parser.add_argument('-t', '--max-steps', type=int, default=0,
                         help='Maximum number of time steps (0 = run until closed)')
 
+    parser.add_argument('--headless', action='store_true',
+                        help='Single run without a pygame window or FPS limit (needs -t); --batch is always headless')
+
+    parser.add_argument('--keep-raw-metrics', action='store_true',
+                        help='Keep per-agent metric values of every checkpoint, not just mean/var/min/max')
+
+    parser.add_argument('--profile', action='store_true',
+                        help='Time each phase of every run (table + JSON report next to the results)')
+
+    # Snapshots (single run)
+    parser.add_argument('--snapshot-every', type=int, default=0, metavar='N',
+                        help='Write a snapshot of the full run state every N steps')
+    parser.add_argument('--snapshot-at', type=int, nargs='+', default=None, metavar='STEP',
+                        help='Write a snapshot after each of these steps')
+    parser.add_argument('--snapshot-path', default='Data/snapshot_{model}_{step}.npz',
+                        help='Snapshot file name template ({model} and {step} are filled in)')
+    parser.add_argument('--restore', default=None, metavar='SNAPSHOT',
+                        help='Continue from a snapshot (same model, engine, agents and targets; -t is the total step count)')
+
     # Batch + CSV
     parser.add_argument('--batch', action='store_true',
                         help='Run sweep over agent sizes and target counts for all models; save to CSV')
+    parser.add_argument('--sweep-spec', default=None, metavar='JSON',
+                        help='Run a declarative sweep (grid / random / lhs design over any set_params field) from a spec file')
+    parser.add_argument('--sweep-out', default=None,
+                        help='Per-run table of --sweep-spec (default: Data/<spec name>_points.csv)')
     parser.add_argument('--csv-out', default='Data/sweep_results.csv',
                         help='CSV path to write when using --batch')
+    parser.add_argument('--results-format', choices=['csv', 'columnar'], default='csv',
+                        help='Write/read sweep results as CSV or as columnar *.cols stores (one NPZ per A/T/model)')
+    parser.add_argument('--export-csv', default=None, metavar='STORE',
+                        help='Convert a columnar *.cols results store to CSV next to it and exit')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Number of worker processes for --batch (1 = run cells one after another)')
+    parser.add_argument('--sample-steps', default='all', metavar='SPEC',
+                        help='Which time steps of the agents-reached series to write: all, every:K, change, '
+                             'window:K[:mean|min|max]')
+    parser.add_argument('--sample-checkpoints', default='all', metavar='SPEC',
+                        help='Which consensus checkpoints of the metric series to write (same SPEC forms)')
+    parser.add_argument('--replicates', type=int, default=1,
+                        help='Replicate swarms per sweep cell, stepped together as one vectorized ensemble')
+    parser.add_argument('--seed', type=int, default=None,
+                        help='Base seed for --batch (every sweep cell gets its own seed derived from it), or the scenario seed for -n')
+
+    # Benchmarks
+    parser.add_argument('--benchmark', action='store_true',
+                        help='Run the headless scaling benchmark (agents x targets x models, -t steps, default 200)')
+    parser.add_argument('--bench-agents', type=int, nargs='+', default=None,
+                        help='Agent counts to benchmark (default 10 100 1000 10000 with --engine vector --update-order synchronous, '
+                             'else up to 1000)')
+    parser.add_argument('--bench-targets', type=int, nargs='+', default=None,
+                        help='Target counts to benchmark (default 2 10 100)')
+    parser.add_argument('--bench-models', nargs='+', choices=['majority', 'voter', 'kuramoto'], default=None,
+                        help='Models to benchmark (default all three)')
+    parser.add_argument('--bench-out', default='Data/benchmark_results.json',
+                        help='JSON file for the benchmark results')
+    parser.add_argument('--bench-baseline', default='Data/benchmark_baseline.json',
+                        help='Stored benchmark baseline to compare against')
+    parser.add_argument('--bench-save-baseline', action='store_true',
+                        help='Store this benchmark run as the new baseline instead of comparing')
+    parser.add_argument('--bench-threshold', type=float, default=0.10,
+                        help='Allowed slowdown / memory growth against the baseline as a fraction (default 0.10)')
+
+    # Self-checks
+    parser.add_argument('--self-check', nargs='*', default=None, metavar='CHECK',
+                        help='Check the exact fast paths against the computations they replace (default: all checks; '
+                             'see Utils/checks.py) and exit non-zero on a mismatch')
+
+    # Early termination (--batch)
+    parser.add_argument('--stop-reached', type=float, default=None, metavar='FRAC',
+                        help='Stop a sweep run once this fraction of agents sits inside a target')
+    parser.add_argument('--stop-mismatch', type=float, default=None, metavar='RAD',
+                        help='Stop once the checkpoint direction-mismatch average stays below this (radians)')
+    parser.add_argument('--stop-order', type=float, default=None, metavar='R',
+                        help='Stop once the heading order parameter stays above this level (0..1)')
+    parser.add_argument('--stop-patience', type=int, default=3,
+                        help='Consecutive checkpoints the mismatch / order rule must hold (default 3)')
+    parser.add_argument('--stop-min-steps', type=int, default=0,
+                        help='Never stop a run before this step')
 
     # Plot-only (read CSV and build figures)
     parser.add_argument('--csv-in', default='Data/sweep_results.csv',
@@ -35,6 +124,10 @@ def setup_perser():
                         help='Build phase synchronization figures (Kuramoto only)')
     parser.add_argument('--plot-accuracy', action='store_true',
                         help='Build decision-making accuracy figures (all models)')
+    parser.add_argument('--plot-all', action='store_true',
+                        help='Build all four figure families, loading each results file once (uses --workers)')
+    parser.add_argument('--force-plot', action='store_true',
+                        help='Re-render figures even if their input data has not changed')
 
     return parser.parse_args()
 
@@ -47,7 +140,8 @@ def set_params():
         'FPS': 60,
         'NUM_TARGET': 2,
         'TARGET_SIZE': 30,
-        'NUM_HURDLE': 10
+        'NUM_HURDLE': 10,
+        'TARGET_GRID_CELL': 5     # nearest-target lookup grid cell (px); 0 = exact distances only
     }
 
     swarm_params = {
@@ -62,6 +156,7 @@ def set_params():
         'ALIGNMENT_STRENGTH': 0.1,
         'ATTRACT_STRENGTH': 0.02,
         'REPULSION_RADIUS': 50,
-        'K_INCREMENT': 0.01
+        'K_INCREMENT': 0.01,
+        'VERLET_SKIN': 0
     }
     return [env_params, swarm_params]
@@ -0,0 +1,84 @@
+import numpy as np
+
+
+MODES = ('all', 'every', 'change', 'window')
+REDUCERS = ('mean', 'min', 'max')
+
+
+class SamplingPolicy:
+    """
+    Which points of a recorded series go to the output files.
+
+      all             - every point (the default)
+      every:K         - every K-th point, plus the last one
+      change          - the first and last points and every point whose value differs from the previous one
+      window:K[:RED]  - one point per window of K points: its mean, min or max, at the window's last x
+
+    Points are numbered from 1 (time step or consensus checkpoint); the kept numbers are returned
+    with the values so the files keep their real x positions.
+    """
+
+    def __init__(self, mode='all', every=1, reducer='mean'):
+        if mode not in MODES:
+            raise ValueError(f'Unknown sampling mode: {mode} (choose from {", ".join(MODES)})')
+        if reducer not in REDUCERS:
+            raise ValueError(f'Unknown window reducer: {reducer} (choose from {", ".join(REDUCERS)})')
+        if int(every) < 1:
+            raise ValueError('Sampling interval must be >= 1')
+        self.mode = mode
+        self.every = int(every)
+        self.reducer = reducer
+
+    @classmethod
+    def parse(cls, spec):
+        """'all', 'every:10', 'change', 'window:100' or 'window:100:max'."""
+        parts = (spec or 'all').lower().split(':')
+        mode = parts[0]
+        if mode in ('all', 'change'):
+            if len(parts) > 1:
+                raise ValueError(f'Sampling mode {mode} takes no arguments: {spec}')
+            return cls(mode)
+        if len(parts) < 2 or (mode == 'every' and len(parts) > 2) or len(parts) > 3:
+            raise ValueError(f'Bad sampling spec: {spec} (e.g. every:10, window:100:mean)')
+        return cls(mode, int(parts[1]), parts[2] if len(parts) == 3 else 'mean')
+
+    @property
+    def spec(self):
+        if self.mode in ('all', 'change'):
+            return self.mode
+        if self.mode == 'every':
+            return f'every:{self.every}'
+        return f'window:{self.every}:{self.reducer}'
+
+    def describe(self):
+        """Metadata stored next to the results."""
+        return {'mode': self.mode, 'every': self.every, 'reducer': self.reducer, 'spec': self.spec}
+
+    def apply(self, values):
+        """
+        values: array with the points along axis 0 (extra axes, e.g. several metric columns, are kept).
+        Returns (x, sampled values); with 'change' a point is kept when any of its columns changed.
+        """
+        values = np.asarray(values)
+        n = len(values)
+        x = np.arange(1, n + 1)
+        if n == 0 or self.mode == 'all' or (self.mode != 'change' and self.every == 1):
+            return x, values
+        if self.mode == 'every':
+            keep = np.union1d(np.arange(self.every - 1, n, self.every), [n - 1])
+            return x[keep], values[keep]
+        if self.mode == 'change':
+            flat = values.reshape(n, -1)
+            changed = np.any(flat[1:] != flat[:-1], axis=1)
+            keep = np.union1d(np.flatnonzero(changed) + 1, [0, n - 1])
+            return x[keep], values[keep]
+        starts = np.arange(0, n, self.every)
+        reduce = {'mean': np.add, 'min': np.minimum, 'max': np.maximum}[self.reducer].reduceat
+        out = reduce(values.astype(float) if self.reducer == 'mean' else values, starts, axis=0)
+        if self.reducer == 'mean':
+            sizes = np.diff(np.append(starts, n)).reshape((-1,) + (1,) * (values.ndim - 1))
+            out = out / sizes
+        return np.minimum(starts + self.every, n), out
+
+
+ALL = SamplingPolicy()
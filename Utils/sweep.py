@@ -0,0 +1,155 @@
+import itertools
+import json
+import math
+
+import numpy as np
+
+
+DESIGNS = ('grid', 'random', 'lhs')
+DEFAULT_MODELS = ('majority', 'voter', 'kuramoto')
+
+# Sweep spec (JSON):
+#
+#   {
+#     "design": "lhs",                      # grid | random | lhs
+#     "samples": 64,                        # budget of random / lhs designs
+#     "seed": 7,                            # design seed (default: --seed)
+#     "models": ["majority", "kuramoto"],   # default: all three
+#     "parameters": {
+#       "NUM_AGENTS": [10, 40, 160],                          # value list
+#       "INTERACTION_RADIUS": {"min": 20, "max": 60},         # range
+#       "CONSENSUS_PERIOD": {"min": 5, "max": 20, "step": 5}, # stepped range (a value list)
+#       "K_INCREMENT": {"min": 0.001, "max": 0.1, "log": true},
+#       "TARGET_SIZE": {"min": 10, "max": 50, "num": 5}       # num evenly spaced values
+#     }
+#   }
+#
+# Names are any key of Utils.config.set_params (env or swarm). Ranges are sampled continuously by the
+# random / lhs designs; a grid needs value lists, stepped ranges or "num". Values of integer
+# parameters are rounded.
+
+
+class ParamAxis:
+    """One swept parameter: a list of values or a [min, max] range (optionally log-scaled)."""
+
+    def __init__(self, name, spec, default):
+        self.name = name
+        self.integer = isinstance(default, int) and not isinstance(default, bool)
+        self.values = None
+        self.low = self.high = None
+        self.log = False
+        if isinstance(spec, list):
+            if not spec:
+                raise ValueError(f'{name}: empty value list')
+            self.values = list(spec)
+        elif isinstance(spec, dict):
+            unknown = set(spec) - {'min', 'max', 'step', 'num', 'log'}
+            if unknown or 'min' not in spec or 'max' not in spec:
+                raise ValueError(f'{name}: a range needs min and max (and optionally step, num or log), got {spec}')
+            self.low, self.high = float(spec['min']), float(spec['max'])
+            self.log = bool(spec.get('log', False))
+            if self.high < self.low:
+                raise ValueError(f'{name}: max < min')
+            if self.log and self.low <= 0:
+                raise ValueError(f'{name}: a log range needs min > 0')
+            if 'step' in spec:
+                step = float(spec['step'])
+                if step <= 0:
+                    raise ValueError(f'{name}: step must be > 0')
+                count = int(math.floor((self.high - self.low) / step + 1e-9)) + 1
+                self.values = [self._cast(self.low + k * step) for k in range(count)]
+            elif 'num' in spec:
+                space = np.geomspace if self.log else np.linspace
+                self.values = [self._cast(v) for v in space(self.low, self.high, int(spec['num']))]
+        else:
+            self.values = [spec]
+
+    @property
+    def discrete(self):
+        return self.values is not None
+
+    def _cast(self, value):
+        return int(round(value)) if self.integer else float(value)
+
+    def at(self, u):
+        """The value at quantile u in [0, 1): a list entry, or a point of the range."""
+        if self.discrete:
+            value = self.values[min(int(u * len(self.values)), len(self.values) - 1)]
+            return value.item() if hasattr(value, 'item') else value
+        if self.log:
+            return self._cast(math.exp(math.log(self.low) + u * (math.log(self.high) - math.log(self.low))))
+        return self._cast(self.low + u * (self.high - self.low))
+
+
+def load_spec(path):
+    with open(path) as f:
+        spec = json.load(f)
+    if not isinstance(spec, dict) or not spec.get('parameters'):
+        raise ValueError(f'{path}: a sweep spec needs a "parameters" object')
+    return spec
+
+
+def parse_spec(spec, params):
+    """(design, axes, samples, models) of a spec; params are the defaults of set_params()."""
+    env_params, swarm_params = params
+    defaults = {**env_params, **swarm_params}
+    design = spec.get('design', 'grid')
+    if design not in DESIGNS:
+        raise ValueError(f'Unknown design: {design} (choose from {", ".join(DESIGNS)})')
+    axes = []
+    for name, values in spec['parameters'].items():
+        if name not in defaults:
+            raise ValueError(f'Unknown parameter: {name} (not in set_params)')
+        axes.append(ParamAxis(name, values, defaults[name]))
+    models = list(spec.get('models', DEFAULT_MODELS))
+    bad = [m for m in models if m not in DEFAULT_MODELS]
+    if bad:
+        raise ValueError(f'Unknown models: {", ".join(bad)}')
+    samples = spec.get('samples')
+    if design == 'grid':
+        continuous = [axis.name for axis in axes if not axis.discrete]
+        if continuous:
+            raise ValueError(f'A grid needs value lists, step or num for: {", ".join(continuous)}')
+    elif not samples or int(samples) < 1:
+        raise ValueError(f'A {design} design needs a "samples" budget')
+    return design, axes, (int(samples) if samples else None), models
+
+
+def count_points(design, axes, samples):
+    if design == 'grid':
+        return math.prod(len(axis.values) for axis in axes)
+    return samples
+
+
+def design_points(design, axes, samples, seed=None):
+    """
+    Lazily yield the design points as {name: value} dicts:
+      grid   - the Cartesian product of the value lists
+      random - `samples` independent uniform draws (log-uniform on log ranges)
+      lhs    - a Latin hypercube of `samples` points: every axis is cut into `samples` equal strata
+               and each stratum is used exactly once, so `samples` points cover every axis evenly
+    """
+    names = [axis.name for axis in axes]
+    if design == 'grid':
+        for combo in itertools.product(*(axis.values for axis in axes)):
+            yield dict(zip(names, combo))
+        return
+    rng = np.random.default_rng(seed)
+    if design == 'random':
+        for _ in range(samples):
+            u = rng.random(len(axes))
+            yield {axis.name: axis.at(q) for axis, q in zip(axes, u)}
+        return
+    # one stratum permutation per axis up front (samples ints each); the points themselves are lazy
+    strata = [rng.permutation(samples) for _ in axes]
+    for k in range(samples):
+        u = [(perm[k] + rng.random()) / samples for perm in strata]
+        yield {axis.name: axis.at(q) for axis, q in zip(axes, u)}
+
+
+def apply_point(params, point):
+    """Copies of (env, swarm) params with the point's values written into whichever dict owns each name."""
+    env, swarm = dict(params[0]), dict(params[1])
+    for name, value in point.items():
+        (env if name in env else swarm)[name] = value
+    return [env, swarm]
@@ -3,10 +3,16 @@ import json
 import csv
 import os
 import math
+import hashlib
+from collections import OrderedDict, namedtuple
+import numpy as np
 import matplotlib.pyplot as plt
 from pathlib import Path
 from datetime import datetime
 
+from Environment.SimMetrics import MetricSeries
+from Utils.sampling import ALL as SAMPLE_ALL
+
 FILE_NAME = 'Data/data.txt'
 
 
@@ -41,13 +47,90 @@ def simulation_init(params):
     Initializes agents, non-overlapping targets (>= 2*TARGET_SIZE gap), and hurdles.
     Writes [agent_init_pos, targets, hurdles] to Data/data.txt
     """
+    export_scenario(make_scenario(params))
+
+
+# ---------- In-memory scenarios ----------
+
+Scenario = namedtuple('Scenario', ['agent_pos', 'targets', 'hurdles'])
+
+SCENARIO_CACHE_SIZE = 64
+_scenario_cache = OrderedDict()
+
+# Parameters the initial conditions depend on
+_SCENARIO_ENV_KEYS = ('SCREEN_WIDTH', 'SCREEN_HEIGHT', 'NUM_TARGET', 'TARGET_SIZE', 'NUM_HURDLE')
+_SCENARIO_SWARM_KEYS = ('NUM_AGENTS', 'START_AREA_LEN', 'STARTING_AREA_WIDTH')
+
+
+def _scenario_key(params, seed):
+    env_params, swarm_params = params
+    return ((int(seed),) + tuple(env_params[k] for k in _SCENARIO_ENV_KEYS)
+            + tuple(swarm_params[k] for k in _SCENARIO_SWARM_KEYS))
+
+
+def _to_scenario(data):
+    agent_pos, targets, hurdles = data
+    arrays = (np.asarray(agent_pos, dtype=float).reshape(-1, 2),
+              np.asarray(targets, dtype=float).reshape(-1, 2),
+              np.asarray(hurdles, dtype=float).reshape(-1, 4))
+    for a in arrays:
+        a.flags.writeable = False   # cached scenarios are shared between runs
+    return Scenario(*arrays)
+
+
+def make_scenario(params, seed=None):
+    """
+    Initial conditions as a Scenario of arrays: agent_pos (N, 2), targets (T, 2) and
+    hurdles (H, 4: x, y, amplitude, frequency).
+
+    With a seed the draws come from a private random.Random(seed) (the same sequence as
+    random.seed(seed)) and the result is kept in a bounded LRU cache keyed by (params, seed),
+    so every model of a sweep cell gets the identical scenario without regenerating it.
+    Without a seed the global `random` stream is used and nothing is cached.
+    """
+    if seed is None:
+        return _to_scenario(generate_initial_conditions(params))
+    key = _scenario_key(params, seed)
+    scenario = _scenario_cache.get(key)
+    if scenario is not None:
+        _scenario_cache.move_to_end(key)
+        return scenario
+    scenario = _to_scenario(generate_initial_conditions(params, rng=random.Random(int(seed))))
+    _scenario_cache[key] = scenario
+    if len(_scenario_cache) > SCENARIO_CACHE_SIZE:
+        _scenario_cache.popitem(last=False)
+    return scenario
+
+
+def scenario_as_tuples(scenario):
+    """[agent_pos, targets, hurdles] as lists of plain-float tuples (what the object models key on)."""
+    return [[tuple(row) for row in np.asarray(part, dtype=float).tolist()] for part in scenario]
+
+
+def export_scenario(scenario, path=FILE_NAME):
+    """Write a scenario as JSON [agent_init_pos, targets, hurdles] (the Data/data.txt format)."""
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w') as file:
+        json.dump([np.asarray(part, dtype=float).tolist() for part in scenario], file)
+
+
+def load_scenario(path=FILE_NAME):
+    with open(path, 'r') as file:
+        return _to_scenario(json.load(file))
+
+
+def generate_initial_conditions(params, rng=random):
+    """
+    Draws [agent_init_pos, targets, hurdles] (lists of tuples) from `rng`, by default the
+    global `random` stream. make_scenario wraps this with seeding and caching.
+    """
     env_params, swarm_params = params
 
     # Agents: random cluster on the left third
     agent_init_pos = [
-        (random.uniform(0, swarm_params['START_AREA_LEN']),
-         random.uniform(env_params['SCREEN_HEIGHT'] / 3,
-                        env_params['SCREEN_HEIGHT'] / 3 + swarm_params['START_AREA_LEN']))
+        (rng.uniform(0, swarm_params['START_AREA_LEN']),
+         rng.uniform(env_params['SCREEN_HEIGHT'] / 3,
+                     env_params['SCREEN_HEIGHT'] / 3 + swarm_params['START_AREA_LEN']))
         for _ in range(swarm_params['NUM_AGENTS'])
     ]
 
@@ -62,7 +145,7 @@ def simulation_init(params):
     attempts, max_attempts = 0, 10000
     while len(targets) < num_targets and attempts < max_attempts:
         attempts += 1
-        y = random.uniform(y_min, y_max)
+        y = rng.uniform(y_min, y_max)
         cand = (x_fixed, y)
         ok = True
         for (px, py) in targets:
@@ -86,13 +169,13 @@ def simulation_init(params):
     # Hurdles: random band in the middle-right
     hurdles = []
     for _ in range(env_params['NUM_HURDLE']):
-        hurdle_x = random.uniform(env_params['SCREEN_WIDTH'] / 3, env_params['SCREEN_WIDTH'] * 4 / 5)
-        hurdle_y = random.uniform(0, env_params['SCREEN_HEIGHT'] - 50)
-        amplitude = random.choice([1, 2])
-        frequency = random.uniform(0.0, 0.1)
+        hurdle_x = rng.uniform(env_params['SCREEN_WIDTH'] / 3, env_params['SCREEN_WIDTH'] * 4 / 5)
+        hurdle_y = rng.uniform(0, env_params['SCREEN_HEIGHT'] - 50)
+        amplitude = rng.choice([1, 2])
+        frequency = rng.uniform(0.0, 0.1)
         hurdles.append((hurdle_x, hurdle_y, amplitude, frequency))
 
-    write_to_file([agent_init_pos, targets, hurdles])
+    return [agent_init_pos, targets, hurdles]
 
 
 # ---------- Metric helpers (existing) ----------
@@ -101,7 +184,7 @@ def _series_from_perf(perf, key):
     """
     Extract series for a given metric key from performance_data.
     Expected layouts:
-        Kuramoto: [dir_mismatch, collisions, phase_synchronization, decision_accuracy, time_count]
+        Kuramoto: [dir_mismatch, collisions, phase_synchronization, order_parameter, decision_accuracy, time_count]
         Others:   [dir_mismatch, collisions, decision_accuracy, time_count]
     """
     if not isinstance(perf, (list, tuple)) or not perf:
@@ -112,22 +195,24 @@ def _series_from_perf(perf, key):
         return perf[1] if len(perf) >= 2 else []
     if key == 'phase_synchronization':
         return perf[2] if len(perf) >= 3 else []
+    if key == 'order_parameter':
+        return perf[3] if len(perf) >= 6 else []
     if key == 'decision_accuracy':
-        if len(perf) >= 5:   # Kuramoto
-            return perf[3]
-        if len(perf) >= 4:   # Others
-            return perf[2]
-        return []
+        return perf[-2] if len(perf) >= 4 else []
     return []
 
 
 def _avg_series(perf, key):
     series = _series_from_perf(perf, key)
+    if isinstance(series, MetricSeries):
+        return series.mean.tolist()
     if not isinstance(series, list):
         return []
     out = []
     for step in series:
-        if isinstance(step, (list, tuple)):
+        if isinstance(step, np.ndarray):
+            out.append(float(step.mean()) if step.size else 0.0)
+        elif isinstance(step, (list, tuple)):
             out.append((sum(step) / len(step)) if len(step) > 0 else 0.0)
         else:
             try:
@@ -153,6 +238,77 @@ def _avg_accuracy_series(perf):
     return _avg_series(perf, 'decision_accuracy')
 
 
+def pad_series(series, extra):
+    """
+    Hold the last value of a series for `extra` more points (axis 0), so a run that stopped early
+    lines up with full-length runs in the CSVs and plots.
+    """
+    if extra <= 0 or not len(series):
+        return series
+    if isinstance(series, np.ndarray):
+        return np.concatenate([series, np.repeat(series[-1:], extra, axis=0)])
+    return list(series) + [series[-1]] * extra
+
+
+def padded_checkpoints(max_steps, stopped_at, period):
+    """Checkpoints a run would still have recorded between stopped_at and max_steps."""
+    return max_steps // period - stopped_at // period
+
+
+# ---------- Ensemble (replicate) summaries ----------
+
+def ensemble_summary(per_replicate, z=1.96):
+    """
+    Aggregate a (replicates, points) array into mean, std and a normal-approximation confidence band
+    (mean ± z * std / sqrt(R)); z=1.96 gives a 95% band.
+    """
+    values = np.asarray(per_replicate, dtype=float)
+    if values.ndim != 2 or values.shape[1] == 0:
+        empty = np.zeros(0)
+        return {'mean': empty, 'std': empty, 'ci_low': empty, 'ci_high': empty, 'n': int(len(values))}
+    n = values.shape[0]
+    mean = values.mean(axis=0)
+    std = values.std(axis=0, ddof=1) if n > 1 else np.zeros_like(mean)
+    half = z * std / math.sqrt(n)
+    return {'mean': mean, 'std': std, 'ci_low': mean - half, 'ci_high': mean + half, 'n': n}
+
+
+_ENSEMBLE_CSV = 'Data/ensemble_summary.csv'
+_ENSEMBLE_HDR = ['agents', 'targets', 'model', 'metric', 'x', 'mean', 'std', 'ci_low', 'ci_high', 'replicates']
+
+
+def append_ensemble_summary(agents: int, targets: int, model_name: str, series, csv_path=_ENSEMBLE_CSV,
+                            sampling=SAMPLE_ALL):
+    """
+    series: {metric name: (replicates, points) array}. Writes one row per metric and sampled point
+    (SamplingPolicy) with the replicate mean and confidence band.
+    """
+    os.makedirs(os.path.dirname(csv_path) or ".", exist_ok=True)
+    if not (os.path.exists(csv_path) and os.path.getsize(csv_path) > 0):
+        with open(csv_path, 'w', newline='') as f:
+            csv.writer(f).writerow(_ENSEMBLE_HDR)
+    rows = []
+    for metric, per_replicate in series.items():
+        summ = ensemble_summary(per_replicate)
+        xs, band = sampling.apply(np.column_stack([summ['mean'], summ['std'], summ['ci_low'], summ['ci_high']]))
+        for x, (mean, std, ci_low, ci_high) in zip(xs.tolist(), band.tolist()):
+            rows.append([agents, targets, model_name, metric, x, mean, std, ci_low, ci_high, summ['n']])
+    with open(csv_path, 'a', newline='') as f:
+        csv.writer(f).writerows(rows)
+
+
+def save_ensemble_replicates(agents: int, targets: int, model_name: str, series, seeds=None):
+    """Per-replicate series of one sweep cell -> Data/ensemble_<A>A_<T>T_<model>.npz"""
+    _ensure_data_dir()
+    slug = model_name.replace(' ', '_')
+    out = f'Data/ensemble_{agents}A_{targets}T_{slug}.npz'
+    arrays = {k: np.asarray(v, dtype=float) for k, v in series.items()}
+    if seeds is not None:
+        arrays['seeds'] = np.asarray(seeds, dtype=np.uint64)
+    np.savez_compressed(out, **arrays)
+    return out
+
+
 # ---------- Existing CSV I/O for checkpoint metrics ----------
 
 _HEADER = [
@@ -184,8 +340,12 @@ def _ensure_csv_with_header(csv_path: str):
 
 
 def append_metrics_to_csv(csv_path: str, agents: int, targets: int, model_name: str,
-                          mismatch_series, collision_series, phase_series=None, accuracy_series=None):
-    _ensure_csv_with_header(csv_path)
+                          mismatch_series, collision_series, phase_series=None, accuracy_series=None,
+                          sampling=SAMPLE_ALL):
+    """
+    csv_path may also be a columnar store (*.cols); the (A, T, model) slice is then (re)written.
+    sampling: SamplingPolicy over the checkpoints (all four columns are sampled together).
+    """
     mismatch_series  = list(mismatch_series or [])
     collision_series = list(collision_series or [])
     phase_series     = list(phase_series or [])
@@ -195,14 +355,20 @@ def append_metrics_to_csv(csv_path: str, agents: int, targets: int, model_name:
     if n == 0:
         return
 
-    rows = []
+    values = np.zeros((n, 4))
     for i in range(n):
         y_mis = float(mismatch_series[i])   if i < len(mismatch_series)  else 0.0
         y_col = float(collision_series[i])  if i < len(collision_series) else 0.0
         y_phs = float(phase_series[i])      if i < len(phase_series)     else 0.0
         y_acc = float(accuracy_series[i])   if i < len(accuracy_series)  else 0.0
-        rows.append([agents, targets, model_name, i + 1, y_mis, y_col, y_phs, y_acc])
+        values[i] = (y_mis, y_col, y_phs, y_acc)
+    checkpoints, values = sampling.apply(values)
+    rows = [[agents, targets, model_name, x, *row] for x, row in zip(checkpoints.tolist(), values.tolist())]
 
+    if is_columnar_store(csv_path):
+        _write_slice_rows(csv_path, _HEADER, rows)
+        return
+    _ensure_csv_with_header(csv_path)
     with open(csv_path, 'a', newline='') as f:
         csv.writer(f).writerows(rows)
 
@@ -219,20 +385,203 @@ def _ensure_reached_csv(csv_path=_REACHED_CSV):
             csv.writer(f).writerow(_REACHED_HDR)
 
 
-def append_reached_timeseries(agents: int, targets: int, model_name: str, reached_series, csv_path=_REACHED_CSV):
-    """Write per-time-step counts: one row per time step."""
-    _ensure_reached_csv(csv_path)
+def append_reached_timeseries(agents: int, targets: int, model_name: str, reached_series, csv_path=_REACHED_CSV,
+                              sampling=SAMPLE_ALL):
+    """Write per-time-step counts: one row per sampled time step (or one slice of a *.cols store)."""
+    steps, values = sampling.apply(np.asarray(list(reached_series), dtype=float))
     rows = []
-    for i, val in enumerate(reached_series, start=1):
+    for i, val in zip(steps.tolist(), values.tolist()):
         try:
-            y = int(val)
+            # ensemble means are fractional; plain runs stay integer
+            y = int(val) if float(val).is_integer() else float(val)
         except Exception:
             y = 0
         rows.append([agents, targets, model_name, i, y])
+    if is_columnar_store(csv_path):
+        _write_slice_rows(csv_path, _REACHED_HDR, rows)
+        return
+    _ensure_reached_csv(csv_path)
     with open(csv_path, 'a', newline='') as f:
         csv.writer(f).writerows(rows)
 
 
+_STOPS_CSV = 'Data/stop_steps.csv'
+_STOPS_HDR = ['agents', 'targets', 'model', 'stopped_at', 'max_steps', 'reason']
+
+
+def append_stop_step(agents: int, targets: int, model_name: str, stopped_at, max_steps, reason,
+                     csv_path=_STOPS_CSV):
+    """One row per sweep run with stopping criteria: the step it ended at and the rule that fired."""
+    os.makedirs(os.path.dirname(csv_path) or ".", exist_ok=True)
+    if not (os.path.exists(csv_path) and os.path.getsize(csv_path) > 0):
+        with open(csv_path, 'w', newline='') as f:
+            csv.writer(f).writerow(_STOPS_HDR)
+    with open(csv_path, 'a', newline='') as f:
+        csv.writer(f).writerow([agents, targets, model_name, stopped_at, max_steps, reason or ''])
+
+
+# ---------- Declarative sweeps: one summary row per run ----------
+
+SWEEP_OUTCOMES = ['checkpoints', 'final_dir_mismatch', 'mean_dir_mismatch', 'mean_collisions',
+                  'final_phase_sync', 'final_decision_accuracy', 'final_agents_reached', 'steps',
+                  'stopped_at', 'stop_reason']
+
+
+def sweep_outcomes(mismatch_series, collision_series, phase_series, accuracy_series, reached_series, stopped=None):
+    """Scalar outcomes of one run (SWEEP_OUTCOMES order) from its checkpoint and per-step series."""
+    mis = np.asarray(mismatch_series, dtype=float)
+    col = np.asarray(collision_series, dtype=float)
+    phs = np.asarray(phase_series, dtype=float)
+    acc = np.asarray(accuracy_series, dtype=float)
+    reached = np.asarray(reached_series, dtype=float)
+
+    def last(a):
+        return float(a[-1]) if a.size else ''
+
+    def mean(a):
+        return float(a.mean()) if a.size else ''
+
+    stopped_at, reason = stopped if stopped else ('', '')
+    return [len(mis), last(mis), mean(mis), mean(col), last(phs), last(acc), last(reached), len(reached),
+            stopped_at, reason or '']
+
+
+def start_sweep_points(csv_path, fields):
+    """Start (overwrite) the per-run table of a declarative sweep."""
+    os.makedirs(os.path.dirname(csv_path) or ".", exist_ok=True)
+    with open(csv_path, 'w', newline='') as f:
+        csv.writer(f).writerow(fields)
+
+
+def append_sweep_point(csv_path, row):
+    with open(csv_path, 'a', newline='') as f:
+        csv.writer(f).writerow(row)
+
+
+# ---------- Columnar results store ----------
+#
+# A store is a directory `<name>.cols/` holding one `<A>A_<T>T_<model>.npz` per (agents, targets, model)
+# slice with one array per remaining column, plus `index.json` (the CSV header and, per slice, its
+# file, row count and columns). Reading a slice only opens its own file.
+
+STORE_SUFFIX = '.cols'
+_STORE_INDEX = 'index.json'
+_SLICE_KEYS = ['agents', 'targets', 'model']
+
+
+def is_columnar_store(path):
+    return str(path).endswith(STORE_SUFFIX)
+
+
+def columnar_path(csv_path):
+    """Data/sweep_results.csv -> Data/sweep_results.cols"""
+    return str(Path(csv_path).with_suffix(STORE_SUFFIX))
+
+
+def _slice_id(agents, targets, model_name):
+    return f"{int(agents)}A_{int(targets)}T_{model_name.replace(' ', '_')}"
+
+
+def _read_store_index(store_path):
+    index_file = Path(store_path) / _STORE_INDEX
+    if not index_file.exists():
+        return {'fields': [], 'slices': {}}
+    with open(index_file, 'r') as f:
+        return json.load(f)
+
+
+def _write_store_index(store_path, index):
+    index_file = Path(store_path) / _STORE_INDEX
+    tmp = index_file.with_suffix('.tmp')
+    with open(tmp, 'w') as f:
+        json.dump(index, f, indent=1)
+    os.replace(tmp, index_file)
+
+
+def write_store_slice(store_path, agents: int, targets: int, model_name: str, columns, fields):
+    """Write (or replace) one slice; `columns` maps column name -> 1-D array, `fields` is the CSV header."""
+    Path(store_path).mkdir(parents=True, exist_ok=True)
+    sid = _slice_id(agents, targets, model_name)
+    arrays = {k: np.asarray(v) for k, v in columns.items()}
+    np.savez(Path(store_path) / f'{sid}.npz', **arrays)
+
+    index = _read_store_index(store_path)
+    index['fields'] = list(fields)
+    index['slices'][sid] = {'agents': int(agents), 'targets': int(targets), 'model': model_name,
+                            'file': f'{sid}.npz', 'rows': int(max((len(a) for a in arrays.values()), default=0)),
+                            'columns': list(arrays)}
+    _write_store_index(store_path, index)
+
+
+def record_sampling(results_path, **policies):
+    """
+    Store the SamplingPolicy of each written series as output metadata: in index.json for a
+    columnar store, in <name>.meta.json next to a CSV.
+    """
+    sampling = {name: policy.describe() for name, policy in policies.items()}
+    if is_columnar_store(results_path):
+        Path(results_path).mkdir(parents=True, exist_ok=True)
+        index = _read_store_index(results_path)
+        index['sampling'] = sampling
+        _write_store_index(results_path, index)
+        return str(Path(results_path) / _STORE_INDEX)
+    path = Path(results_path).with_suffix('.meta.json')
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump({'sampling': sampling}, f, indent=1)
+    return str(path)
+
+
+def _write_slice_rows(store_path, fields, rows):
+    """Rows of one (agents, targets, model) slice, laid out like the CSV, -> write_store_slice."""
+    if not rows:
+        return
+    agents, targets, model_name = rows[0][:3]
+    columns = {name: np.array([row[j] for row in rows]) for j, name in enumerate(fields) if name not in _SLICE_KEYS}
+    write_store_slice(store_path, agents, targets, model_name, columns, fields)
+
+
+def read_store_slice(store_path, agents: int, targets: int, model_name: str, columns=None):
+    """Columns of one slice as {name: array}, or None if the slice is not in the store."""
+    meta = _read_store_index(store_path)['slices'].get(_slice_id(agents, targets, model_name))
+    if meta is None:
+        return None
+    return _load_slice(store_path, meta, columns)
+
+
+def _load_slice(store_path, meta, columns=None):
+    with np.load(Path(store_path) / meta['file']) as data:
+        return {k: data[k] for k in (columns or meta['columns']) if k in data.files}
+
+
+def iter_store_slices(store_path, agents=None, targets=None, models=None, columns=None):
+    """Yield (slice metadata, {column: array}) for the slices matching the given agent/target/model sets."""
+    if not Path(store_path).is_dir():
+        raise FileNotFoundError(f'Results store not found: {store_path}')
+    for meta in _read_store_index(store_path)['slices'].values():
+        if agents is not None and meta['agents'] not in agents:
+            continue
+        if targets is not None and meta['targets'] not in targets:
+            continue
+        if models is not None and meta['model'] not in models:
+            continue
+        yield meta, _load_slice(store_path, meta, columns)
+
+
+def export_store_to_csv(store_path, csv_path=None):
+    """Write a columnar store back out in its CSV layout (default: <name>.csv next to it)."""
+    csv_path = csv_path or str(Path(store_path).with_suffix('.csv'))
+    fields = _read_store_index(store_path)['fields']
+    os.makedirs(os.path.dirname(csv_path) or ".", exist_ok=True)
+    with open(csv_path, 'w', newline='') as f:
+        w = csv.writer(f)
+        w.writerow(fields)
+        for meta, cols in iter_store_slices(store_path):
+            for i in range(meta['rows']):
+                w.writerow([meta[k] if k in _SLICE_KEYS else cols[k][i].item() for k in fields])
+    return csv_path
+
+
 def _read_csv_dicts(csv_path):
     if not os.path.exists(csv_path):
         raise FileNotFoundError(f'CSV not found: {csv_path}')
@@ -244,110 +593,221 @@ def _read_csv_dicts(csv_path):
 
 
 # ---------- Plotting ----------
-
-def _plot_by_agents_targets(csv_path, value_key, fig_prefix, ylabel, xlabel, ylim=None, model_filter=None, legend_title='Model'):
+#
+# All comparison figures go through one pipeline: the results are loaded and grouped once into an
+# index {(agents, targets, model): {column: (xs, ys)}}, each figure (family, A) gets its slice of that
+# index, figures whose slice hashes to the value recorded at their last render are skipped, and the
+# rest are rendered (in worker processes when workers > 1).
+
+_WANTED_AGENTS = [10, 20, 30, 40]
+_WANTED_TARGETS = [2, 10]
+_MODEL_ORDER = ['Majority Model', 'Voter Model', 'Kuramoto Model']
+_FIGURE_HASHES = 'Data/.figure_hashes.json'
+
+# family -> (value column, ylabel, xlabel, model filter, legend title); 'AgentsReached' reads the reached timeseries
+FIGURE_FAMILIES = {
+    'DirectionMismatch': ('avg_dir_mismatch', 'Avg. direction mismatch (rad)', 'Consensus Period', None, 'Model'),
+    'Collision': ('avg_collisions', 'Avg. collision count', 'Consensus Period', None, 'Model'),
+    'PhaseSync': ('avg_phase_sync', 'Avg. phase synchronization', 'Consensus Period', {'Kuramoto Model'}, 'Kuramoto'),
+    'AgentsReached': ('agents_reached', 'Decision Accuracy (Agent reached target)', 'Time Step', None, 'Model'),
+}
+
+
+def _model_wanted(model, model_filter):
+    if model_filter is None:
+        return True
+    if isinstance(model_filter, set):
+        return model in model_filter
+    if callable(model_filter):
+        return model_filter(model)
+    return True
+
+
+def _sorted_series(points):
+    xs = np.array([p[0] for p in points], dtype=np.int64)
+    ys = np.array([p[1] for p in points], dtype=float)
+    order = np.argsort(xs, kind='stable')
+    return xs[order], ys[order]
+
+
+def _index_from_csv(csv_path, value_keys):
     fields, rows_src = _read_csv_dicts(csv_path)
-    if value_key not in fields:
-        raise ValueError(f"CSV does not contain '{value_key}': {csv_path}")
-
-    rows = []
+    points = {}
     for row in rows_src:
         try:
-            model = row['model']
-            if model_filter is not None:
-                if isinstance(model_filter, set):
-                    if model not in model_filter:
-                        continue
-                elif callable(model_filter):
-                    if not model_filter(model):
-                        continue
-            rows.append({
-                'agents': int(row['agents']),
-                'targets': int(row['targets']),
-                'model': model,
-                'x': int(row.get('checkpoint', row.get('step'))),  # supports both styles
-                'y': float(row[value_key]),
-            })
+            key = (int(row['agents']), int(row['targets']), row['model'])
+            x = int(row.get('checkpoint', row.get('step')))  # supports both styles
         except Exception:
             continue
+        for value_key in value_keys:
+            try:
+                y = float(row[value_key])
+            except Exception:
+                continue
+            points.setdefault(key, {}).setdefault(value_key, []).append((x, y))
+    index = {key: {k: _sorted_series(p) for k, p in cols.items()} for key, cols in points.items()}
+    return fields, index
+
+
+def _index_from_store(store_path, value_keys):
+    """Only the wanted (A, T) slices and the requested columns are read."""
+    fields = _read_store_index(store_path)['fields']
+    index = {}
+    slices = iter_store_slices(store_path, agents=set(_WANTED_AGENTS), targets=set(_WANTED_TARGETS),
+                               columns=['checkpoint', 'step'] + list(value_keys))
+    for meta, cols in slices:
+        x_key = 'checkpoint' if 'checkpoint' in cols else 'step'
+        entry = index.setdefault((meta['agents'], meta['targets'], meta['model']), {})
+        for value_key in value_keys:
+            if value_key in cols:
+                entry[value_key] = _sorted_series(list(zip(cols[x_key].tolist(), cols[value_key].tolist())))
+    return fields, index
+
+
+def load_results_index(path, value_keys):
+    """
+    Group a results CSV or *.cols store once into {(agents, targets, model): {value_key: (xs, ys)}}
+    (sorted by checkpoint / step). Returns (available columns, index).
+    """
+    if is_columnar_store(path):
+        return _index_from_store(path, value_keys)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f'CSV not found: {path}')
+    return _index_from_csv(path, value_keys)
 
-    wanted_agents = [10, 20, 30, 40]
-    wanted_targets = [2, 10]
-    model_order = ['Majority Model', 'Voter Model', 'Kuramoto Model']
 
-    for A in wanted_agents:
-        data_2 = {}
-        data_10 = {}
-        for r in rows:
-            if r['agents'] != A or r['targets'] not in wanted_targets:
-                continue
-            bucket = data_2 if r['targets'] == 2 else data_10
-            bucket.setdefault(r['model'], []).append((r['x'], r['y']))
-
-        for bucket in (data_2, data_10):
-            for k in list(bucket.keys()):
-                bucket[k].sort(key=lambda t: t[0])
-
-        _ensure_data_dir()
-        fig, axes = plt.subplots(1, 2, figsize=(12, 5), sharey=True)
-
-        # left: 2 targets
-        ax = axes[0]
-        plotted = False
-        for m in model_order:
-            if m in data_2 and data_2[m]:
-                xs, ys = zip(*data_2[m])
-                ax.plot(xs, ys, label=m)
-                plotted = True
-        ax.set_title(f'{A} agents, 2 targets')
-        ax.set_xlabel(xlabel)
-        ax.set_ylabel(ylabel)
-        if ylim is not None:
-            ax.set_ylim(*ylim)
-        if plotted:
-            ax.legend(title=legend_title, loc='best')
-
-        # right: 10 targets
-        ax = axes[1]
-        plotted = False
-        for m in model_order:
-            if m in data_10 and data_10[m]:
-                xs, ys = zip(*data_10[m])
-                ax.plot(xs, ys, label=m)
-                plotted = True
-        ax.set_title(f'{A} agents, 10 targets')
-        ax.set_xlabel(xlabel)
-        if ylim is not None:
-            ax.set_ylim(*ylim)
-        if plotted:
-            ax.legend(title=legend_title, loc='best')
-
-        # fig.suptitle(f'{ylabel} — {A} agents', fontsize=12)
-        fig.tight_layout(rect=[0, 0, 1, 0.95])
-        fig.savefig(f'Data/{fig_prefix}_{A}A_2T_vs_10T.png', dpi=150)
-        plt.close(fig)
-
-
-# Existing comparison plots (unchanged)
-def plot_figures_from_csv(csv_path):
-    _plot_by_agents_targets(csv_path, 'avg_dir_mismatch', 'DirectionMismatch',
-                            'Avg. direction mismatch (rad)', 'Consensus Period', ylim=None, model_filter=None, legend_title='Model')
-
-
-def plot_collision_figures_from_csv(csv_path):
-    _plot_by_agents_targets(csv_path, 'avg_collisions', 'Collision',
-                            'Avg. collision count', 'Consensus Period', ylim=None, model_filter=None, legend_title='Model')
-
-
-def plot_phase_figures_from_csv(csv_path):
-    _plot_by_agents_targets(csv_path, 'avg_phase_sync', 'PhaseSync',
-                            'Avg. phase synchronization', 'Consensus Period', ylim=None, model_filter={'Kuramoto Model'}, legend_title='Kuramoto')
+def _figure_jobs(family, index, fields, source):
+    value_key, ylabel, xlabel, model_filter, legend_title = FIGURE_FAMILIES[family]
+    if value_key not in fields:
+        raise ValueError(f"Results do not contain '{value_key}': {source}")
+    jobs = []
+    for A in _WANTED_AGENTS:
+        panels = []
+        for T in _WANTED_TARGETS:
+            lines = []
+            for m in _MODEL_ORDER:
+                series = index.get((A, T, m), {}).get(value_key)
+                if _model_wanted(m, model_filter) and series is not None and len(series[0]):
+                    lines.append((m, series[0], series[1]))
+            panels.append((T, lines))
+        jobs.append({'out': f'Data/{family}_{A}A_2T_vs_10T.png', 'A': A, 'panels': panels,
+                     'ylabel': ylabel, 'xlabel': xlabel, 'legend_title': legend_title, 'ylim': None})
+    return jobs
+
+
+def _figure_hash(job):
+    h = hashlib.sha1()
+    h.update(repr((job['out'], job['ylabel'], job['xlabel'], job['legend_title'], job['ylim'])).encode())
+    for T, lines in job['panels']:
+        h.update(f'|{T}'.encode())
+        for m, xs, ys in lines:
+            h.update(m.encode())
+            h.update(np.ascontiguousarray(xs).tobytes())
+            h.update(np.ascontiguousarray(ys).tobytes())
+    return h.hexdigest()
+
+
+def _render_figure(job):
+    """Draw one 2-targets vs 10-targets comparison figure (process-pool entry point)."""
+    fig, axes = plt.subplots(1, 2, figsize=(12, 5), sharey=True)
+    for ax, (T, lines) in zip(axes, job['panels']):
+        for m, xs, ys in lines:
+            ax.plot(xs, ys, label=m)
+        ax.set_title(f"{job['A']} agents, {T} targets")
+        ax.set_xlabel(job['xlabel'])
+        if ax is axes[0]:
+            ax.set_ylabel(job['ylabel'])
+        if job['ylim'] is not None:
+            ax.set_ylim(*job['ylim'])
+        if lines:
+            ax.legend(title=job['legend_title'], loc='best')
+
+    fig.tight_layout(rect=[0, 0, 1, 0.95])
+    fig.savefig(job['out'], dpi=150)
+    plt.close(fig)
+    return job['out']
+
+
+def _read_figure_hashes():
+    if not os.path.exists(_FIGURE_HASHES):
+        return {}
+    try:
+        with open(_FIGURE_HASHES, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def render_figures(jobs, workers=1, force=False):
+    """
+    Render figure jobs, skipping those whose output exists and whose input hash is unchanged since
+    the last render. Returns the list of figures written.
+    """
+    _ensure_data_dir()
+    hashes = _read_figure_hashes()
+    todo = []
+    for job in jobs:
+        digest = _figure_hash(job)
+        if not force and hashes.get(job['out']) == digest and os.path.exists(job['out']):
+            continue
+        todo.append((job, digest))
+
+    if workers > 1 and len(todo) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=min(workers, len(todo))) as pool:
+            written = list(pool.map(_render_figure, [job for job, _ in todo]))
+    else:
+        written = [_render_figure(job) for job, _ in todo]
+
+    for job, digest in todo:
+        hashes[job['out']] = digest
+    with open(_FIGURE_HASHES, 'w') as f:
+        json.dump(hashes, f, indent=1, sort_keys=True)
+    return written
+
+
+def plot_all_figures(csv_path='Data/sweep_results.csv', reached_path=_REACHED_CSV, families=None,
+                     workers=1, force=False):
+    """
+    Build every requested figure family with one load of each results file.
+    Missing inputs are skipped with a note; returns the list of figures written.
+    """
+    families = list(families or FIGURE_FAMILIES)
+    jobs = []
+    for path, wanted in ((csv_path, [f for f in families if f != 'AgentsReached']),
+                         (reached_path, [f for f in families if f == 'AgentsReached'])):
+        if not wanted:
+            continue
+        if not os.path.exists(path):
+            print(f'Skipping {", ".join(wanted)}: {path} not found')
+            continue
+        fields, index = load_results_index(path, [FIGURE_FAMILIES[f][0] for f in wanted])
+        for family in wanted:
+            jobs.extend(_figure_jobs(family, index, fields, path))
+    return render_figures(jobs, workers=workers, force=force)
+
+
+def _plot_family(path, family, workers=1, force=False):
+    fields, index = load_results_index(path, [FIGURE_FAMILIES[family][0]])
+    return render_figures(_figure_jobs(family, index, fields, path), workers=workers, force=force)
+
+
+# Existing comparison plots
+def plot_figures_from_csv(csv_path, workers=1, force=False):
+    return _plot_family(csv_path, 'DirectionMismatch', workers, force)
+
+
+def plot_collision_figures_from_csv(csv_path, workers=1, force=False):
+    return _plot_family(csv_path, 'Collision', workers, force)
+
+
+def plot_phase_figures_from_csv(csv_path, workers=1, force=False):
+    return _plot_family(csv_path, 'PhaseSync', workers, force)
 
 
 # NEW: per-time-step agents reached
-def plot_reached_figures_from_csv(csv_path='Data/reached_timeseries.csv'):
-    _plot_by_agents_targets(csv_path, 'agents_reached', 'AgentsReached',
-                            'Decision Accuracy (Agent reached target)', 'Time Step', ylim=None, model_filter=None, legend_title='Model')
+def plot_reached_figures_from_csv(csv_path=_REACHED_CSV, workers=1, force=False):
+    return _plot_family(csv_path, 'AgentsReached', workers, force)
 
 
 # Optional single-run quick plot (unchanged)
@@ -360,12 +820,11 @@ def plot_performance_graph(model_name, performance_data, params=None):
         num_agents = swarm_params.get('NUM_AGENTS')
         num_targets = env_params.get('NUM_TARGET')
 
-    series = _series_from_perf(performance_data, 'dir_mismatch')
-    if not series:
+    y = _avg_mismatch_series(performance_data)
+    if not y:
         return
 
-    x = list(range(1, len(series) + 1))
-    y = [(sum(step) / len(step)) if step else 0.0 for step in series]
+    x = list(range(1, len(y) + 1))
     plt.plot(x, y, label='Avg. direction mismatch')
     plt.xlabel('Consensus checkpoints')
     plt.ylabel('Average mismatch (rad)')
@@ -1,134 +1,611 @@
-import os
+import contextlib
+import io
+import json
+import multiprocessing
+import random
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
 from Environment.SimEnv import SimEnv
+from Environment.SimHurdle import HurdleField
+from Environment.SimProfiler import PhaseTimer, NULL_TIMER, format_report
+from Environment.SimStopping import StopCriteria
+from Environment.SimMetrics import order_parameters
+from Environment.SimKernels import set_backend, kernel_backend
 from Utils.config import setup_perser, set_params
+from Utils import benchmark
+from Utils import checks
+from Utils.sampling import SamplingPolicy
+from Utils import sweep
 from Utils.utils import (
     display_simulation_config,
-    simulation_init,
-    read_from_file,
+    make_scenario,
+    scenario_as_tuples,
+    export_scenario,
+    load_scenario,
     plot_performance_graph,
     _avg_mismatch_series,
     _avg_collision_series,
     _avg_phase_series,
     _avg_accuracy_series,
+    pad_series,
+    padded_checkpoints,
+    append_stop_step,
     append_metrics_to_csv,
     append_reached_timeseries,        # NEW
+    append_ensemble_summary,
+    save_ensemble_replicates,
+    record_sampling,
+    SWEEP_OUTCOMES,
+    sweep_outcomes,
+    start_sweep_points,
+    append_sweep_point,
     plot_figures_from_csv,            # direction mismatch
     plot_collision_figures_from_csv,  # collisions
     plot_phase_figures_from_csv,      # kuramoto-only phase
     plot_reached_figures_from_csv,    # NEW: agents reached per time step
+    plot_all_figures,
+    is_columnar_store,
+    columnar_path,
+    export_store_to_csv,
     _ensure_data_dir,
 )
 from Model.CollectiveDecisionModel import MajorityRuleModel, VoterModel, KuramotoModel
+from Model.VectorizedModel import VectorizedMajorityRuleModel, VectorizedVoterModel, VectorizedKuramotoModel
+from Model.EnsembleModel import EnsembleMajorityRuleModel, EnsembleVoterModel, EnsembleKuramotoModel
+
+# engine -> model_key -> model class
+MODEL_CLASSES = {
+    'object': {
+        'majority': MajorityRuleModel,
+        'voter': VoterModel,
+        'kuramoto': KuramotoModel,
+    },
+    'vector': {
+        'majority': VectorizedMajorityRuleModel,
+        'voter': VectorizedVoterModel,
+        'kuramoto': VectorizedKuramotoModel,
+    },
+}
+
+ENSEMBLE_CLASSES = {
+    'majority': EnsembleMajorityRuleModel,
+    'voter': EnsembleVoterModel,
+    'kuramoto': EnsembleKuramotoModel,
+}
+
+
+def _apply_cli_overrides(params, args):
+    """Copy swarm-parameter overrides given on the command line into params (in place)."""
+    env_params, swarm_params = params
+    if getattr(args, 'verlet_skin', None) is not None:
+        swarm_params['VERLET_SKIN'] = args.verlet_skin
+    return params
+
+
+def make_model(model_key, agent_pos, targets, params, engine='object', update_order=None):
+    """
+    update_order None: 'sequential', the object models' order, for both engines. 'synchronous' is the
+    vector engine's fast path (and the object voter model's CSR step), a different update rule.
+    """
+    if model_key not in MODEL_CLASSES[engine]:
+        raise ValueError(f'Unknown model_key: {model_key}')
+    cls = MODEL_CLASSES[engine][model_key]
+    update_order = update_order or 'sequential'
+    if engine == 'vector' or model_key == 'voter':
+        return cls(agent_pos, targets, params, update_order=update_order)
+    return cls(agent_pos, targets, params)
 
 
-def _run_one(params, model_key, max_steps=0):
+def _run_one(params, model_key, max_steps=0, engine='object', update_order=None, headless=True,
+             initial_conditions=None, timer=None, stop=None, restore=None):
     """
     Run one model configuration and return averaged metric series + per-step reached counts.
+    initial_conditions is a Scenario (or [agent_pos, targets, hurdles]); without it a fresh one is
+    drawn from the global random stream. A PhaseTimer passed as timer records the run's phases.
+    With a StopCriteria the run may end early; its series are then padded with their last value to
+    full length and the last element is (stopped_at, reason), else None.
+    restore: snapshot file to continue from (a what-if branch of an earlier run; see SimEnv.snapshot).
     """
-    # (Re)generate initial conditions for this run
-    simulation_init(params)
-    data_list = read_from_file()
-    agent_pos = [tuple(e) for e in data_list[0]]
-    targets   = [tuple(e) for e in data_list[1]]
-    hurdles   = [tuple(e) for e in data_list[2]]
-
-    simEnv = SimEnv(params, targets)
-
-    if model_key == 'majority':
-        simEnv.model = MajorityRuleModel(agent_pos, targets, params)
-        pretty = 'Majority Model'
-    elif model_key == 'voter':
-        simEnv.model = VoterModel(agent_pos, targets, params)
-        pretty = 'Voter Model'
-    elif model_key == 'kuramoto':
-        simEnv.model = KuramotoModel(agent_pos, targets, params)
-        pretty = 'Kuramoto Model'
-    else:
-        raise ValueError(f'Unknown model_key: {model_key}')
+    if initial_conditions is None:
+        initial_conditions = make_scenario(params)
+    agent_pos, targets, hurdles = scenario_as_tuples(initial_conditions)
+
+    simEnv = SimEnv(params, targets, headless=headless, timer=timer)
+
+    simEnv.model = make_model(model_key, agent_pos, targets, params, engine, update_order)
+    pretty = simEnv.model.Name
 
-    perf = simEnv.run_simulation(hurdles, targets, max_steps=max_steps)
+    if restore:
+        simEnv.restore(restore)
+    perf = simEnv.run_simulation(hurdles, targets, max_steps=max_steps, stop=stop, resume=bool(restore))
     # Grab per-timestep reached counts BEFORE closing
     reached_counts = list(simEnv.reached_counts)
+    stopped_at, reason = simEnv.stopped_at, simEnv.stop_reason
     simEnv.close_sim()
 
     # Average series per checkpoint for the legacy CSV
-    return (pretty,
-            _avg_mismatch_series(perf),
-            _avg_collision_series(perf),
-            _avg_phase_series(perf),
-            _avg_accuracy_series(perf),
-            reached_counts)
+    series = [_avg_mismatch_series(perf),
+              _avg_collision_series(perf),
+              _avg_phase_series(perf),
+              _avg_accuracy_series(perf)]
+    if stopped_at is not None:
+        extra = padded_checkpoints(max_steps, stopped_at, params[1]['CONSENSUS_PERIOD'])
+        series = [pad_series(s, extra) for s in series]
+        reached_counts = pad_series(reached_counts, max_steps - stopped_at)
+    stopped = None if stop is None else (stopped_at or max_steps, reason)
+    return (pretty, *series, reached_counts, stopped)
+
+
+def _run_ensemble(params, model_key, seeds, max_steps, scenario_seeds=None, timer=None, stop=None):
+    """
+    Run one replicate per seed of the same configuration as a single vectorized ensemble.
+    Replicate r uses the scenario of scenario_seeds[r] (default: seeds[r]) and starts exactly like
+    a single sweep run with that scenario and run seed seeds[r].
+    With a StopCriteria the ensemble stops once a rule holds for every replicate (series padded).
+    Returns (model name, {metric: (replicates, points) array}, (stopped_at, reason) or None).
+    """
+    if not max_steps:
+        raise ValueError('An ensemble run needs max_steps > 0')
+    if scenario_seeds is None:
+        scenario_seeds = seeds
+    scenarios, rng_states = [], []
+    for seed, scenario_seed in zip(seeds, scenario_seeds):
+        scenarios.append(make_scenario(params, scenario_seed))
+        random.seed(int(seed))
+        np.random.seed(int(seed))
+        rng_states.append((random.getstate(), np.random.get_state()))
+
+    model = ENSEMBLE_CLASSES[model_key](scenarios, params, rng_states=rng_states)
+    # one field for all replicates; group tags each hurdle with its replicate
+    per_replicate = [np.asarray(scenario[2], dtype=float).reshape(-1, 4) for scenario in scenarios]
+    hurdles = HurdleField(np.concatenate(per_replicate),
+                          group=np.repeat(np.arange(len(scenarios)), [len(h) for h in per_replicate]))
+    metrics = [[], [], [], [], []] if model.Name == 'Kuramoto Model' else [[], [], []]
+    target_size = params[0]['TARGET_SIZE']
+    reached = np.zeros((model.replicates, max_steps), dtype=int)
+
+    timer = NULL_TIMER if timer is None else timer
+    model.timer = timer
+    if stop is not None:
+        stop.reset()
+    stopped_at, checkpoints = None, 0
+    timer.start()
+    for time_count in range(1, max_steps + 1):
+        with timer.phase('hurdles'):
+            hurdles.update_hurdle_position(time_count)
+        with timer.phase('model.update'):
+            model.update(time_count, hurdles, metrics)
+        with timer.phase('reached'):
+            reached[:, time_count - 1] = model.agents_reached(target_size)
+        timer.step()
+
+        if stop is not None:
+            with timer.phase('stop'):
+                done = stop.check_step(time_count, reached[:, time_count - 1] / model.agents_per_replicate)
+                if not done and len(metrics[0]) > checkpoints:
+                    checkpoints = len(metrics[0])
+                    order = None
+                    if stop.wants_order:
+                        order = order_parameters(model._per_replicate(model.directions))
+                    done = stop.check_checkpoint(time_count, metrics[0][-1], order)
+            if done:
+                stopped_at = time_count
+                break
+    timer.stop()
+
+    if stopped_at is not None:
+        extra = padded_checkpoints(max_steps, stopped_at, params[1]['CONSENSUS_PERIOD'])
+        metrics = [pad_series(m, extra) for m in metrics]
+        reached[:, stopped_at:] = reached[:, stopped_at - 1:stopped_at]
+
+    def per_replicate(entries):
+        return np.array(entries, dtype=float).reshape(-1, model.replicates).T
+
+    series = {
+        'dir_mismatch': per_replicate(metrics[0]),
+        'collisions': per_replicate(metrics[1]),
+        'phase_synchronization': per_replicate(metrics[2]) if len(metrics) == 5 else np.zeros((model.replicates, 0)),
+        'order_parameter': per_replicate(metrics[3]) if len(metrics) == 5 else np.zeros((model.replicates, 0)),
+        'decision_accuracy': per_replicate(metrics[-1]),
+        'agents_reached': reached,
+    }
+    stopped = None if stop is None else (stopped_at or max_steps, stop.reason)
+    return model.Name, series, stopped
+
+
+def _stop_rules(args):
+    """StopCriteria keyword arguments from the --stop-* flags, or None when no rule is set."""
+    rules = {'reached_fraction': getattr(args, 'stop_reached', None),
+             'mismatch_below': getattr(args, 'stop_mismatch', None),
+             'order_above': getattr(args, 'stop_order', None)}
+    if all(v is None for v in rules.values()):
+        return None
+    return {**rules, 'patience': args.stop_patience, 'min_steps': args.stop_min_steps}
+
+
+def _sweep_jobs(env0, sw0, args):
+    """
+    One job per sweep cell: agents {10,20,30,40} × targets {2,10} × models {majority,voter,kuramoto}.
+    Each job carries its own run seed, spawned from --seed, so a cell's result does not depend on
+    which process runs it or in which order. The scenario seed is shared by all models of an
+    (A, T) cell, so model comparisons are paired on identical initial conditions.
+    """
+    agent_sizes  = [10, 20, 30, 40]
+    target_sizes = [2, 10]
+    model_keys   = ['majority', 'voter', 'kuramoto']
+
+    cells = [(A, T, mk) for A in agent_sizes for T in target_sizes for mk in model_keys]
+    scenario_ss, run_ss = np.random.SeedSequence(args.seed).spawn(2)
+    configs = [(A, T) for A in agent_sizes for T in target_sizes]
+    scenario_seeds = dict(zip(configs, scenario_ss.generate_state(len(configs))))
+    seeds = run_ss.generate_state(len(cells))
+    jobs = []
+    for (A, T, mk), seed in zip(cells, seeds):
+        # Fresh params for this (A, T)
+        env = dict(env0)
+        swarm = dict(sw0)
+        swarm['NUM_AGENTS'] = A
+        env['NUM_TARGET']   = T
+        jobs.append({'A': A, 'T': T, 'model_key': mk, 'params': [env, swarm], 'seed': int(seed),
+                     'scenario_seed': int(scenario_seeds[(A, T)]),
+                     'max_steps': args.max_steps, 'engine': args.engine, 'update_order': args.update_order,
+                     'replicates': max(1, int(getattr(args, 'replicates', 1) or 1)),
+                     'profile': getattr(args, 'profile', False), 'stop': _stop_rules(args)})
+    return jobs
+
+
+def _run_job(job):
+    """
+    Run one sweep cell from its own seed and cached in-memory scenario (process-pool entry point).
+    With replicates > 1 the cell is an ensemble whose replicate run and scenario seeds are spawned from
+    the cell's seeds; the result then carries the replicate means plus the per-replicate series.
+    With profile set, the last element is the cell's PhaseTimer report (otherwise None).
+    """
+    timer = PhaseTimer() if job.get('profile') else None
+    stop = StopCriteria(**job['stop']) if job.get('stop') else None
+    if job['replicates'] > 1:
+        seeds = np.random.SeedSequence(job['seed']).generate_state(job['replicates'])
+        scenario_seeds = np.random.SeedSequence(job['scenario_seed']).generate_state(job['replicates'])
+        name, series, stopped = _run_ensemble(job['params'], job['model_key'], seeds, job['max_steps'],
+                                              scenario_seeds=scenario_seeds, timer=timer, stop=stop)
+        means = {k: v.mean(axis=0) if v.size else np.zeros(0) for k, v in series.items()}
+        result = (name, means['dir_mismatch'], means['collisions'], means['phase_synchronization'],
+                  means['decision_accuracy'], means['agents_reached'], stopped)
+        ensemble = (series, seeds)
+    else:
+        initial_conditions = make_scenario(job['params'], job['scenario_seed'])
+        random.seed(job['seed'])
+        np.random.seed(job['seed'])
+        result = _run_one(job['params'], job['model_key'], max_steps=job['max_steps'], engine=job['engine'],
+                          update_order=job['update_order'], initial_conditions=initial_conditions, timer=timer,
+                          stop=stop)
+        ensemble = None
+    report = None
+    if timer is not None:
+        report = timer.report(agents=job['A'], targets=job['T'], model=result[0], engine=job['engine'],
+                              replicates=job['replicates'])
+    return job['A'], job['T'], result, ensemble, report
+
+
+def _stream_jobs(jobs, workers):
+    """
+    Yield (job, _run_job(job)) in job order while pulling jobs lazily from an iterator; with a pool
+    at most 2 * workers jobs are in flight, so a long design never sits in memory at once.
+    The single pool path of --batch and --sweep-spec.
+    """
+    if workers == 1:
+        for job in jobs:
+            yield job, _run_job(job)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for job in jobs:
+            pending.append((job, pool.submit(_run_job, job)))
+            if len(pending) >= 2 * workers:
+                done, future = pending.popleft()
+                yield done, future.result()
+        while pending:
+            done, future = pending.popleft()
+            yield done, future.result()
+
+
+def _spec_jobs(points, models, args):
+    """
+    Lazily expand design points into jobs (one per point and model). Like the fixed sweep, the
+    scenario seed is shared by the models of a point and every job has its own run seed; both are
+    spawned in order from --seed, so results do not depend on the worker count.
+    """
+    scenario_ss, run_ss = np.random.SeedSequence(args.seed).spawn(2)
+    for index, (point, params) in enumerate(points):
+        scenario_seed = int(scenario_ss.spawn(1)[0].generate_state(1)[0])
+        for mk in models:
+            yield {'point': index, 'values': point,
+                   'A': params[1]['NUM_AGENTS'], 'T': params[0]['NUM_TARGET'], 'model_key': mk, 'params': params,
+                   'seed': int(run_ss.spawn(1)[0].generate_state(1)[0]), 'scenario_seed': scenario_seed,
+                   'max_steps': args.max_steps, 'engine': args.engine, 'update_order': args.update_order,
+                   'replicates': max(1, int(getattr(args, 'replicates', 1) or 1)),
+                   'profile': getattr(args, 'profile', False), 'stop': _stop_rules(args)}
+
+
+def _spec_sweep(args):
+    """
+    Declarative sweep from a spec file (see Utils/sweep.py): design points over any set_params
+    field, expanded lazily into jobs and streamed through the runner. Each run adds one row of
+    swept values and scalar outcomes to the points table; the spec and design go to <table>.meta.json.
+    """
+    if not args.max_steps:
+        raise SystemExit('--sweep-spec needs a step limit, e.g. -t 600')
+    base = _apply_cli_overrides(set_params(), args)
+    try:
+        spec = sweep.load_spec(args.sweep_spec)
+        design, axes, samples, models = sweep.parse_spec(spec, base)
+    except (OSError, ValueError) as err:
+        raise SystemExit(f'{args.sweep_spec}: {err}')
+    design_seed = spec.get('seed', args.seed)
+    total = sweep.count_points(design, axes, samples)
+    out = args.sweep_out or f'Data/{Path(args.sweep_spec).stem}_points.csv'
+    names = [axis.name for axis in axes]
+    start_sweep_points(out, ['point', 'model', *names, *SWEEP_OUTCOMES])
+    Path(out).with_suffix('.meta.json').write_text(json.dumps(
+        {'spec': spec, 'design': design, 'points': total, 'models': models, 'design_seed': design_seed,
+         'run_seed': args.seed, 'max_steps': args.max_steps, 'engine': args.engine}, indent=1))
+    print(f'{design} design: {total} points x {len(models)} models -> {out}')
+
+    points = ((point, sweep.apply_point(base, point))
+              for point in sweep.design_points(design, axes, samples, design_seed))
+    workers = max(1, int(getattr(args, 'workers', 1) or 1))
+    reports = []
+    for job, (A, T, result, ensemble, report) in _stream_jobs(_spec_jobs(points, models, args), workers):
+        name, mis, col, phs, acc, reached, stopped = result
+        values = [job['values'][n] for n in names]
+        append_sweep_point(out, [job['point'], name, *values, *sweep_outcomes(mis, col, phs, acc, reached, stopped)])
+        print(f"Point {job['point'] + 1}/{total} {name}: " + ', '.join(f'{n}={v}' for n, v in zip(names, values)))
+        if report is not None:
+            reports.append(report)
+    if reports:
+        _write_profile(out, reports)
+    print(f'\nSweep complete. Per-run table: {out}')
+
+
+REACHED_CSV = 'Data/reached_timeseries.csv'
+ENSEMBLE_CSV = 'Data/ensemble_summary.csv'
+
+
+def _results_path(path, args):
+    """With --results-format columnar, a CSV path is replaced by its *.cols store."""
+    if getattr(args, 'results_format', 'csv') == 'columnar' and not is_columnar_store(path):
+        return columnar_path(path)
+    return path
+
+
+def _write_profile(results_path, reports):
+    """Per-run phase tables and the JSON report next to the results file."""
+    stem = Path(results_path).with_suffix('')
+    with open(f'{stem}.profile.json', 'w') as f:
+        json.dump(reports, f, indent=1)
+    with open(f'{stem}.profile.txt', 'w') as f:
+        for r in reports:
+            f.write(format_report(r, f"{r['model']}, A={r['agents']}, T={r['targets']}") + '\n\n')
+    print(f'Profile: {stem}.profile.txt, {stem}.profile.json')
 
 
 def _batch_sweep(args):
     """
     Sweep: agents {10,20,30,40} × targets {2,10} × models {majority,voter,kuramoto}
     Save per-checkpoint averages to the main CSV, and per-time-step agents-reached
-    to Data/reached_timeseries.csv.
+    to Data/reached_timeseries.csv. With --workers N the cells run in a process pool;
+    results are still written in sweep order. With --replicates R every cell is an ensemble of R
+    seeds: the CSVs above get the replicate means, Data/ensemble_summary.csv the mean and
+    confidence band, and Data/ensemble_*.npz the per-replicate series.
+    With --results-format columnar both outputs go to *.cols stores instead of CSV.
+    With --profile each cell is timed by phase; the tables and a JSON report are written next to
+    the results (<name>.profile.txt / <name>.profile.json).
+    --sample-steps / --sample-checkpoints thin the written series (SamplingPolicy); the policies are
+    recorded next to the results (<name>.meta.json, or index.json of a store).
     """
-    env0, sw0 = set_params()
-    agent_sizes  = [10, 20, 30, 40]
-    target_sizes = [2, 10]
-    model_keys   = ['majority', 'voter', 'kuramoto']
-
-    # Headless display/audio for batch runs
-    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
-    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+    env0, sw0 = _apply_cli_overrides(set_params(), args)
+    try:
+        step_sampling = SamplingPolicy.parse(getattr(args, 'sample_steps', 'all'))
+        checkpoint_sampling = SamplingPolicy.parse(getattr(args, 'sample_checkpoints', 'all'))
+    except ValueError as err:
+        raise SystemExit(str(err))
+
+    # Batch runs are headless (no pygame window / frame clock), so they need a step limit
+    if not args.max_steps:
+        raise SystemExit('--batch needs a step limit, e.g. -t 600')
     _ensure_data_dir()
 
-    from Utils.utils import _ensure_csv_with_header
-    _ensure_csv_with_header(args.csv_out)
-
+    metrics_out = _results_path(args.csv_out, args)
+    reached_out = _results_path(REACHED_CSV, args)
+    if not is_columnar_store(metrics_out):
+        from Utils.utils import _ensure_csv_with_header
+        _ensure_csv_with_header(metrics_out)
+
+    jobs = _sweep_jobs(env0, sw0, args)
+    workers = max(1, int(getattr(args, 'workers', 1) or 1))
+    reports = []
+    for _, (A, T, (name, mis, col, phs, acc, reached, stopped), ensemble, report) in _stream_jobs(jobs, workers):
+        # Legacy checkpoint CSV (unchanged)
+        append_metrics_to_csv(metrics_out, A, T, name, mis, col, phs, acc, sampling=checkpoint_sampling)
+
+        # NEW: per-time-step agents reached CSV
+        append_reached_timeseries(A, T, name, reached, csv_path=reached_out, sampling=step_sampling)
+
+        if ensemble is not None:
+            series, seeds = ensemble
+            per_checkpoint = {k: v for k, v in series.items() if k != 'agents_reached'}
+            append_ensemble_summary(A, T, name, per_checkpoint, sampling=checkpoint_sampling)
+            append_ensemble_summary(A, T, name, {'agents_reached': series['agents_reached']},
+                                    sampling=step_sampling)
+            save_ensemble_replicates(A, T, name, series, seeds)
+
+        if stopped is not None:
+            append_stop_step(A, T, name, stopped[0], args.max_steps, stopped[1])
+
+        print(f"Saved: A={A}, T={T}, model={name}, checkpoints={len(mis)}, steps={len(reached)}"
+              + (f", stopped at {stopped[0]} ({stopped[1]})" if stopped and stopped[1] else ''))
+        if report is not None:
+            reports.append(report)
+            print(format_report(report, f'{name}, A={A}, T={T}'))
+
+    if reports:
+        _write_profile(metrics_out, reports)
+    record_sampling(metrics_out, checkpoints=checkpoint_sampling)
+    record_sampling(reached_out, steps=step_sampling)
+    if (getattr(args, 'replicates', 1) or 1) > 1:
+        record_sampling(ENSEMBLE_CSV, checkpoints=checkpoint_sampling, steps=step_sampling)
+
+    print(f"\nSweep complete. Results: {metrics_out}")
+    print(f"Agents-reached timeseries: {reached_out}")
+    print(f"All figures:\n  python main.py --plot-all --csv-in {metrics_out}")
+    print(f"Direction mismatch figs:\n  python main.py --plot-only --csv-in {metrics_out}")
+    print(f"Collision figs:\n  python main.py --plot-collision --csv-in {metrics_out}")
+    print(f"Phase-sync figs (Kuramoto):\n  python main.py --plot-phase --csv-in {metrics_out}")
+    print(f"Agents-reached figs:\n  python main.py --plot-accuracy --results-format {args.results_format}")  # reuse flag to avoid new CLI param
+
+
+def _bench_case(case):
+    """Run one benchmark case (pool entry point; each case gets a fresh process for its peak memory)."""
+    env_params, swarm_params = case['params']
+    seed = int(np.random.SeedSequence([case['seed'], case['agents'], case['targets']]).generate_state(1)[0])
+    scenario = make_scenario(case['params'], seed)
+    random.seed(seed)
+    np.random.seed(seed)
+    rss_before = benchmark.peak_rss_mb()
+    timer = PhaseTimer()
+    # the models' per-checkpoint "Info:" lines would otherwise be timed as part of model.update
+    with contextlib.redirect_stdout(io.StringIO()):
+        _run_one(case['params'], case['model_key'], max_steps=case['steps'], engine=case['engine'],
+                 update_order=case['update_order'], initial_conditions=scenario, timer=timer)
+    peak = benchmark.peak_rss_mb()
+    report = timer.report()
+    fields = ('model_key', 'engine', 'update_order', 'agents', 'targets', 'steps')
+    return {**{key: case[key] for key in fields},
+            'seed': seed, 'hurdles': env_params['NUM_HURDLE'], 'kernels': kernel_backend(),
+            'steps_per_s': report['steps_per_s'], 'wall_s': report['wall_s'],
+            'peak_rss_mb': peak, 'rss_growth_mb': None if peak is None else peak - rss_before,
+            'phases': report['phases'], 'counters': report['counters']}
+
+
+def _benchmark(args):
+    """
+    Headless, fixed-seed, fixed-step scaling runs: agents × targets × models. Results go to
+    --bench-out as JSON; with a baseline file present they are compared against it and the process
+    exits non-zero on a regression beyond --bench-threshold.
+    """
+    env0, sw0 = _apply_cli_overrides(set_params(), args)
+    agent_sizes = args.bench_agents or benchmark.default_agents(args.engine, args.update_order)
+    target_sizes = args.bench_targets or benchmark.DEFAULT_TARGETS
+    models = args.bench_models or benchmark.MODEL_KEYS
+    steps = args.max_steps or 200
+    seed = 0 if args.seed is None else args.seed
+
+    cases = []
     for A in agent_sizes:
         for T in target_sizes:
-            # Fresh params for this (A, T)
-            env = dict(env0)
-            swarm = dict(sw0)
-            swarm['NUM_AGENTS'] = A
-            env['NUM_TARGET']   = T
-            params = [env, swarm]
+            for mk in models:
+                env, swarm = dict(env0), dict(sw0)
+                swarm['NUM_AGENTS'] = A
+                env['NUM_TARGET'] = T
+                cases.append({'params': [env, swarm], 'model_key': mk, 'engine': args.engine,
+                              'update_order': args.update_order, 'agents': A, 'targets': T,
+                              'steps': steps, 'seed': seed})
+
+    results = []
+    with multiprocessing.Pool(processes=1, maxtasksperchild=1) as pool:
+        for result in pool.imap(_bench_case, cases):
+            results.append(result)
+            print(f"{result['model_key']:<10}A={result['agents']:<6}T={result['targets']:<5}"
+                  f"{result['steps_per_s']:>10.1f} steps/s")
+    print()
+    print(benchmark.format_results(results))
+    out = benchmark.save_results(args.bench_out, results, steps=steps, seed=seed, engine=args.engine,
+                                 update_order=args.update_order)
+    print('Benchmark results:', out)
+
+    if args.bench_save_baseline:
+        print('Baseline written:', benchmark.save_results(args.bench_baseline, results, steps=steps, seed=seed,
+                                                          engine=args.engine, update_order=args.update_order))
+        return
+    if not Path(args.bench_baseline).exists():
+        print(f'No baseline at {args.bench_baseline} (create one with --bench-save-baseline)')
+        return
+    rows = benchmark.compare_to_baseline(results, benchmark.load_results(args.bench_baseline),
+                                         args.bench_threshold)
+    print(benchmark.format_comparison(rows, args.bench_threshold))
+    if any(row[-1] for row in rows):
+        raise SystemExit(1)
 
-            for mk in model_keys:
-                name, mis, col, phs, acc, reached = _run_one(params, mk, max_steps=args.max_steps)
 
-                # Legacy checkpoint CSV (unchanged)
-                append_metrics_to_csv(args.csv_out, A, T, name, mis, col, phs, acc)
+def _self_check(args):
+    """Run Utils/checks.py (all checks, or the named ones); exits non-zero when one fails."""
+    unknown = [name for name in args.self_check if name not in checks.CHECKS]
+    if unknown:
+        raise SystemExit(f'Unknown checks: {", ".join(unknown)} (choose from {", ".join(checks.CHECKS)})')
+    results = checks.run_checks(args.self_check, make_model=make_model, run_one=_run_one, run_ensemble=_run_ensemble)
+    for name, passed, detail in results:
+        print(f"{'PASS' if passed else 'FAIL'}  {name:<24}{detail}")
+    if not all(passed for _, passed, _ in results):
+        raise SystemExit(1)
 
-                # NEW: per-time-step agents reached CSV
-                append_reached_timeseries(A, T, name, reached)
 
-                print(f"Saved: A={A}, T={T}, model={name}, checkpoints={len(mis)}, steps={len(reached)}")
+def main():
+    args = setup_perser()
+    if getattr(args, 'update_order', None) is None:
+        args.update_order = 'sequential'
+    if (getattr(args, 'replicates', 1) or 1) > 1 and args.update_order != 'synchronous':
+        raise SystemExit('--replicates steps the replicates together with the synchronous update rule, which does '
+                         'not reproduce the object engine; pass --update-order synchronous to use it')
+    if getattr(args, 'kernels', None):
+        print('Kernels:', set_backend(args.kernels))
+
+    if getattr(args, 'self_check', None) is not None:
+        _self_check(args)
+        return
 
-    print(f"\nSweep complete. CSV: {args.csv_out}")
-    print("Agents-reached timeseries: Data/reached_timeseries.csv")
-    print(f"Direction mismatch figs:\n  python main.py --plot-only --csv-in {args.csv_out}")
-    print(f"Collision figs:\n  python main.py --plot-collision --csv-in {args.csv_out}")
-    print(f"Phase-sync figs (Kuramoto):\n  python main.py --plot-phase --csv-in {args.csv_out}")
-    print(f"Agents-reached figs:\n  python main.py --plot-accuracy")  # reuse flag to avoid new CLI param
+    if getattr(args, 'benchmark', False):
+        _benchmark(args)
+        return
 
+    if getattr(args, 'sweep_spec', None):
+        _spec_sweep(args)
+        return
 
-def main():
-    args = setup_perser()
+    if getattr(args, 'export_csv', None):
+        print('CSV written to', export_store_to_csv(args.export_csv))
+        return
 
     # --- Plot-only branches (no simulation) ---
+    csv_in = _results_path(args.csv_in, args)
+    plot_opts = {'workers': max(1, int(getattr(args, 'workers', 1) or 1)),
+                 'force': getattr(args, 'force_plot', False)}
+    if getattr(args, 'plot_all', False):
+        written = plot_all_figures(csv_in, _results_path(REACHED_CSV, args), **plot_opts)
+        print(f"{len(written)} figure(s) written to Data/ (unchanged figures skipped)")
+        return
+
     if getattr(args, 'plot_only', False):
-        plot_figures_from_csv(args.csv_in)  # direction mismatch
+        plot_figures_from_csv(csv_in, **plot_opts)  # direction mismatch
         print("Figures written to Data/DirectionMismatch_*A_2T_vs_10T.png")
         return
 
     if getattr(args, 'plot_collision', False):
-        plot_collision_figures_from_csv(args.csv_in)  # collision
+        plot_collision_figures_from_csv(csv_in, **plot_opts)  # collision
         print("Figures written to Data/Collision_*A_2T_vs_10T.png")
         return
 
     if getattr(args, 'plot_phase', False):
-        plot_phase_figures_from_csv(args.csv_in)  # phase sync (Kuramoto)
+        plot_phase_figures_from_csv(csv_in, **plot_opts)  # phase sync (Kuramoto)
         print("Figures written to Data/PhaseSync_*A_2T_vs_10T.png")
         return
 
     # Reuse --plot-accuracy to plot the *new* per-time-step counts
     if getattr(args, 'plot_accuracy', False):
-        plot_reached_figures_from_csv('Data/reached_timeseries.csv')
+        plot_reached_figures_from_csv(_results_path(REACHED_CSV, args), **plot_opts)
         print("Figures written to Data/AgentsReached_*A_2T_vs_10T.png")
         return
 
@@ -138,7 +615,7 @@ def main():
         return
 
     # --- Single-run (interactive window) ---
-    params = set_params()
+    params = _apply_cli_overrides(set_params(), args)
 
     print('\n')
     print('%' * 60)
@@ -151,38 +628,64 @@ def main():
 
     display_simulation_config(params)
     if is_new_data:
-        simulation_init(params)
+        scenario = make_scenario(params, getattr(args, 'seed', None))
+        if getattr(args, 'export_scenario', None):
+            export_scenario(scenario, args.export_scenario)
+    else:
+        scenario = load_scenario()
 
-    data_list = read_from_file()
-    agent_pos = [tuple(element) for element in data_list[0]]
-    targets   = [tuple(element) for element in data_list[1]]
-    hurdles   = [tuple(element) for element in data_list[2]]
+    agent_pos, targets, hurdles = scenario_as_tuples(scenario)
 
-    simEnv = SimEnv(params, targets)
+    headless = getattr(args, 'headless', False)
+    if headless and not getattr(args, 'max_steps', 0):
+        raise SystemExit('--headless needs a step limit, e.g. -t 600')
+    timer = PhaseTimer() if getattr(args, 'profile', False) else None
+    simEnv = SimEnv(params, targets, headless=headless,
+                    keep_raw_metrics=getattr(args, 'keep_raw_metrics', False), timer=timer)
+    engine = (getattr(args, 'engine', 'object'), getattr(args, 'update_order', None))
 
     # Choose model by flags; default to Majority to avoid None crash
     if getattr(args, 'majority', False):
-        simEnv.model = MajorityRuleModel(agent_pos, targets, params)
+        simEnv.model = make_model('majority', agent_pos, targets, params, *engine)
         print('Model Select :', simEnv.model.Name)
     elif getattr(args, 'voter', False):
-        simEnv.model = VoterModel(agent_pos, targets, params)
+        simEnv.model = make_model('voter', agent_pos, targets, params, *engine)
         print('Model Select :', simEnv.model.Name)
     elif getattr(args, 'kuramoto', False):
-        simEnv.model = KuramotoModel(agent_pos, targets, params)
+        simEnv.model = make_model('kuramoto', agent_pos, targets, params, *engine)
         print('Model Select :', simEnv.model.Name)
     else:
         print('No model selected via CLI, defaulting to Majority Model (-m).')
-        simEnv.model = MajorityRuleModel(agent_pos, targets, params)
+        simEnv.model = make_model('majority', agent_pos, targets, params, *engine)
         print('Model Select :', simEnv.model.Name)
 
+    if getattr(args, 'restore', None):
+        simEnv.restore(args.restore)
+        print(f'Restored {args.restore}, continuing at step {simEnv.time_count}')
+    snapshot_path = None
+    if getattr(args, 'snapshot_every', 0) or getattr(args, 'snapshot_at', None):
+        snapshot_path = args.snapshot_path.replace('{model}', simEnv.model.Name.replace(' ', '_'))
     performance_data = simEnv.run_simulation(
         hurdles,
         targets,
-        max_steps=getattr(args, 'max_steps', 0)
+        max_steps=getattr(args, 'max_steps', 0),
+        resume=bool(getattr(args, 'restore', None)),
+        snapshot_path=snapshot_path,
+        snapshot_every=getattr(args, 'snapshot_every', 0),
+        snapshot_steps=getattr(args, 'snapshot_at', None),
     )
     plot_performance_graph(simEnv.model.Name, performance_data, params)
     simEnv.close_sim()
 
+    if timer is not None:
+        env_params, swarm_params = params
+        A, T = swarm_params['NUM_AGENTS'], env_params['NUM_TARGET']
+        print(timer.summary_table(f'{simEnv.model.Name}, A={A}, T={T}'))
+        slug = simEnv.model.Name.replace(' ', '_')
+        out = timer.write_json(f'Data/profile_{slug}_{A}A_{T}T.json', agents=A, targets=T,
+                               model=simEnv.model.Name, engine=engine[0])
+        print('Profile:', out)
+
 
 if __name__ == "__main__":
     main()